@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Video Generator Benchmark
+
+Times pictionary-python-generator.py stage by stage on synthetic game
+directories, so runs can be compared across code changes and machines
+without depending on whatever game the Node script last produced.
+
+Each game directory is generated from a seed: round_N.png line-art doodles
+and round_N_summary.txt files in the format the Node script writes. For
+every round count the benchmark times:
+
+    preprocess   FrameGenerationConfig text layout, image resize and stroke extraction
+    scroll       scroll state computation
+    timeline     compiling every frame's display list
+    render       compositing every frame (held frames are reused, nothing is encoded)
+    audio        custom audio track synthesis (needs thinking.flac and drawing.mp3)
+    encode       rendering and streaming every frame into ffmpeg
+    vfr          the same with --vfr: only distinct frames are rendered and encoded
+    filtergraph  rendering and encoding in ffmpeg filtergraphs instead of Python
+
+Results are printed and written as JSON:
+
+    python benchmark_generator.py --rounds 3 10 --output benchmark.json
+"""
+
+import argparse
+import datetime
+import json
+import multiprocessing as mp
+import os
+import platform
+import random
+import shutil
+import subprocess
+import tempfile
+import time
+
+import numpy as np
+import PIL
+from PIL import Image, ImageDraw
+
+from pictionary_generator import load_generator
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+PROMPT_VOCABULARY = [
+    "cat", "rocket", "tree house", "submarine", "sandwich", "elephant", "dancing", "pickles",
+    "mustard", "lighthouse", "volcano", "penguin", "umbrella", "bicycle", "castle", "dragon",
+    "wizard", "guitar", "cactus", "robot", "octopus", "pirate", "balloon", "waterfall"
+]
+
+
+def make_line_art(rng, size):
+    """Seeded black-on-white doodle: strokes of varying width, loops and specks"""
+    image = Image.new('RGB', (size, size), (255, 255, 255))
+    draw = ImageDraw.Draw(image)
+    margin = size // 20
+    for _ in range(rng.randint(6, 14)):
+        points = [(rng.randint(margin, size - margin), rng.randint(margin, size - margin))
+                  for _ in range(rng.randint(2, 6))]
+        draw.line(points, fill=(0, 0, 0), width=rng.randint(2, 8))
+    for _ in range(rng.randint(2, 5)):
+        x, y = rng.randint(margin, size // 2), rng.randint(margin, size // 2)
+        extent = rng.randint(size // 10, size // 3)
+        draw.ellipse((x, y, x + extent, y + extent), outline=(30, 30, 30), width=rng.randint(2, 5))
+    for _ in range(rng.randint(10, 60)):
+        x, y = rng.randrange(size), rng.randrange(size)
+        draw.point((x, y), fill=(rng.randint(0, 60),) * 3)
+    return image
+
+
+def make_synthetic_game(game_dir, num_rounds, prompt_words=3, seed=0, image_size=1024):
+    """Write a seeded game directory with round_N.png and round_N_summary.txt files"""
+    rng = random.Random(seed)
+    os.makedirs(game_dir, exist_ok=True)
+    for round_num in range(1, num_rounds + 1):
+        prompt = ' '.join(rng.choice(PROMPT_VOCABULARY) for _ in range(max(1, prompt_words)))
+        guess = ' '.join(rng.choice(PROMPT_VOCABULARY) for _ in range(max(1, prompt_words)))
+        make_line_art(rng, image_size).save(os.path.join(game_dir, f"round_{round_num}.png"))
+        with open(os.path.join(game_dir, f"round_{round_num}_summary.txt"), 'w') as f:
+            f.write(f"Round {round_num}\n"
+                    f"--------\n"
+                    f"Actual Word: {prompt}\n"
+                    f"Image File: round_{round_num}.png\n"
+                    f"AI's Guess: {guess}\n"
+                    f"Was Correct: false\n")
+    return game_dir
+
+
+class NullFrameWriter:
+    """Stands in for FFmpegFrameWriter when only rendering is timed"""
+    def __init__(self):
+        self.frames_written = 0
+
+    def write(self, frame_bytes):
+        self.frames_written += 1
+
+    def close(self):
+        pass
+
+    def abort(self):
+        pass
+
+
+def timed(function, *args, **kwargs):
+    """Run a function and return (result, seconds)"""
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def benchmark_game(generator, game_dir, args):
+    """Time every stage for one game directory and return the results"""
+    all_rounds = generator.read_game_log(game_dir)
+    frames_per_round = int(args.duration * args.fps)
+    timing = dict(
+        frames_per_round=frames_per_round,
+        initial_loading=int(frames_per_round * 0.18),
+        text_phase=int(frames_per_round * 0.26),
+        image_delay=int(frames_per_round * 0.18),
+        drawing_phase=int(frames_per_round * 0.4)
+    )
+    total_frames = frames_per_round * len(all_rounds)
+    stages = {}
+
+    config = generator.FrameGenerationConfig(
+        all_rounds=all_rounds,
+        total_rounds=len(all_rounds),
+        duration=args.duration,
+        fps=args.fps,
+        font_path=args.font,
+        title_duration_frames=int(3 * args.fps),
+        part_number=1,
+        cache_dir=args.cache_dir,
+        reveal=args.reveal,
+        **timing
+    )
+    # The constructor runs every preparation stage; time each of them again on its own. Preprocessing
+    # gets new caches like the constructor's, so only the --cache-dir entries it wrote are reused
+    config.text_layouts = generator.TextLayoutCache(config.text_layouts.font_path, args.cache_dir, config.geometry)
+    config.element_cache = generator.ElementCache(args.cache_dir, config.geometry, args.reveal)
+    _, stages['preprocess'] = timed(config._preprocess_elements)
+    _, stages['scroll'] = timed(config._calculate_scroll_states)
+    _, stages['timeline'] = timed(generator.Timeline.compile, config)
+
+    window = (args.workers or generator.default_num_workers(args.backend)) * 2
+    frame_backend = generator.create_frame_backend(args.backend, config, args.workers, slots=window)
+    try:
+        reused_frames, stages['render'] = timed(
+            generator.encode_frame_range, config, frame_backend, NullFrameWriter(), range(total_frames), window
+        )
+    finally:
+        frame_backend.close()
+
+    thinking_file = os.path.join(SCRIPT_DIR, 'thinking.flac')
+    drawing_file = os.path.join(SCRIPT_DIR, 'drawing.mp3')
+    custom_audio = None
+    if shutil.which('ffmpeg') and os.path.exists(thinking_file) and os.path.exists(drawing_file):
+        custom_audio = os.path.join(game_dir, 'custom_audio.wav')
+        _, stages['audio'] = timed(
+            generator.create_audio_track,
+            fps=args.fps,
+            rounds=all_rounds,
+            thinking_file=thinking_file,
+            drawing_file=drawing_file,
+            output_audio=custom_audio,
+            cache_dir=args.cache_dir,
+            **timing
+        )
+    else:
+        stages['audio'] = None
+
+    if args.skip_encode or not shutil.which('ffmpeg'):
+        stages['encode'] = None
+        stages['vfr'] = None
+        stages['filtergraph'] = None
+    else:
+        output_file = os.path.join(game_dir, 'benchmark.mp4')
+        _, stages['encode'] = timed(
+            generator.stream_frames_to_ffmpeg, config, output_file,
+            num_threads=args.workers, backend=args.backend, custom_audio=custom_audio
+        )
+        _, stages['vfr'] = timed(
+            generator.stream_frames_to_ffmpeg, config, os.path.join(game_dir, 'benchmark_vfr.mp4'),
+            num_threads=args.workers, backend=args.backend, custom_audio=custom_audio, vfr=True
+        )
+        _, stages['filtergraph'] = timed(
+            generator.encode_filtergraph, config, os.path.join(game_dir, 'benchmark_filtergraph.mp4'),
+            num_jobs=args.workers, custom_audio=custom_audio
+        )
+
+    return {
+        'rounds': len(all_rounds),
+        'frames': total_frames,
+        'distinct_frames': total_frames - reused_frames,
+        'stages': stages
+    }
+
+
+def summarize(samples):
+    """Median and spread of repeated stage timings"""
+    values = [value for value in samples if value is not None]
+    if not values:
+        return None
+    return {'median': float(np.median(values)), 'min': min(values), 'max': max(values), 'runs': values}
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=SCRIPT_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description='Benchmark the Pictionary video generator on synthetic games')
+    parser.add_argument('--rounds', type=int, nargs='+', default=[3, 10],
+                        help='Round counts to benchmark (default: 3 10)')
+    parser.add_argument('--prompt-words', type=int, default=3,
+                        help='Words per synthetic prompt (default: 3)')
+    parser.add_argument('--image-size', type=int, default=1024,
+                        help='Side of the synthetic round images in pixels (default: 1024)')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Seed for the synthetic games (default: 0)')
+    parser.add_argument('--duration', type=float, default=3,
+                        help='Seconds per round (default: 3)')
+    parser.add_argument('--fps', type=int, default=30,
+                        help='Frames per second (default: 30)')
+    parser.add_argument('--font', type=str, default=None,
+                        help='Font file to use (default: system font)')
+    parser.add_argument('--backend', choices=['thread', 'process'], default='thread',
+                        help='Frame rendering backend (default: thread)')
+    parser.add_argument('--reveal', choices=['pixel', 'pen'], default='pixel',
+                        help='Drawing animation to preprocess and render (default: pixel)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Number of render workers (default: the backend default)')
+    parser.add_argument('--repeat', type=int, default=1,
+                        help='Runs per round count; stage timings report the median (default: 1)')
+    parser.add_argument('--cache-dir', type=str, default=None,
+                        help='Render cache directory (default: none, so every run starts cold)')
+    parser.add_argument('--skip-encode', action='store_true',
+                        help='Do not run the ffmpeg encode, vfr and filtergraph stages')
+    parser.add_argument('--games-dir', type=str, default=None,
+                        help='Where to write the synthetic games (default: a temporary directory)')
+    parser.add_argument('--output', '-o', type=str, default='benchmark_results.json',
+                        help='JSON results file (default: benchmark_results.json)')
+    args = parser.parse_args()
+
+    generator = load_generator()
+    if args.font is None:
+        args.font = generator.get_default_font()
+
+    games_dir = args.games_dir or tempfile.mkdtemp(prefix='pictionary_benchmark_')
+    results = []
+    try:
+        for num_rounds in args.rounds:
+            game_dir = make_synthetic_game(os.path.join(games_dir, f"game_{num_rounds}_rounds"), num_rounds,
+                                           prompt_words=args.prompt_words, seed=args.seed,
+                                           image_size=args.image_size)
+            runs = []
+            for run in range(args.repeat):
+                print(f"=== {num_rounds} rounds, run {run + 1}/{args.repeat} ===")
+                runs.append(benchmark_game(generator, game_dir, args))
+
+            result = {key: runs[0][key] for key in ('rounds', 'frames', 'distinct_frames')}
+            result['stages'] = {stage: summarize([run['stages'][stage] for run in runs])
+                                for stage in runs[0]['stages']}
+            for stage in ('render', 'encode', 'vfr', 'filtergraph'):
+                timing = result['stages'][stage]
+                result[f'{stage}_fps'] = result['frames'] / timing['median'] if timing else None
+            results.append(result)
+    finally:
+        if not args.games_dir:
+            shutil.rmtree(games_dir, ignore_errors=True)
+
+    report = {
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'git_commit': git_commit(),
+        'machine': {
+            'platform': platform.platform(),
+            'processor': platform.processor(),
+            'cpu_count': mp.cpu_count(),
+            'python': platform.python_version(),
+            'pillow': PIL.__version__,
+            'numpy': np.__version__
+        },
+        'parameters': {key: value for key, value in vars(args).items() if key not in ('output', 'games_dir')},
+        'results': results
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print("\n=== Benchmark Results ===")
+    for result in results:
+        stages = ', '.join(f"{stage} {timing['median']:.2f}s" if timing else f"{stage} skipped"
+                           for stage, timing in result['stages'].items())
+        print(f"{result['rounds']} rounds ({result['frames']} frames, {result['distinct_frames']} distinct): {stages}")
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
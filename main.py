@@ -193,7 +193,17 @@ def generate_video(game_dir, part_number=None):
         print(f"Video saved to: {output_path}")
     else:
         print(f"Warning: Expected video file not found at {temp_video_path}")
-    
+
+    # The generator writes <video name>_thumbnail.png next to the video
+    thumbnail_name = os.path.splitext(output_name)[0] + '_thumbnail.png'
+    temp_thumbnail_path = os.path.join(game_dir, thumbnail_name)
+    if os.path.exists(temp_thumbnail_path):
+        import shutil
+        shutil.move(temp_thumbnail_path, os.path.join(videos_dir, thumbnail_name))
+        print(f"Thumbnail saved to: {os.path.join(videos_dir, thumbnail_name)}")
+    else:
+        print(f"Warning: Expected thumbnail not found at {temp_thumbnail_path}")
+
     return output_path
 
 
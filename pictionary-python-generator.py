@@ -1,12 +1,12 @@
 import os
 import subprocess
 import argparse
-from PIL import Image, ImageDraw, ImageFont
-import sys
+from PIL import Image, ImageDraw, PngImagePlugin
 import datetime
 import re
 import random
-from collections import deque
+from collections import deque, OrderedDict
+import numpy as np
 import tempfile
 import shutil
 import multiprocessing as mp
@@ -14,6 +14,15 @@ from functools import partial
 import concurrent.futures
 import json
 import time
+import hashlib
+import threading
+import bisect
+import itertools
+import wave
+import zipfile
+from multiprocessing import shared_memory
+from pictionary_fonts import get_default_font, get_font, get_glyph_metrics, set_font_index_path
+import pictionary_trace as trace
 
 # Constants
 VIDEO_WIDTH = 1080  # Vertical video width
@@ -26,12 +35,116 @@ TEXT_PADDING = 30  # Reduced padding between elements
 SCROLL_ANIMATION_FRAMES = 15  # Number of frames for smooth scroll animation
 LOADING_EXTRA_PADDING = 24  # Extra vertical space above loading indicator if not first
 BOTTOM_PADDING = 90  # Bottom padding for all content
+CONTENT_TOP = 150  # Y position where the first element starts
+LOADING_HEIGHT = 160  # Height of the loading indicator sprite
+LINE_ART_INK = (0, 0, 0)  # Colour that text and drawing coverage masks are painted with
+COVERAGE_SPRITE_KINDS = ('text', 'drawing')  # Sprites stored as 'L' coverage masks
+ANIMATED_SPRITE_KINDS = ('loading', 'drawing')  # Sprites whose id ends in an animation step
+VISUAL_LEAD_FRAMES = 3  # The visuals lead the music cues by this many frames
+DEFAULT_CACHE_DIR = os.environ.get('PICTIONARY_CACHE_DIR',
+                                   os.path.join(os.path.expanduser('~'), '.cache', 'ai_pictionary'))
+ELEMENT_CACHE_MAX_BYTES = 512 * 1024 * 1024  # Size bound of the on-disk cache of preprocessed images
+STROKE_THRESHOLD = 80  # Gray level below which an image pixel belongs to a stroke
+REVEAL_MODES = ('pixel', 'pen')  # How the drawing animation reveals a round image's strokes
+PEN_STEP = 12  # Longest piece of pen path revealed at once, in full-size pixels
+PEN_TOLERANCE = 1.0  # Largest deviation of a simplified pen path from the stroke skeleton, in full-size pixels
+DRAFT_SCALE = 0.5  # --draft renders at half resolution (540x960)
+DRAFT_FPS = 15  # and half the frame rate
+DRAFT_PRESET = 'ultrafast'  # x264 preset used for drafts
+
+class FrameGeometry:
+    """Frame size and the layout measurements that scale with it
+    
+    Everything is laid out for VIDEO_WIDTH x VIDEO_HEIGHT; other sizes scale
+    paddings, margins and font sizes by width / VIDEO_WIDTH. At full size
+    every value is exactly the module constant it comes from. The rounds are
+    laid out in a column `width` wide; a wider frame_width centres that
+    column in the frame, `left` pixels from its left edge.
+    """
+    def __init__(self, width=VIDEO_WIDTH, height=VIDEO_HEIGHT, frame_width=None):
+        self.width = width
+        self.height = height
+        self.frame_width = frame_width or width
+        self.left = (self.frame_width - width) // 2
+        self.scale = width / VIDEO_WIDTH
+        self.text_padding = self.px(TEXT_PADDING)
+        self.loading_extra_padding = self.px(LOADING_EXTRA_PADDING)
+        self.bottom_padding = self.px(BOTTOM_PADDING)
+        self.content_top = self.px(CONTENT_TOP)
+        self.loading_height = self.px(LOADING_HEIGHT)
+    
+    @classmethod
+    def scaled(cls, scale):
+        """Geometry for the full-size frame scaled by `scale`, rounded to even dimensions for yuv420p"""
+        return cls(int(VIDEO_WIDTH * scale) // 2 * 2, int(VIDEO_HEIGHT * scale) // 2 * 2)
+    
+    def variant(self, frame_width, frame_height):
+        """Geometry of a frame_width x frame_height full-size frame at this scale, with the same layout column"""
+        if frame_width < VIDEO_WIDTH:
+            raise ValueError(f"A {frame_width}x{frame_height} frame is narrower than the {VIDEO_WIDTH}px layout column")
+        return FrameGeometry(self.width, int(frame_height * self.scale) // 2 * 2,
+                             int(frame_width * self.scale) // 2 * 2)
+    
+    def px(self, value):
+        """A full-size length in pixels at this geometry's scale"""
+        return int(round(value * self.scale))
+    
+    def font_sizes(self, sizes):
+        """Scaled candidate font sizes, largest first and without duplicates"""
+        scaled = []
+        for size in sizes:
+            size = max(1, self.px(size))
+            if size not in scaled:
+                scaled.append(size)
+        return scaled
+    
+    def __repr__(self):
+        if self.frame_width != self.width:
+            return f"FrameGeometry({self.width}, {self.height}, frame_width={self.frame_width})"
+        return f"FrameGeometry({self.width}, {self.height})"
+
+def round_phases(round_idx, frames_per_round, initial_loading, text_phase, image_delay, drawing_phase):
+    """Phases of a round as (name, start, end) frame ranges from the round start, in play order
+    
+    Round 0 shows its word, then generates and draws its image; later rounds
+    first analyze the previous image ('analyzing'). The drawing phase reveals
+    the strokes and the reveal phase holds the finished image until the round
+    ends. A phase that the previous one runs over is empty. The frame
+    renderer, the scroll model and the audio cues all read these ranges.
+    """
+    if round_idx == 0:
+        generate_start = int(frames_per_round * 0.18)
+        phase_ends = [('word', generate_start),
+                      ('generating', generate_start + image_delay - VISUAL_LEAD_FRAMES)]
+    else:
+        phase_ends = [('analyzing', initial_loading),
+                      ('word', initial_loading + text_phase - VISUAL_LEAD_FRAMES),
+                      ('generating', initial_loading + text_phase + image_delay - VISUAL_LEAD_FRAMES)]
+    
+    phases = []
+    start = 0
+    for name, end in phase_ends:
+        end = max(start, end)
+        phases.append((name, start, end))
+        start = end
+    phases.append(('drawing', start, start + drawing_phase))
+    phases.append(('reveal', start + drawing_phase, max(frames_per_round, start + drawing_phase)))
+    return phases
+
+def phase_at(phases, frame_in_round):
+    """(name, start) of the phase in round_phases() that contains frame_in_round"""
+    for name, start, end in phases:
+        if frame_in_round < end:
+            return name, start
+    name, start, _ = phases[-1]
+    return name, start
 
 class FrameGenerationConfig:
     """Configuration class to hold all frame generation parameters"""
     def __init__(self, all_rounds, total_rounds, duration, fps, font_path, 
                  frames_per_round, initial_loading, text_phase, image_delay, 
-                 drawing_phase, title_duration_frames, part_number=None):
+                 drawing_phase, title_duration_frames, part_number=None, cache_dir=None, geometry=None,
+                 reveal='pixel'):
         self.all_rounds = all_rounds
         self.total_rounds = total_rounds
         self.duration = duration
@@ -44,91 +157,163 @@ class FrameGenerationConfig:
         self.drawing_phase = drawing_phase
         self.title_duration_frames = title_duration_frames
         self.part_number = part_number
+        self.cache_dir = cache_dir
+        self.geometry = geometry or FrameGeometry()
+        self.reveal = reveal
+        self.round_phases = [round_phases(round_idx, frames_per_round, initial_loading, text_phase, image_delay,
+                                          drawing_phase) for round_idx in range(len(all_rounds))]
         
-        # Pre-calculate all scroll states for each frame
-        self.scroll_states = self._calculate_scroll_states()
+        # Loading indicators and the title are rendered once per distinct sprite
+        self.sprites = SpriteCache(font_path, cache_dir, self.geometry)
+        
+        # Round images are resized and their strokes extracted once per image file
+        self.element_cache = ElementCache(cache_dir, self.geometry, reveal)
+        
+        # Text layouts are computed once per prompt and shared by layout and rendering
+        self.text_layouts = TextLayoutCache(font_path if font_path else get_default_font(bold=True), cache_dir,
+                                            self.geometry)
         
         # Pre-process all images and text elements
-        self.processed_elements = self._preprocess_elements()
+        with trace.span('preprocess elements'):
+            self.processed_elements = self._preprocess_elements()
+        
+        # Measure every round once and lay completed rounds out as a flat list
+        with trace.span('layout model'):
+            self._build_layout_model()
+        
+        # Pre-calculate all scroll states for each frame
+        with trace.span('scroll states'):
+            self.scroll_states = self._calculate_scroll_states()
         
+        # Completed rounds are composited once into a strip that frames crop
+        self.history = HistoryStrip(self)
+        
+        # Frames are assembled in NumPy buffers from cached sprite arrays
+        self.compositor = FrameCompositor(self)
+        
+        # Every frame's display list, compiled once for the renderers
+        with trace.span('timeline'):
+            self.timeline = Timeline.compile(self)
+    
+    def __getstate__(self):
+        """Pickle without the elements and sprite caches, which worker processes rebuild"""
+        state = self.__dict__.copy()
+        for key in ('processed_elements', 'sprites', 'text_layouts', 'history', 'compositor'):
+            state.pop(key, None)
+        return state
+    
+    def variant(self, geometry):
+        """A view of this config that shows the same part in another frame size
+        
+        The geometry must keep this config's layout column (see
+        FrameGeometry.variant). The preprocessed elements, text layouts,
+        layout model and history strip are shared; the title, scroll states,
+        compositor and timeline depend on the frame size and are the view's own.
+        """
+        if (geometry.width, geometry.scale) != (self.geometry.width, self.geometry.scale):
+            raise ValueError(f"{geometry} does not share the layout column of {self.geometry}")
+        view = object.__new__(FrameGenerationConfig)
+        view.__dict__.update(self.__dict__)
+        view.geometry = geometry
+        view.sprites = SpriteCache(self.font_path, self.cache_dir, geometry)
+        with trace.span('scroll states', variant=f"{geometry.frame_width}x{geometry.height}"):
+            view.scroll_states = view._calculate_scroll_states()
+        view.compositor = FrameCompositor(view)
+        with trace.span('timeline', variant=f"{geometry.frame_width}x{geometry.height}"):
+            view.timeline = Timeline.compile(view)
+        return view
+    
+    def _build_layout_model(self):
+        """Measure each round's elements once and precompute their positions
+        
+        Completed rounds always show their text and image, stacked from the
+        content top with the text padding after each element. Their positions are
+        prefix sums over the element heights: history_tops/history_bottoms hold
+        the absolute span of every completed-round element, round_history_end[r]
+        the number of those elements that belong to rounds before r, and
+        round_content_top[r] the y at which round r starts.
+        """
+        self.round_text_heights = []
+        self.round_image_heights = []
+        self.history_keys = []
+        self.history_tops = []
+        self.history_bottoms = []
+        self.round_history_end = [0]
+        self.round_content_top = [self.geometry.content_top]
+        
+        y = self.geometry.content_top
+        for round_idx in range(len(self.all_rounds)):
+            text_img = self.processed_elements.get(f'text_{round_idx}')
+            round_img = self.processed_elements.get(f'image_{round_idx}')
+            self.round_text_heights.append(text_img.height if text_img else 0)
+            self.round_image_heights.append(round_img.height if round_img else 0)
+            
+            for key, element in ((f'text_{round_idx}', text_img), (f'image_{round_idx}', round_img)):
+                if element:
+                    self.history_keys.append(key)
+                    self.history_tops.append(y)
+                    self.history_bottoms.append(y + element.height)
+                    y += element.height + self.geometry.text_padding
+            
+            self.round_history_end.append(len(self.history_keys))
+            self.round_content_top.append(y)
+    
+    def _current_round_height(self, round_idx, phase):
+        """Height taken by the live elements of the round being played in a phase"""
+        geometry = self.geometry
+        text_height = self.round_text_heights[round_idx] + geometry.text_padding
+        image_height = self.round_image_heights[round_idx] + geometry.text_padding if self.round_image_heights[round_idx] else 0
+        loading_height = geometry.loading_extra_padding + geometry.loading_height + geometry.text_padding
+        
+        if phase == 'analyzing':
+            # Analyzing phase: only loading
+            return loading_height
+        elif phase == 'word':
+            # Word reveal phase: only text
+            return text_height
+        elif phase == 'generating':
+            # Generating phase: text + loading
+            return text_height + loading_height
+        # Drawing/reveal phase: text + image
+        return text_height + image_height
+    
     def _calculate_scroll_states(self):
-        """Pre-calculate scroll states for all frames to avoid coordination issues"""
+        """Pre-calculate scroll states for all frames to avoid coordination issues
+        
+        The title is drawn first, under the content. In frames shorter than the
+        vertical layout (square and landscape variants) the first round would
+        cover it, so while the title is shown the content is scrolled far
+        enough to stay above its top edge and eased back down afterwards.
+        Full-height frames scroll exactly as they always have.
+        """
         scroll_states = []
         current_scroll = 0
         last_round = -1
         scroll_start = 0
         scroll_frames = 0
+        hold_for_title = self.title_duration_frames and self.geometry.height < self.geometry.px(VIDEO_HEIGHT)
+        title_top = self.sprites.title(self.part_number)[1] if hold_for_title else None
+        held_by_title = False
         
         for frame in range(self.frames_per_round * self.total_rounds):
             current_round = frame // self.frames_per_round
             frame_in_round = frame % self.frames_per_round
             
-            # Calculate total height based on what's actually visible at this frame
-            total_height = 150  # Start with top padding to match positioning
-            
-            # Add completed rounds (always show text + image)
-            for round_idx in range(current_round):
-                if round_idx < len(self.all_rounds):
-                    # Text height
-                    text = self.all_rounds[round_idx]['prompt']
-                    text_height = self._estimate_text_height(text)
-                    total_height += text_height + TEXT_PADDING
-                    
-                    # Image height if exists
-                    if 'image' in self.all_rounds[round_idx]:
-                        img_height = self._estimate_image_height(self.all_rounds[round_idx]['image'])
-                        total_height += img_height + TEXT_PADDING
-            
-            # Add current round content based on the current phase
+            # Content height at this frame: completed rounds (a prefix sum) plus
+            # whatever the current round shows in its current phase
+            total_height = self.round_content_top[min(current_round, len(self.all_rounds))]
             if current_round < len(self.all_rounds):
-                if current_round == 0:
-                    # First round logic
-                    GENERATE_DELAY_FRAMES = int(self.frames_per_round * 0.18)
-                    
-                    # Always show text for first round
-                    text = self.all_rounds[current_round]['prompt']
-                    text_height = self._estimate_text_height(text)
-                    total_height += text_height + TEXT_PADDING
-                    
-                    # Add loading or image based on phase
-                    if frame_in_round >= GENERATE_DELAY_FRAMES and frame_in_round < GENERATE_DELAY_FRAMES + self.image_delay - 3:
-                        total_height += LOADING_EXTRA_PADDING + 160 + TEXT_PADDING  # Loading indicator
-                    elif frame_in_round >= GENERATE_DELAY_FRAMES + self.image_delay - 3:
-                        if 'image' in self.all_rounds[current_round]:
-                            img_height = self._estimate_image_height(self.all_rounds[current_round]['image'])
-                            total_height += img_height + TEXT_PADDING
-                else:
-                    # Subsequent rounds logic
-                    if frame_in_round < self.initial_loading:
-                        # Analyzing phase: only loading
-                        total_height += LOADING_EXTRA_PADDING + 160 + TEXT_PADDING
-                    elif frame_in_round < self.initial_loading + self.text_phase - 3:
-                        # Word reveal phase: only text
-                        text = self.all_rounds[current_round]['prompt']
-                        text_height = self._estimate_text_height(text)
-                        total_height += text_height + TEXT_PADDING
-                    elif frame_in_round < self.initial_loading + self.text_phase + self.image_delay - 3:
-                        # Generating phase: text + loading
-                        text = self.all_rounds[current_round]['prompt']
-                        text_height = self._estimate_text_height(text)
-                        total_height += text_height + TEXT_PADDING + LOADING_EXTRA_PADDING + 160 + TEXT_PADDING
-                    elif frame_in_round >= self.initial_loading + self.text_phase + self.image_delay - 3:
-                        # Drawing/reveal phase: text + image
-                        text = self.all_rounds[current_round]['prompt']
-                        text_height = self._estimate_text_height(text)
-                        total_height += text_height + TEXT_PADDING
-                        if 'image' in self.all_rounds[current_round]:
-                            img_height = self._estimate_image_height(self.all_rounds[current_round]['image'])
-                            total_height += img_height + TEXT_PADDING
+                phase, _ = phase_at(self.round_phases[current_round], frame_in_round)
+                total_height += self._current_round_height(current_round, phase)
             
             # Add bottom padding
-            total_height += 90
+            total_height += self.geometry.bottom_padding
             
             # Only scroll if content actually exceeds the video height
             # No buffer - precise calculation
-            target_scroll = max(0, total_height - VIDEO_HEIGHT)
+            target_scroll = max(0, total_height - self.geometry.height)
             
-            if current_round != last_round:
+            if current_round != last_round or (frame == self.title_duration_frames and held_by_title):
                 scroll_start = current_scroll
                 scroll_frames = 0
                 last_round = current_round
@@ -140,151 +325,18 @@ class FrameGenerationConfig:
                 scroll_frames += 1
             else:
                 current_scroll = target_scroll
+            
+            if hold_for_title and frame < self.title_duration_frames:
+                # The last element ends before its trailing padding and the bottom padding
+                content_bottom = total_height - self.geometry.bottom_padding - self.geometry.text_padding
+                held_by_title = content_bottom - title_top > current_scroll
+                if held_by_title:
+                    current_scroll = content_bottom - title_top
                 
             scroll_states.append(current_scroll)
             
         return scroll_states
     
-    def _calculate_total_height(self, visible_rounds):
-        """Calculate total height for a given number of visible rounds"""
-        total_height = 90  # Add top padding to match the positioning logic
-        for round_idx in range(min(visible_rounds, len(self.all_rounds))):
-            # Text height
-            text = self.all_rounds[round_idx]['prompt']
-            text_height = self._estimate_text_height(text)
-            total_height += text_height
-            
-            # Image height if exists
-            if 'image' in self.all_rounds[round_idx]:
-                img_height = self._estimate_image_height(self.all_rounds[round_idx]['image'])
-                total_height += img_height
-            
-            # Loading indicator height only for current round (round_idx > 0)
-            # For completed rounds, no loading indicator is shown
-            if round_idx > 0 and round_idx == visible_rounds - 1:
-                # This is the current round, add loading indicator height
-                total_height += LOADING_EXTRA_PADDING + 160  # Loading indicator height
-            
-            # Padding between rounds
-            if round_idx < visible_rounds - 1:
-                total_height += TEXT_PADDING
-        
-        return total_height + BOTTOM_PADDING
-    
-    def _estimate_text_height(self, text, font_size=140):
-        """Estimate text height for layout calculation
-        
-        This function now uses the same adaptive font sizing logic as _create_text_element
-        to ensure accurate height calculations when font size is reduced.
-        """
-        # Use the same logic as _create_text_element for accurate estimation
-        font_path = self.font_path if self.font_path else get_default_font(bold=True)
-        
-        # Start with the provided font size and reduce if needed
-        current_font_size = font_size
-        max_width = VIDEO_WIDTH - 80
-        min_font_size = 60  # Minimum font size to prevent text from becoming too small
-        
-        # Try to find the best font size that fits the text
-        while current_font_size >= min_font_size:
-            try:
-                font = ImageFont.truetype(font_path, current_font_size) if font_path else ImageFont.load_default()
-            except Exception:
-                font = ImageFont.load_default()
-            
-            # Test if this font size works
-            dummy_img = Image.new('RGBA', (VIDEO_WIDTH, 10), (0,0,0,0))
-            draw = ImageDraw.Draw(dummy_img)
-            
-            # Wrap text with current font size
-            words = text.split()
-            lines = []
-            current_line = ""
-            
-            for word in words:
-                test_line = current_line + (" " if current_line else "") + word
-                bbox = draw.textbbox((0, 0), test_line, font=font)
-                w = bbox[2] - bbox[0]
-                if w > max_width and current_line:
-                    lines.append(current_line)
-                    current_line = word
-                else:
-                    current_line = test_line
-            if current_line:
-                lines.append(current_line)
-            
-            # Check if this font size results in too many lines OR if any single line is too wide
-            max_lines = 4  # Maximum number of lines we want to allow
-            max_line_width = VIDEO_WIDTH - 200  # Maximum width for any single line (more aggressive margin)
-            
-            # Check if the full text (before wrapping) is too wide
-            full_text_bbox = draw.textbbox((0, 0), text, font=font)
-            full_text_width = full_text_bbox[2] - full_text_bbox[0]
-            full_text_too_wide = full_text_width > max_line_width
-            
-            # Check if any individual line is too wide
-            line_too_wide = False
-            for line in lines:
-                bbox = draw.textbbox((0, 0), line, font=font)
-                w = bbox[2] - bbox[0]
-                if w > max_line_width:
-                    line_too_wide = True
-                    break
-            
-            if len(lines) <= max_lines and not line_too_wide and not full_text_too_wide:
-                # This font size works, break out of the loop
-                break
-            
-            # Reduce font size and try again
-            current_font_size -= 10
-        
-        # Ensure we don't go below minimum
-        current_font_size = max(current_font_size, min_font_size)
-        
-        # Create final font with the determined size
-        try:
-            font = ImageFont.truetype(font_path, current_font_size) if font_path else ImageFont.load_default()
-        except Exception:
-            font = ImageFont.load_default()
-        
-        # Re-wrap text with final font size
-        words = text.split()
-        lines = []
-        current_line = ""
-        dummy_img = Image.new('RGBA', (VIDEO_WIDTH, 10), (0,0,0,0))
-        draw = ImageDraw.Draw(dummy_img)
-        
-        for word in words:
-            test_line = current_line + (" " if current_line else "") + word
-            bbox = draw.textbbox((0, 0), test_line, font=font)
-            w = bbox[2] - bbox[0]
-            if w > max_width and current_line:
-                lines.append(current_line)
-                current_line = word
-            else:
-                current_line = test_line
-        if current_line:
-            lines.append(current_line)
-        
-        # Calculate total height (same as _create_text_element) - HEIGHT ESTIMATION FUNCTION
-        bbox = draw.textbbox((0, 0), 'A', font=font)
-        line_height = (bbox[3] - bbox[1]) + 10
-        EXTRA_BOTTOM_PADDING = 30
-        total_height = line_height * len(lines) + 40 + EXTRA_BOTTOM_PADDING
-        
-        return total_height
-    
-    def _estimate_image_height(self, image_path):
-        """Estimate image height after resizing"""
-        try:
-            with Image.open(image_path) as img:
-                img_width, img_height = img.size
-                ratio = VIDEO_WIDTH / img_width
-                new_height = int(img_height * ratio)
-                return new_height
-        except:
-            return 400  # Default fallback
-    
     def _preprocess_elements(self):
         """Pre-process all text and image elements to avoid repeated processing"""
         processed = {}
@@ -292,170 +344,93 @@ class FrameGenerationConfig:
         # Process text elements
         for i, round_data in enumerate(self.all_rounds):
             text = round_data['prompt']
-            processed[f'text_{i}'] = self._create_text_element(text)
+            with trace.span('text layout', round=i):
+                processed[f'text_{i}'] = self._create_text_element(text)
             
             # Process images
             if 'image' in round_data and os.path.exists(round_data['image']):
                 try:
-                    processed[f'image_{i}'] = self._resize_image(round_data['image'])
-                    processed[f'strokes_{i}'] = self._extract_black_strokes(processed[f'image_{i}'])
+                    with trace.span('image preprocess', round=i):
+                        processed[f'image_{i}'], processed[f'strokes_{i}'] = self.element_cache.get(
+                            round_data['image'], partial(self._preprocess_image, round_idx=i))
                 except Exception as e:
                     print(f"Error processing image {round_data['image']}: {e}")
                     processed[f'image_{i}'] = None
-                    processed[f'strokes_{i}'] = []
+                    processed[f'strokes_{i}'] = None
         
+        self.text_layouts.save()
         return processed
     
-    def _create_text_element(self, text, font_size=140):
+    def _preprocess_image(self, image_path, round_idx):
+        """Resized round image and its packed strokes"""
+        with trace.span('image resize', round=round_idx):
+            image = self._resize_image(image_path)
+        with trace.span('stroke extraction', round=round_idx):
+            stroke_timings = self._extract_black_strokes(image)
+        if self.reveal == 'pen':
+            with trace.span('pen strokes', round=round_idx):
+                return image, self._pack_pen_strokes(stroke_timings)
+        return image, self._pack_strokes(stroke_timings)
+    
+    def _create_text_element(self, text):
         """Create a text element with proper sizing and wrapping
         
-        This function now automatically reduces font size when text is too long
-        to prevent text from being cut off or extending beyond video boundaries.
-        It tries to keep text within 4 lines maximum by reducing font size as needed.
+        The font size and line breaks come from layout_text, which shrinks the
+        font for long text so it is never cut off at the video edges.
         """
-        font_path = self.font_path if self.font_path else get_default_font(bold=True)
-        
-        # Start with the provided font size and reduce if needed
-        current_font_size = font_size
-        max_width = VIDEO_WIDTH - 80
-        min_font_size = 60  # Minimum font size to prevent text from becoming too small
-        
-        # Try to find the best font size that fits the text
-        while current_font_size >= min_font_size:
-            try:
-                font = ImageFont.truetype(font_path, current_font_size) if font_path else ImageFont.load_default()
-            except Exception:
-                font = ImageFont.load_default()
-            
-            # Test if this font size works
-            dummy_img = Image.new('RGBA', (VIDEO_WIDTH, 10), (0,0,0,0))
-            draw = ImageDraw.Draw(dummy_img)
-            
-            # Wrap text with current font size
-            words = text.split()
-            lines = []
-            current_line = ""
-            
-            for word in words:
-                test_line = current_line + (" " if current_line else "") + word
-                bbox = draw.textbbox((0, 0), test_line, font=font)
-                w = bbox[2] - bbox[0]
-                if w > max_width and current_line:
-                    lines.append(current_line)
-                    current_line = word
-                else:
-                    current_line = test_line
-            if current_line:
-                lines.append(current_line)
-            
-            # Check if this font size results in too many lines OR if any single line is too wide
-            max_lines = 4  # Maximum number of lines we want to allow
-            max_line_width = VIDEO_WIDTH - 200  # Maximum width for any single line (more aggressive margin)
-            
-            # Check if the full text (before wrapping) is too wide
-            full_text_bbox = draw.textbbox((0, 0), text, font=font)
-            full_text_width = full_text_bbox[2] - full_text_bbox[0]
-            full_text_too_wide = full_text_width > max_line_width
-            
-            # Check if any individual line is too wide
-            line_too_wide = False
-            for line in lines:
-                bbox = draw.textbbox((0, 0), line, font=font)
-                w = bbox[2] - bbox[0]
-                if w > max_line_width:
-                    line_too_wide = True
-                    break
-            
-            if len(lines) <= max_lines and not line_too_wide and not full_text_too_wide:
-                # This font size works, break out of the loop
-                break
-            
-            # Reduce font size and try again
-            current_font_size -= 10
-        
-        # Ensure we don't go below minimum
-        current_font_size = max(current_font_size, min_font_size)
-        
-        # Create final font with the determined size
-        try:
-            font = ImageFont.truetype(font_path, current_font_size) if font_path else ImageFont.load_default()
-        except Exception:
-            font = ImageFont.load_default()
-        
-        # Re-wrap text with final font size
-        words = text.split()
-        lines = []
-        current_line = ""
-        dummy_img = Image.new('RGBA', (VIDEO_WIDTH, 10), (0,0,0,0))
-        draw = ImageDraw.Draw(dummy_img)
-        
-        for word in words:
-            test_line = current_line + (" " if current_line else "") + word
-            bbox = draw.textbbox((0, 0), test_line, font=font)
-            w = bbox[2] - bbox[0]
-            if w > max_width and current_line:
-                lines.append(current_line)
-                current_line = word
-            else:
-                current_line = test_line
-        if current_line:
-            lines.append(current_line)
+        layout = self.text_layouts.get(text)
+        font = get_font(self.text_layouts.font_path, layout['font_size'])
         
-        # Calculate total height
-        bbox = draw.textbbox((0, 0), 'A', font=font)
-        line_height = (bbox[3] - bbox[1]) + 10
-        EXTRA_BOTTOM_PADDING = 30
-        total_height = line_height * len(lines) + 40 + EXTRA_BOTTOM_PADDING
-        
-        text_img = Image.new('RGBA', (VIDEO_WIDTH, total_height), (0,0,0,0))
+        # Coverage mask, painted with LINE_ART_INK when composited
+        width = self.geometry.width
+        text_img = Image.new('L', (width, layout['height']), 0)
         draw = ImageDraw.Draw(text_img)
-        y = 20
-        for line in lines:
-            bbox = draw.textbbox((0, 0), line, font=font)
-            w = bbox[2] - bbox[0]
-            draw.text(((VIDEO_WIDTH - w) // 2, y), line, fill=(0,0,0,255), font=font)
-            y += line_height
+        y = self.geometry.px(20)
+        for line, w in zip(layout['lines'], layout['line_widths']):
+            draw.text(((width - w) // 2, y), line, fill=255, font=font)
+            y += layout['line_height']
         
         return text_img
     
     def _resize_image(self, image_path):
-        """Resize image to fit video width"""
+        """Resize image to fit video width
+        
+        Opaque grayscale images (the usual black line art) are returned as a
+        single 'L' channel; anything with colour or transparency stays RGBA.
+        """
         img = Image.open(image_path).convert('RGBA')
         img_width, img_height = img.size
-        ratio = VIDEO_WIDTH / img_width
+        ratio = self.geometry.width / img_width
         new_width = int(img_width * ratio)
         new_height = int(img_height * ratio)
-        return img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-    
-    def _extract_black_strokes(self, image, threshold=80):
-        """Extract black strokes from image for animation"""
-        gray = image.convert('L')
-        pixels = gray.load()
-        width, height = image.size
-        visited = [[False] * height for _ in range(width)]
-        strokes = []
-
-        for y in range(height):
-            for x in range(width):
-                if not visited[x][y] and pixels[x, y] < threshold:
-                    stroke = []
-                    queue = deque()
-                    queue.append((x, y))
-                    visited[x][y] = True
-                    while queue:
-                        cx, cy = queue.popleft()
-                        stroke.append((cx, cy))
-                        # Check 8 neighbors
-                        for dx in [-1, 0, 1]:
-                            for dy in [-1, 0, 1]:
-                                if dx == 0 and dy == 0:
-                                    continue
-                                nx, ny = cx + dx, cy + dy
-                                if (0 <= nx < width and 0 <= ny < height and
-                                    not visited[nx][ny] and pixels[nx, ny] < threshold):
-                                    visited[nx][ny] = True
-                                    queue.append((nx, ny))
-                    strokes.append(stroke)
+        resized = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
+        
+        pixels = np.asarray(resized)
+        if ((pixels[..., 3] == 255).all() and (pixels[..., 0] == pixels[..., 1]).all()
+                and (pixels[..., 1] == pixels[..., 2]).all()):
+            return resized.convert('L')
+        return resized
+    
+    def _extract_black_strokes(self, image, threshold=STROKE_THRESHOLD):
+        """Extract black strokes from image for animation
+        
+        Strokes are the 8-connected components of dark pixels. Each stroke lists
+        its pixels in breadth-first order from its first pixel in raster order,
+        which is the order the drawing animation reveals them in.
+        """
+        gray = np.asarray(image.convert('L'))
+        mask = gray < threshold
+        width = mask.shape[1]
+        
+        seeds = _find_component_seeds(mask)
+        flat_order, component_ids = _bfs_component_order(mask, seeds)
+        
+        # Split the concatenated BFS order into one packed (x, y) array per component
+        bounds = np.searchsorted(component_ids, np.arange(len(seeds) + 1))
+        coords = np.empty((len(flat_order), 2), dtype=np.int16)
+        coords[:, 0] = flat_order % width
+        coords[:, 1] = flat_order // width
+        strokes = [coords[bounds[i]:bounds[i + 1]] for i in range(len(seeds))]
         
         # Sort by length and prepare timings
         strokes.sort(key=len, reverse=True)
@@ -465,52 +440,610 @@ class FrameGenerationConfig:
                 start = i / len(strokes)
                 end = 1.0
                 if i % 2 == 1:
-                    stroke = list(reversed(stroke))
+                    stroke = stroke[::-1]
                 stroke_timings.append((stroke, start, end))
         else:
             if strokes:
                 stroke_timings.append((strokes[0], 0.0, 1.0))
         
         return stroke_timings
+    
+    def _pack_strokes(self, stroke_timings):
+        """Pack stroke timings into one int16 coordinate array in global reveal order
+        
+        Pixel k of a stroke with n pixels is revealed once
+        progress >= start + (k + 1) / n * (end - start), so sorting every pixel
+        by that threshold turns each animation frame into a prefix of the array.
+        """
+        if not stroke_timings:
+            return None
+        
+        coords = np.concatenate([stroke for stroke, _, _ in stroke_timings])
+        thresholds = np.concatenate([
+            _reveal_thresholds(len(stroke), start, end)
+            for stroke, start, end in stroke_timings
+        ])
+        reveal_order = np.argsort(thresholds, kind='stable')
+        return {
+            'coords': coords[reveal_order],
+            'thresholds': thresholds[reveal_order],
+            'size': (int(coords[:, 0].max()) + 1, int(coords[:, 1].max()) + 1)
+        }
+    
+    def _pack_pen_strokes(self, stroke_timings):
+        """Pack stroke timings into pen pieces in global reveal order
+        
+        Each stroke is thinned to its skeleton, which is traced into polylines,
+        chained in the order a pen would draw them and simplified. The pieces
+        of a stroke are revealed over the same span of progress as its pixels
+        (see _pack_strokes) and drawn with ImageDraw.line at their polyline's
+        width: the number of stroke pixels nearest to the polyline over its
+        length.
+        """
+        if not stroke_timings:
+            return None
+        
+        coords = np.concatenate([stroke for stroke, _, _ in stroke_timings])
+        size = (int(coords[:, 0].max()) + 1, int(coords[:, 1].max()) + 1)
+        # Flat indices into the mask with a free border, as _trace_polylines expects
+        row_stride = size[0] + 2
+        owners = np.full((size[1] + 2, row_stride), -1, dtype=np.int32)
+        for index, (stroke, _, _) in enumerate(stroke_timings):
+            owners[stroke[:, 1] + 1, stroke[:, 0] + 1] = index
+        owners = owners.ravel()
+        skeleton = np.flatnonzero(np.pad(_thin_mask(owners.reshape(-1, row_stride)[1:-1, 1:-1] >= 0), 1))
+        skeleton_owners = owners[skeleton]
+        by_owner = np.argsort(skeleton_owners, kind='stable')
+        bounds = np.searchsorted(skeleton_owners[by_owner], np.arange(len(stroke_timings) + 1))
+        stroke_polylines = [_trace_polylines(skeleton[by_owner[bounds[i]:bounds[i + 1]]].tolist(), row_stride)
+                            for i in range(len(stroke_timings))]
+        
+        # Each polyline's width is the area of the stroke pixels nearest to it over its length
+        labels = np.zeros(len(owners), dtype=np.int32)
+        label = 0
+        for polylines in stroke_polylines:
+            for line in polylines:
+                label += 1
+                labels[line] = label
+        _spread_labels(labels, owners >= 0, row_stride)
+        areas = np.bincount(labels, minlength=label + 1)
+        
+        tolerance = PEN_TOLERANCE * self.geometry.scale
+        max_length = PEN_STEP * self.geometry.scale
+        segments, widths, thresholds = [], [], []
+        label = 0
+        for (stroke, start, end), polylines in zip(stroke_timings, stroke_polylines):
+            if polylines:
+                line_widths = [areas[label + 1 + i] / len(line) for i, line in enumerate(polylines)]
+                polylines = [np.column_stack([np.array(line) % row_stride - 1, np.array(line) // row_stride - 1])
+                             for line in polylines]
+                label += len(polylines)
+            else:
+                # Thinning can erase a tiny stroke entirely; draw it as a dot
+                line_widths = [len(stroke) ** 0.5]
+                polylines = [stroke[:1]]
+            stroke_segments, stroke_widths = [], []
+            for index, reverse in _chain_polylines(polylines):
+                line = polylines[index][::-1] if reverse else polylines[index]
+                pieces = _pen_segments([_simplify_polyline(line, tolerance)], max_length)
+                stroke_segments.append(pieces)
+                width = min(255, max(1, round(line_widths[index])))
+                stroke_widths.append(np.full(len(pieces), width, dtype=np.uint8))
+            segments += stroke_segments
+            widths += stroke_widths
+            thresholds.append(_reveal_thresholds(sum(map(len, stroke_segments)), start, end))
+        
+        thresholds = np.concatenate(thresholds)
+        reveal_order = np.argsort(thresholds, kind='stable')
+        return {
+            'segments': np.concatenate(segments)[reveal_order],
+            'widths': np.concatenate(widths)[reveal_order],
+            'thresholds': thresholds[reveal_order],
+            'size': size
+        }
 
-def get_default_font(bold=False):
-    """Find a default system font that's available"""
-    if bold:
-        potential_fonts = [
-            "Arialbd.ttf", "arialbd.ttf", "Arial Bold.ttf", "DejaVuSans-Bold.ttf", 
-            "Verdana Bold.ttf", "Tahoma Bold.ttf", "SegoeUIBold.ttf", "segoeuib.ttf", 
-            "Calibri Bold.ttf", "calibrib.ttf"
-        ]
-    else:
-        potential_fonts = [
-            "Arial.ttf", "DejaVuSans.ttf", "FreeSans.ttf", "LiberationSans-Regular.ttf", 
-            "Helvetica.ttf", "Verdana.ttf", "Tahoma.ttf", "Segoe UI.ttf"
-        ]
+TEXT_FONT_SIZES = list(range(140, 59, -10))  # Candidate font sizes for round text, largest first
+
+def _wrap_words(metrics, words, max_width):
+    """Greedy word wrap; returns the lines and their pixel widths"""
+    lines, widths = [], []
+    current_line, span = "", metrics.EMPTY_SPAN
+    
+    for word in words:
+        test_span = metrics.extend(span, (" " if current_line else "") + word)
+        if metrics.width(test_span) > max_width and current_line:
+            lines.append(current_line)
+            widths.append(metrics.width(span))
+            current_line, span = word, metrics.extend(metrics.EMPTY_SPAN, word)
+        else:
+            current_line = current_line + (" " if current_line else "") + word
+            span = test_span
+    if current_line:
+        lines.append(current_line)
+        widths.append(metrics.width(span))
+    return lines, widths
+
+def layout_text(text, font_path, max_width=None, max_line_width=None, max_lines=4, font_sizes=None,
+                geometry=None):
+    """Choose the font size and line breaks for a piece of round text
+    
+    The largest size from font_sizes is used at which the text wraps into at
+    most max_lines lines, no line is wider than max_line_width and the
+    unwrapped text also fits in max_line_width; the smallest size is the
+    fallback. Fitting only gets easier as the font shrinks, so the size is found
+    by binary search. Widths come from cached glyph metrics rather than
+    textbbox calls. Widths, font sizes and spacing default to those of the
+    frame geometry (full size unless given).
+    
+    Returns a JSON-serializable dict with font_size, lines, line_widths,
+    line_height and the element height.
+    """
+    geometry = geometry or FrameGeometry()
+    if max_width is None:
+        max_width = geometry.width - geometry.px(80)
+    if max_line_width is None:
+        max_line_width = geometry.width - geometry.px(200)
+    if font_sizes is None:
+        font_sizes = geometry.font_sizes(TEXT_FONT_SIZES)
+    words = text.split()
+    
+    def fits(font_size):
+        metrics = get_glyph_metrics(font_path, font_size)
+        if metrics.text_width(text) > max_line_width:
+            return False
+        lines, widths = _wrap_words(metrics, words, max_width)
+        return len(lines) <= max_lines and all(w <= max_line_width for w in widths)
+    
+    lo, hi = 0, len(font_sizes)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if fits(font_sizes[mid]):
+            hi = mid
+        else:
+            lo = mid + 1
+    font_size = font_sizes[min(lo, len(font_sizes) - 1)]
+    
+    metrics = get_glyph_metrics(font_path, font_size)
+    lines, widths = _wrap_words(metrics, words, max_width)
+    bbox = metrics.font.getbbox('A')
+    line_height = (bbox[3] - bbox[1]) + geometry.px(10)
+    EXTRA_BOTTOM_PADDING = geometry.px(30)
+    return {
+        'font_size': font_size,
+        'lines': lines,
+        'line_widths': widths,
+        'line_height': line_height,
+        'height': line_height * len(lines) + geometry.px(40) + EXTRA_BOTTOM_PADDING
+    }
+
+class TextLayoutCache:
+    """Memoized layout_text results for one font, optionally persisted on disk
+    
+    Chain games keep coming back to the same words, so layouts are stored in
+    a JSON file per font and frame geometry (keyed by text) and reused across
+    runs.
+    """
+    VERSION = 1
+    
+    def __init__(self, font_path, cache_dir=None, geometry=None):
+        self.font_path = font_path
+        self.geometry = geometry or FrameGeometry()
+        self.cache_path = None
+        self._layouts = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        
+        if cache_dir:
+            font_mtime = os.path.getmtime(font_path) if font_path and os.path.exists(font_path) else None
+            fingerprint = repr((self.VERSION, font_path, font_mtime, self.geometry.width,
+                                self.geometry.font_sizes(TEXT_FONT_SIZES)))
+            digest = hashlib.sha1(fingerprint.encode('utf-8')).hexdigest()
+            self.cache_path = os.path.join(cache_dir, 'text_layouts', f"{digest}.json")
+            try:
+                with open(self.cache_path, 'r') as f:
+                    self._layouts = json.load(f)
+            except (OSError, ValueError):
+                self._layouts = {}
     
-    # Look in common font directories by platform
-    if sys.platform.startswith('win'):
-        font_dirs = [os.path.join(os.environ.get('WINDIR', 'C:\\Windows'), 'Fonts')]
-    elif sys.platform.startswith('darwin'):  # macOS
-        font_dirs = ['/Library/Fonts', '/System/Library/Fonts', os.path.expanduser('~/Library/Fonts')]
-    else:  # Linux and others
-        font_dirs = ['/usr/share/fonts', '/usr/local/share/fonts', os.path.expanduser('~/.fonts')]
-    
-    # Try to find a system font
-    for font_dir in font_dirs:
-        if os.path.exists(font_dir):
-            for font_name in potential_fonts:
-                font_path = os.path.join(font_dir, font_name)
-                if os.path.exists(font_path):
-                    try:
-                        test_font = ImageFont.truetype(font_path, 20)
-                        return font_path
-                    except Exception:
-                        continue
-    
-    return None
-
-def create_title_text(draw, font_path, part_number=None, bottom_padding=120):
+    def get(self, text):
+        """Layout for text, computed on first use"""
+        layout = self._layouts.get(text)
+        if layout is None:
+            layout = layout_text(text, self.font_path, geometry=self.geometry)
+            with self._lock:
+                self._layouts[text] = layout
+                self._dirty = True
+        return layout
+    
+    def save(self):
+        """Write new layouts back to the cache file"""
+        with self._lock:
+            if not self.cache_path or not self._dirty:
+                return
+            try:
+                os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+                temp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+                with open(temp_path, 'w') as f:
+                    json.dump(self._layouts, f)
+                os.replace(temp_path, self.cache_path)
+                self._dirty = False
+            except OSError as e:
+                print(f"Warning: could not write text layout cache {self.cache_path}: {e}")
+
+class ElementCache:
+    """Resized round images and their packed strokes, optionally persisted on disk
+    
+    Re-rendering a game directory would otherwise resize every image and
+    extract its strokes again. Entries are .npz files keyed by the content
+    hash of the image file and the render parameters, so copied images hit
+    and edited ones miss. Reading an entry marks it as recently used, and once
+    the entries outgrow max_bytes the least recently used ones are deleted.
+    """
+    VERSION = 2
+    
+    def __init__(self, cache_dir=None, geometry=None, reveal='pixel', max_bytes=ELEMENT_CACHE_MAX_BYTES):
+        self.geometry = geometry or FrameGeometry()
+        self.reveal = reveal
+        self.cache_dir = os.path.join(cache_dir, 'elements') if cache_dir else None
+        self.max_bytes = max_bytes
+    
+    def get(self, image_path, preprocess):
+        """(image, strokes) for image_path, from preprocess(image_path) on a miss"""
+        if not self.cache_dir:
+            return preprocess(image_path)
+        path = self._entry_path(image_path)
+        entry = self._load(path)
+        if entry is None:
+            entry = preprocess(image_path)
+            self._save(path, *entry)
+        return entry
+    
+    def _entry_path(self, image_path):
+        content = hashlib.sha1()
+        with open(image_path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                content.update(block)
+        fingerprint = repr((self.VERSION, content.hexdigest(), self.geometry.width, STROKE_THRESHOLD, self.reveal))
+        digest = hashlib.sha1(fingerprint.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.npz")
+    
+    def _load(self, path):
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as entry:
+                image = Image.fromarray(entry['pixels'])
+                strokes = {name[len('stroke_'):]: entry[name] for name in entry.files if name.startswith('stroke_')}
+                if strokes:
+                    strokes['size'] = tuple(int(v) for v in strokes['size'])
+                else:
+                    strokes = None
+            os.utime(path)
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+            return None
+        return image, strokes
+    
+    def _save(self, path, image, strokes):
+        arrays = {'pixels': np.asarray(image)}
+        if strokes is not None:
+            arrays.update((f"stroke_{name}", np.asarray(value)) for name, value in strokes.items())
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            temp_path = f"{path}.{os.getpid()}.tmp"
+            with open(temp_path, 'wb') as f:
+                np.savez(f, **arrays)
+            os.replace(temp_path, path)
+            self._evict()
+        except OSError as e:
+            print(f"Warning: could not write element cache file {path}: {e}")
+    
+    def _evict(self):
+        """Delete the least recently used entries until the rest fit in max_bytes"""
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith('.npz'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+def _reveal_thresholds(stroke_length, start, end):
+    """Smallest progress value at which each pixel of a stroke is revealed
+    
+    A stroke shows int(stroke_length * (progress - start) / (end - start)) pixels,
+    so pixel k appears at start + (k + 1) / stroke_length * (end - start). The
+    closed form can be off by one ulp, so nudge it to the exact float boundary
+    to reveal precisely the same pixels on every frame.
+    """
+    needed = np.arange(1, stroke_length + 1)
+    thresholds = start + needed / stroke_length * (end - start)
+    
+    def revealed(progress):
+        return stroke_length * ((progress - start) / (end - start)) >= needed
+    
+    for _ in range(4):
+        too_late = revealed(np.nextafter(thresholds, -np.inf))
+        too_early = ~revealed(thresholds)
+        if not too_late.any() and not too_early.any():
+            break
+        thresholds = np.where(too_late, np.nextafter(thresholds, -np.inf), thresholds)
+        thresholds = np.where(too_early, np.nextafter(thresholds, np.inf), thresholds)
+    return thresholds
+
+# Neighbour offsets (dx, dy) in the order the stroke BFS visits them
+STROKE_NEIGHBOUR_OFFSETS = [(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1) if dx or dy]
+
+def _find_component_seeds(mask):
+    """Return the flat index of the first pixel (raster order) of each 8-connected component
+    
+    Components are found on horizontal runs: runs on adjacent rows that touch
+    (diagonals included) are merged with a vectorized union-find, so the cost
+    scales with the number of runs rather than the number of pixels.
+    """
+    height, width = mask.shape
+    padded = np.zeros((height, width + 2), dtype=np.int8)
+    padded[:, 1:-1] = mask
+    edges = np.diff(padded, axis=1)
+    run_rows, run_starts = np.nonzero(edges == 1)
+    _, run_ends = np.nonzero(edges == -1)  # exclusive
+    if len(run_rows) == 0:
+        return np.zeros(0, dtype=np.int64)
+    
+    # Runs are in raster order, so keys are sorted and can be binary searched.
+    # A run on row r touches runs on row r - 1 whose span overlaps [start - 1, end].
+    row_stride = width + 2
+    start_keys = run_rows * row_stride + run_starts
+    end_keys = run_rows * row_stride + run_ends
+    lo = np.searchsorted(end_keys, (run_rows - 1) * row_stride + run_starts, side='left')
+    hi = np.searchsorted(start_keys, (run_rows - 1) * row_stride + run_ends, side='right')
+    counts = np.maximum(hi - lo, 0)
+    run_b = np.repeat(np.arange(len(run_rows)), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    run_a = np.repeat(lo, counts) + offsets
+    
+    # Union-find: hook every pair onto the smaller root, then compress paths
+    parent = np.arange(len(run_rows))
+    while True:
+        root_a, root_b = parent[run_a], parent[run_b]
+        if np.array_equal(root_a, root_b):
+            break
+        np.minimum.at(parent, np.maximum(root_a, root_b), np.minimum(root_a, root_b))
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                break
+            parent = grandparent
+    
+    # Every root is the first run of its component, i.e. its first pixel in raster order
+    roots = np.flatnonzero(parent == np.arange(len(run_rows)))
+    return run_rows[roots] * width + run_starts[roots]
+
+def _bfs_component_order(mask, seeds):
+    """Breadth-first order of every component, expanded one BFS layer at a time
+    
+    All components are expanded together. Within a layer, candidates are
+    ordered by parent then by neighbour offset and the first claim wins, which
+    reproduces the visiting order of a queue-based BFS exactly. Returns the flat
+    pixel indices and their component ids, grouped by component.
+    """
+    height, width = mask.shape
+    remaining = mask.ravel().copy()
+    frontier = np.asarray(seeds, dtype=np.int64)
+    frontier_ids = np.arange(len(frontier))
+    remaining[frontier] = False
+    offsets = np.array([dy * width + dx for dx, dy in STROKE_NEIGHBOUR_OFFSETS])
+    offset_dx = np.array([dx for dx, _ in STROKE_NEIGHBOUR_OFFSETS])
+    offset_dy = np.array([dy for _, dy in STROKE_NEIGHBOUR_OFFSETS])
+    
+    layers = [frontier]
+    layer_ids = [frontier_ids]
+    while len(frontier):
+        x = (frontier % width)[:, None] + offset_dx
+        y = (frontier // width)[:, None] + offset_dy
+        candidates = (frontier[:, None] + offsets).ravel()
+        candidate_ids = np.repeat(frontier_ids, len(offsets))
+        valid = ((x >= 0) & (x < width) & (y >= 0) & (y < height)).ravel()
+        valid[valid] = remaining[candidates[valid]]
+        candidates = candidates[valid]
+        candidate_ids = candidate_ids[valid]
+        
+        # Keep the first claim of each pixel, preserving candidate order
+        _, first = np.unique(candidates, return_index=True)
+        first.sort()
+        frontier = candidates[first]
+        frontier_ids = candidate_ids[first]
+        remaining[frontier] = False
+        layers.append(frontier)
+        layer_ids.append(frontier_ids)
+    
+    order = np.concatenate(layers)
+    component_ids = np.concatenate(layer_ids)
+    grouping = np.argsort(component_ids, kind='stable')
+    return order[grouping], component_ids[grouping]
+
+def _thinning_tables():
+    """Zhang-Suen deletion rules of both sub-iterations as lookups by neighbour code
+    
+    Bit i of a code is neighbour P(i + 2): north, north-east, east and on
+    clockwise around the pixel.
+    """
+    tables = np.zeros((2, 256), dtype=np.uint8)
+    for code in range(256):
+        ring = [(code >> i) & 1 for i in range(8)]
+        north, east, south, west = ring[0], ring[2], ring[4], ring[6]
+        count = sum(ring)
+        transitions = sum(ring[i] < ring[(i + 1) % 8] for i in range(8))
+        if 2 <= count <= 6 and transitions == 1:
+            tables[0, code] = not (north and east and south) and not (east and south and west)
+            tables[1, code] = not (north and east and west) and not (north and south and west)
+    return tables
+
+THINNING_TABLES = _thinning_tables()
+
+def _thin_mask(mask):
+    """Zhang-Suen thinning of a boolean mask down to 8-connected lines one pixel wide
+    
+    A pixel's fate only changes once a neighbour is removed, so after the
+    first two sub-iterations only the neighbours of the pixels removed in
+    the previous two are tested again.
+    """
+    height, width = mask.shape
+    stride = width + 2
+    pixels = np.pad(mask, 1).astype(np.uint8).ravel()
+    # Neighbours P2..P9, clockwise from north, as flat offsets and code bits
+    ring = np.array([-stride, -stride + 1, 1, stride + 1, stride, stride - 1, -1, -stride - 1])
+    bits = 1 << np.arange(8)
+    
+    recent = [np.flatnonzero(pixels)] * 2
+    for step in itertools.count():
+        candidates = np.unique(np.concatenate(recent))
+        candidates = candidates[pixels[candidates] == 1]
+        if not len(candidates):
+            break
+        codes = pixels[candidates[:, None] + ring] @ bits
+        removed = candidates[THINNING_TABLES[step % 2][codes] == 1]
+        pixels[removed] = 0
+        recent = [recent[1], (removed[:, None] + ring).ravel()]
+    return pixels.reshape(height + 2, stride)[1:-1, 1:-1].astype(bool)
+
+def _trace_polylines(pixels, width):
+    """Split a skeleton into polylines that run between its end and branch points
+    
+    `pixels` are flat indices (row stride `width`, with a free border) of one
+    8-connected skeleton in raster order. Diagonal neighbours are only
+    linked when no orthogonal neighbour links them already, so staircases
+    are lines rather than chains of branch points. Every link is walked
+    once; loops without end or branch points become closed polylines.
+    """
+    orthogonal = (-width, -1, 1, width)
+    # Each diagonal offset with the two orthogonal offsets that would also reach it
+    diagonal = ((-width - 1, -width, -1), (-width + 1, -width, 1), (width - 1, width, -1), (width + 1, width, 1))
+    pixel_set = set(pixels)
+    neighbours = {}
+    for pixel in pixels:
+        neighbours[pixel] = [pixel + offset for offset in orthogonal if pixel + offset in pixel_set]
+        neighbours[pixel] += [pixel + offset for offset, via_row, via_column in diagonal
+                              if pixel + offset in pixel_set and pixel + via_row not in pixel_set
+                              and pixel + via_column not in pixel_set]
+    walked = set()
+    polylines = []
+    
+    def walk(start, step):
+        line = [start]
+        previous, current = start, step
+        while True:
+            walked.add((min(previous, current), max(previous, current)))
+            line.append(current)
+            if current == start or len(neighbours[current]) != 2:
+                return line
+            a, b = neighbours[current]
+            previous, current = current, (b if a == previous else a)
+    
+    for pixel in pixels:
+        if len(neighbours[pixel]) == 2:
+            continue
+        if not neighbours[pixel]:
+            polylines.append([pixel])
+        for step in neighbours[pixel]:
+            if (min(pixel, step), max(pixel, step)) not in walked:
+                polylines.append(walk(pixel, step))
+    for pixel in pixels:
+        step = neighbours[pixel][0] if len(neighbours[pixel]) == 2 else None
+        if step is not None and (min(pixel, step), max(pixel, step)) not in walked:
+            polylines.append(walk(pixel, step))
+    return polylines
+
+def _spread_labels(labels, mask, width):
+    """Give every unlabelled mask pixel the label of its nearest labelled pixel, in place
+    
+    `labels` and `mask` are flat arrays with row stride `width` and a free
+    border; 0 is unlabelled. Labels grow one ring of 8-neighbours at a time
+    and the first claim of a pixel wins.
+    """
+    ring = np.array([-width - 1, -width, -width + 1, -1, 1, width - 1, width, width + 1])
+    frontier = np.flatnonzero(labels)
+    while len(frontier):
+        candidates = (frontier[:, None] + ring).ravel()
+        sources = np.repeat(frontier, len(ring))
+        free = mask[candidates] & (labels[candidates] == 0)
+        candidates, first = np.unique(candidates[free], return_index=True)
+        labels[candidates] = labels[sources[free][first]]
+        frontier = candidates
+
+def _chain_polylines(polylines):
+    """Order and orient polylines like a pen: each starts at the free end nearest to where the last one ended
+    
+    The pen starts at the first end in raster order. Polylines are (n, 2)
+    arrays of (x, y) points; returns (index, reversed) pairs in drawing order.
+    """
+    ends = np.array([(line[0], line[-1]) for line in polylines], dtype=np.float64)
+    first = min(range(len(polylines) * 2), key=lambda i: (ends[i // 2, i % 2, 1], ends[i // 2, i % 2, 0]))
+    remaining = np.ones(len(polylines), dtype=bool)
+    chained = []
+    choice = first
+    while True:
+        index, reverse = divmod(choice, 2)
+        remaining[index] = False
+        chained.append((index, bool(reverse)))
+        if not remaining.any():
+            return chained
+        distances = np.hypot(*(ends - ends[index, 1 - reverse]).transpose(2, 0, 1))
+        distances[~remaining] = np.inf
+        choice = int(np.argmin(distances))
+
+def _simplify_polyline(points, tolerance):
+    """Ramer-Douglas-Peucker simplification of an (n, 2) point array"""
+    keep = np.zeros(len(points), dtype=bool)
+    keep[0] = keep[-1] = True
+    spans = [(0, len(points) - 1)]
+    while spans:
+        first, last = spans.pop()
+        if last - first < 2:
+            continue
+        start, direction = points[first], points[last] - points[first]
+        inner = points[first + 1:last] - start
+        length = np.hypot(*direction)
+        if length:
+            distances = np.abs(direction[0] * inner[:, 1] - direction[1] * inner[:, 0]) / length
+        else:
+            distances = np.hypot(inner[:, 0], inner[:, 1])
+        farthest = int(np.argmax(distances))
+        if distances[farthest] > tolerance:
+            split = first + 1 + farthest
+            keep[split] = True
+            spans += [(first, split), (split, last)]
+    return points[keep]
+
+def _pen_segments(polylines, max_length):
+    """(x0, y0, x1, y1) pieces, at most max_length long, that trace the polylines in order
+    
+    A single-point polyline becomes one zero-length piece, a dot.
+    """
+    pieces = []
+    for line in polylines:
+        if len(line) == 1:
+            pieces.append(np.repeat(line.astype(np.float64), 2, axis=1))
+            continue
+        starts, ends = line[:-1].astype(np.float64), line[1:].astype(np.float64)
+        splits = np.maximum(1, np.ceil(np.hypot(*(ends - starts).T) / max_length)).astype(np.int64)
+        steps = np.arange(splits.sum()) - np.repeat(np.cumsum(splits) - splits, splits)
+        fractions = (steps / np.repeat(splits, splits))[:, None]
+        starts, ends = np.repeat(starts, splits, axis=0), np.repeat(ends, splits, axis=0)
+        piece_starts = starts + (ends - starts) * fractions
+        piece_ends = starts + (ends - starts) * (fractions + 1 / np.repeat(splits, splits)[:, None])
+        pieces.append(np.hstack([piece_starts, piece_ends]))
+    return np.rint(np.concatenate(pieces)).astype(np.int16)
+
+def create_title_text(draw, font_path, part_number=None, bottom_padding=120, geometry=None):
     """Draw the title at the bottom"""
+    geometry = geometry or FrameGeometry()
     base_title = "The World's Longest Game of Pictionary"
     if part_number is not None:
         base_title += f" Part {part_number}"
@@ -522,12 +1055,10 @@ def create_title_text(draw, font_path, part_number=None, bottom_padding=120):
         title_font_size = 120
     
     title_font_path = font_path if font_path else get_default_font(bold=True)
-    try:
-        title_font = ImageFont.truetype(title_font_path, title_font_size) if title_font_path else ImageFont.load_default()
-    except Exception:
-        title_font = ImageFont.load_default()
+    title_font = get_font(title_font_path, geometry.px(title_font_size))
+    bottom_padding = geometry.px(bottom_padding)
     
-    max_width = VIDEO_WIDTH - 80
+    max_width = geometry.width - geometry.px(80)
     words = base_title.split()
     lines = []
     current_line = ""
@@ -545,47 +1076,139 @@ def create_title_text(draw, font_path, part_number=None, bottom_padding=120):
         lines.append(current_line)
     
     bbox = draw.textbbox((0, 0), 'A', font=title_font)
-    line_height = (bbox[3] - bbox[1]) + 24
+    line_height = (bbox[3] - bbox[1]) + geometry.px(24)
     total_height = line_height * len(lines)
-    y = VIDEO_HEIGHT - total_height - bottom_padding
+    y = geometry.height - total_height - bottom_padding
     
+    # Simulate extra bold by drawing text multiple times with slight offsets
+    offsets = range(-geometry.px(2), geometry.px(2) + 1)
     for line in lines:
         bbox = draw.textbbox((0, 0), line, font=title_font)
         w = bbox[2] - bbox[0]
-        # Simulate extra bold by drawing text multiple times with slight offsets
-        for dx in [-2, -1, 0, 1, 2]:
-            for dy in [-2, -1, 0, 1, 2]:
-                draw.text(((VIDEO_WIDTH - w) // 2 + dx, y + dy), line, fill=(0,0,0), font=title_font)
+        for dx in offsets:
+            for dy in offsets:
+                draw.text(((geometry.width - w) // 2 + dx, y + dy), line, fill=(0,0,0), font=title_font)
         y += line_height
     
-    return VIDEO_HEIGHT - bottom_padding
+    return geometry.height - bottom_padding
 
-def create_loading_indicator(frame, font_path, mode='analyzing'):
-    """Create a loading indicator with animated pattern"""
+def create_title_sprite(font_path, part_number=None, bottom_padding=120, geometry=None):
+    """Render the title once and return it as (band image, top y)
+    
+    The title is the first thing drawn on a blank frame, so the horizontal band
+    it covers can be pasted opaquely and still match drawing it in place.
+    """
+    geometry = geometry or FrameGeometry()
+    canvas = Image.new('RGB', (geometry.width, geometry.height), BACKGROUND_COLOR)
+    create_title_text(ImageDraw.Draw(canvas), font_path, part_number=part_number, bottom_padding=bottom_padding,
+                      geometry=geometry)
+    
+    ink_box = Image.eval(canvas.convert('L'), lambda value: 255 - value).getbbox()
+    if ink_box is None:
+        return canvas.crop((0, 0, geometry.width, 1)), 0
+    top, bottom = ink_box[1], ink_box[3]
+    return canvas.crop((0, top, geometry.width, bottom)), top
+
+def loading_pattern(frame):
+    """Block pattern shown by the loading indicator, which changes every 6 frames"""
     chars = ['█', '▓', '▒', '░']
-    LOADING_HEIGHT = 160
-    FONT_SIZE = 80
-    LEFT_MARGIN = 60
     PATTERN_LEN = 8
     
-    loading_img = Image.new('RGBA', (VIDEO_WIDTH, LOADING_HEIGHT), (255, 255, 255, 255))
-    draw = ImageDraw.Draw(loading_img)
+    # A private generator keeps this deterministic and safe to call from any thread
+    rng = random.Random(frame // 6)
+    return ''.join(rng.choices(chars, k=PATTERN_LEN))
+
+class SpriteCache:
+    """Renders each distinct loading indicator and title sprite once
+    
+    Sprites are keyed by what they depict, so a whole video needs only a
+    handful of renders. When cache_dir is set they are also kept on disk and
+    reused across runs.
+    """
+    VERSION = 2
+    
+    def __init__(self, font_path, cache_dir=None, geometry=None):
+        self.font_path = font_path
+        self.geometry = geometry or FrameGeometry()
+        self.cache_dir = os.path.join(cache_dir, 'sprites') if cache_dir else None
+        self._sprites = {}
+        self._lock = threading.Lock()
+    
+    def loading_indicator(self, frame, mode='analyzing'):
+        """Loading indicator sprite for the given frame"""
+        pattern = loading_pattern(frame)
+        image, _ = self._get(('loading', mode, pattern),
+                             lambda: (create_loading_indicator(pattern, self.font_path, mode, self.geometry), 0))
+        return image
+    
+    def title(self, part_number=None):
+        """Title band and the y position it is pasted at"""
+        return self._get(('title', part_number),
+                         lambda: create_title_sprite(self.font_path, part_number=part_number,
+                                                     geometry=self.geometry))
+    
+    def _get(self, key, render):
+        with self._lock:
+            sprite = self._sprites.get(key)
+            if sprite is None:
+                sprite = self._load(key)
+                if sprite is None:
+                    with trace.span('sprite render', kind=key[0]):
+                        sprite = self._save(key, render())
+                self._sprites[key] = sprite
+            return sprite
     
-    random.seed(frame // 6)
-    pattern = ''.join(random.choices(chars, k=PATTERN_LEN))
+    def _sprite_path(self, key):
+        fingerprint = repr((self.VERSION, key, self.font_path, self.geometry.width, self.geometry.height))
+        digest = hashlib.sha1(fingerprint.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{key[0]}_{digest}.png")
+    
+    def _load(self, key):
+        if not self.cache_dir:
+            return None
+        path = self._sprite_path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with Image.open(path) as img:
+                img.load()
+                return img.copy(), int(img.text.get('y', 0))
+        except (OSError, ValueError):
+            return None
+    
+    def _save(self, key, sprite):
+        if self.cache_dir:
+            image, y = sprite
+            path = self._sprite_path(key)
+            info = PngImagePlugin.PngInfo()
+            info.add_text('y', str(y))
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                temp_path = f"{path}.{os.getpid()}.tmp"
+                image.save(temp_path, format='PNG', pnginfo=info)
+                os.replace(temp_path, path)
+            except OSError as e:
+                print(f"Warning: could not write sprite cache file {path}: {e}")
+        return sprite
+
+def create_loading_indicator(pattern, font_path, mode='analyzing', geometry=None):
+    """Create a loading indicator showing the given block pattern"""
+    geometry = geometry or FrameGeometry()
+    FONT_SIZE = geometry.px(80)
+    LEFT_MARGIN = geometry.px(60)
+    
+    loading_img = Image.new('RGB', (geometry.width, geometry.loading_height), (255, 255, 255))
+    draw = ImageDraw.Draw(loading_img)
     
     text_prefix = "Generating: [" if mode == 'generating' else "Analyzing: ["
     text_suffix = "]"
     
     font_path_to_use = font_path if font_path else get_default_font()
-    try:
-        font = ImageFont.truetype(font_path_to_use, FONT_SIZE) if font_path_to_use else ImageFont.load_default()
-    except Exception:
-        font = ImageFont.load_default()
+    font = get_font(font_path_to_use, FONT_SIZE)
     
     prefix_bbox = draw.textbbox((0, 0), text_prefix, font=font)
     prefix_width = prefix_bbox[2] - prefix_bbox[0]
-    text_y = 20 + (LOADING_HEIGHT - 40 - (prefix_bbox[3] - prefix_bbox[1])) // 2
+    text_y = geometry.px(20) + (geometry.loading_height - geometry.px(40) - (prefix_bbox[3] - prefix_bbox[1])) // 2
     
     draw.text((LEFT_MARGIN, text_y), text_prefix, fill=TEXT_COLOR, font=font)
     
@@ -599,191 +1222,505 @@ def create_loading_indicator(frame, font_path, mode='analyzing'):
     
     return loading_img
 
-def create_drawing_animation(strokes, progress):
-    """Create animated drawing effect"""
+def drawing_reveal_count(strokes, progress):
+    """Number of stroke pixels revealed at the given drawing progress"""
+    if not strokes:
+        return 0
+    return int(np.searchsorted(strokes['thresholds'], progress, side='right'))
+
+def render_stroke_reveal(strokes, reveal_count, empty_size=(VIDEO_WIDTH, 400)):
+    """Coverage mask with the first reveal_count pixels (or pen pieces) of the packed strokes set"""
     if not strokes:
-        return Image.new('RGBA', (VIDEO_WIDTH, 400), (0, 0, 0, 0))
+        return Image.new('L', empty_size, 0)
+    if 'segments' in strokes:
+        return draw_pen_reveal(strokes, reveal_count)
+    
+    width, height = strokes['size']
+    revealed = strokes['coords'][:reveal_count]
+    
+    mask = np.zeros((height, width), dtype=np.uint8)
+    mask[revealed[:, 1], revealed[:, 0]] = 255
+    return Image.fromarray(mask, 'L')
+
+def draw_pen_reveal(strokes, reveal_count, start=0, mask=None):
+    """Coverage mask with the first reveal_count pieces of packed pen strokes drawn in
+    
+    Pieces are drawn with ImageDraw.line at their polyline's width, with
+    round ends so that consecutive pieces join smoothly. Given the mask of
+    the first `start` pieces, only the pieces after them are drawn onto it.
+    """
+    if mask is None:
+        mask = Image.new('L', tuple(strokes['size']), 0)
+    draw = ImageDraw.Draw(mask)
+    pieces = zip(strokes['segments'][start:reveal_count].tolist(), strokes['widths'][start:reveal_count].tolist())
+    for (x0, y0, x1, y1), width in pieces:
+        draw.line((x0, y0, x1, y1), fill=255, width=width)
+        if width > 2:
+            radius = (width - 1) / 2
+            draw.ellipse((x0 - radius, y0 - radius, x0 + radius, y0 + radius), fill=255)
+            draw.ellipse((x1 - radius, y1 - radius, x1 + radius, y1 + radius), fill=255)
+    return mask
+
+def create_drawing_animation(strokes, progress):
+    """Create animated drawing effect
+    
+    `strokes` is the packed reveal data from FrameGenerationConfig._pack_strokes;
+    the pixels revealed at `progress` are a prefix of its coordinate array.
+    """
+    return render_stroke_reveal(strokes, drawing_reveal_count(strokes, progress))
+
+def build_display_list(frame_num, config, history_strip=True):
+    """List what a frame shows as (sprite id, y) pairs in paint order
+    
+    Sprite ids name everything needed to draw the sprite ('title', 'text_3',
+    'image_3', 'loading_generating_41', 'drawing_3_5120'), and y is the exact
+    integer paste position. Two frames with equal display lists are therefore
+    pixel-identical, which makes the list a cheap frame signature. Completed
+    rounds are listed as history strip crops unless history_strip is False,
+    in which case their elements are listed one by one.
+    """
+    display_list = []
+    
+    # Show title for first 3 seconds
+    if frame_num < config.title_duration_frames:
+        _, title_y = config.sprites.title(config.part_number)
+        display_list.append(('title', title_y))
+    
+    # Calculate round and progress
+    current_round = frame_num // config.frames_per_round
+    frame_in_round = frame_num % config.frames_per_round
+    
+    # Get pre-calculated scroll position
+    current_scroll = config.scroll_states[frame_num]
+    
+    # Completed rounds never change, so only the elements that intersect the
+    # viewport are looked up (binary search over their precomputed positions)
+    history_end = config.round_history_end[min(current_round, len(config.all_rounds))]
+    first_visible = bisect.bisect_right(config.history_bottoms, current_scroll, 0, history_end)
+    geometry = config.geometry
+    last_visible = bisect.bisect_left(config.history_tops, current_scroll + geometry.height, first_visible, history_end)
+    if frame_num < config.title_duration_frames or not history_strip:
+        # History ink is drawn over the title, so these frames paste the elements themselves
+        for idx in range(first_visible, last_visible):
+            display_list.append((config.history_keys[idx], int(config.history_tops[idx] - current_scroll)))
+    else:
+        display_list.extend(history_strip_entries(config, current_scroll, first_visible, last_visible))
+    
+    # Live elements of the current round as (sprite id, type, height)
+    visible_elements = []
+    
+    def add_element(sprite_id, elem_type):
+        visible_elements.append((sprite_id, elem_type, sprite_height(sprite_id, config)))
+    
+    def add_text():
+        if config.processed_elements.get(f'text_{current_round}'):
+            add_element(f'text_{current_round}', 'text')
+    
+    def add_loading(mode):
+        add_element(f'loading_{mode}_{loading_window(frame_num)}', 'loading')
+    
+    def add_image(phase, phase_start):
+        # Show drawing animation or final image
+        if not config.processed_elements.get(f'image_{current_round}'):
+            return
+        if phase == 'drawing':
+            drawing_progress = min(1.0, max(0.0, (frame_in_round - phase_start) / (config.drawing_phase - VISUAL_LEAD_FRAMES)))
+            strokes = config.processed_elements.get(f'strokes_{current_round}')
+            add_element(f'drawing_{current_round}_{drawing_reveal_count(strokes, drawing_progress)}', 'image')
+        else:
+            add_element(f'image_{current_round}', 'image')
+    
+    if current_round < len(config.all_rounds):
+        phase, phase_start = phase_at(config.round_phases[current_round], frame_in_round)
+        if phase == 'analyzing':
+            # Analyzing phase: only show loading
+            add_loading('analyzing')
+        elif phase == 'word':
+            # Word reveal phase: only show text
+            add_text()
+        elif phase == 'generating':
+            # Generating phase: show text AND loading
+            add_text()
+            add_loading('generating')
+        else:
+            # Drawing/reveal phase: show text AND drawing animation or final image
+            add_text()
+            add_image(phase, phase_start)
+    
+    # Position the live elements below the completed rounds
+    current_y = config.round_content_top[min(current_round, len(config.all_rounds))]
+    for idx, (sprite_id, elem_type, height) in enumerate(visible_elements):
+        if (idx > 0 or history_end > 0) and elem_type == 'loading':
+            current_y += geometry.loading_extra_padding
+        
+        y_pos = current_y - current_scroll
+        
+        if y_pos < geometry.height and y_pos + height > 0:
+            display_list.append((sprite_id, int(y_pos)))
+        
+        current_y += height + geometry.text_padding
+    
+    return display_list
+
+def history_strip_entries(config, current_scroll, first_visible, last_visible):
+    """Display list entries that show the visible completed-round elements from the history strip
+    
+    Consecutive elements that land at the same offset share one entry
+    ('history_<first row>_<end row>', y), clipped to the frame. Positions are
+    truncated per element exactly as when each element is pasted on its own,
+    so an element cut by the top edge may get its own entry.
+    """
+    entries = []
+    for idx in range(first_visible, last_visible):
+        top = config.history_tops[idx]
+        y = int(top - current_scroll)
+        if entries and entries[-1][1] - entries[-1][0] == y - top:
+            entries[-1][2] = config.history_bottoms[idx]
+        else:
+            entries.append([top, y, config.history_bottoms[idx]])
+    
+    geometry = config.geometry
+    display_list = []
+    for start, y, end in entries:
+        if y < 0:
+            start -= y
+            y = 0
+        end = min(end, start + geometry.height - y)
+        display_list.append((f'history_{start - geometry.content_top}_{end - geometry.content_top}', y))
+    return display_list
+
+class Timeline:
+    """Display lists of every frame, compiled once into flat arrays
+    
+    Frame f shows entries offsets[f] to offsets[f + 1]. Each entry is a sprite
+    (an index into sprite_ids), the y it is pasted at and its animation step:
+    the reveal count of a drawing or the pattern window of a loading
+    indicator, -1 for static sprites. sprite_ids holds animated ids without
+    their step ('drawing_3', 'loading_generating'), so the table stays small
+    however long the animations run. The arrays are the whole timeline: it
+    pickles cheaply to worker processes, and save() writes it to an .npz file
+    that load() reads back without the layout model or the game images.
+    """
+    def __init__(self, sprite_ids, offsets, sprites, ys, steps):
+        self.sprite_ids = list(sprite_ids)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.sprites = np.asarray(sprites, dtype=np.int32)
+        self.ys = np.asarray(ys, dtype=np.int32)
+        self.steps = np.asarray(steps, dtype=np.int32)
+    
+    @classmethod
+    def compile(cls, config):
+        """Build the display list of every frame of the config"""
+        sprite_index = {}
+        offsets, sprites, ys, steps = [0], [], [], []
+        for frame_num in range(config.frames_per_round * config.total_rounds):
+            for sprite_id, y in build_display_list(frame_num, config):
+                step = -1
+                if sprite_id.partition('_')[0] in ANIMATED_SPRITE_KINDS:
+                    sprite_id, step = sprite_id.rsplit('_', 1)
+                sprites.append(sprite_index.setdefault(sprite_id, len(sprite_index)))
+                ys.append(y)
+                steps.append(int(step))
+            offsets.append(len(sprites))
+        return cls(sprite_index, offsets, sprites, ys, steps)
+    
+    def __len__(self):
+        return len(self.offsets) - 1
+    
+    def display_list(self, frame_num):
+        """The (sprite id, y) display list of a frame, as build_display_list returns it"""
+        start, end = self.offsets[frame_num], self.offsets[frame_num + 1]
+        sprite_ids = self.sprite_ids
+        return [(sprite_ids[sprite] if step < 0 else f"{sprite_ids[sprite]}_{step}", y)
+                for sprite, y, step in zip(self.sprites[start:end].tolist(), self.ys[start:end].tolist(),
+                                           self.steps[start:end].tolist())]
+    
+    def save(self, path):
+        """Write the timeline arrays to an .npz file"""
+        np.savez(path, sprite_ids=np.array(self.sprite_ids, dtype=str), offsets=self.offsets,
+                 sprites=self.sprites, ys=self.ys, steps=self.steps)
+    
+    @classmethod
+    def load(cls, path):
+        """Read a timeline written by save()"""
+        with np.load(path) as data:
+            return cls(data['sprite_ids'].tolist(), data['offsets'], data['sprites'], data['ys'], data['steps'])
+
+class HistoryStrip:
+    """Tall canvas of the completed rounds, extended one round at a time
+    
+    Completed rounds never change once they finish, so each round's text and
+    image are composited over the background once, into a strip whose row 0
+    is at the content top. A frame then shows its history as a crop of the strip
+    instead of pasting every element again, so the per-frame cost does not
+    grow with the round index.
+    """
+    def __init__(self, config):
+        self.config = config
+        self._pixels = np.empty((0, config.geometry.width, 3), dtype=np.uint8)
+        self._height = 0
+        self._rounds = 0
+        self._lock = threading.Lock()
+    
+    def image(self, start, end):
+        """Rows [start, end) of the strip as an RGB image"""
+        return Image.fromarray(self.rows(start, end))
+    
+    def rows(self, start, end):
+        """Rows [start, end) of the strip as a (rows, width, 3) uint8 array view"""
+        if end > self._height:
+            self._extend(end)
+        return self._pixels[start:end]
+    
+    def _extend(self, end):
+        config = self.config
+        width, content_top = config.geometry.width, config.geometry.content_top
+        with self._lock:
+            while self._height < end and self._rounds < len(config.all_rounds):
+                round_idx = self._rounds
+                span_start = trace.now()
+                top = config.round_content_top[round_idx] - content_top
+                bottom = config.round_content_top[round_idx + 1] - content_top
+                
+                band = Image.new('RGB', (width, bottom - top), BACKGROUND_COLOR)
+                for idx in range(config.round_history_end[round_idx], config.round_history_end[round_idx + 1]):
+                    key = config.history_keys[idx]
+                    paste_sprite(band, key, config.processed_elements[key], config.history_tops[idx] - content_top - top)
+                
+                # Grow by doubling; readers may still hold the old array, whose rows stay valid
+                pixels = self._pixels
+                if bottom > len(pixels):
+                    pixels = np.empty((max(bottom, 2 * len(pixels)), width, 3), dtype=np.uint8)
+                    pixels[:top] = self._pixels[:top]
+                pixels[top:bottom] = np.asarray(band)
+                self._pixels = pixels
+                self._height = bottom
+                self._rounds += 1
+                trace.complete('history strip round', span_start, round=round_idx)
+
+def loading_window(frame):
+    """Index of the 6-frame window that decides the loading pattern"""
+    return frame // 6
+
+def resolve_sprite(sprite_id, config):
+    """Image for a display list sprite id"""
+    if sprite_id == 'title':
+        return config.sprites.title(config.part_number)[0]
+    
+    kind, _, args = sprite_id.partition('_')
+    if kind == 'history':
+        start, end = args.split('_')
+        return config.history.image(int(start), int(end))
+    if kind == 'loading':
+        mode, window = args.rsplit('_', 1)
+        return config.sprites.loading_indicator(int(window) * 6, mode=mode)
+    if kind == 'drawing':
+        round_idx, reveal_count = args.split('_')
+        return render_stroke_reveal(config.processed_elements.get(f'strokes_{round_idx}'), int(reveal_count),
+                                    (config.geometry.width, config.geometry.px(400)))
+    return config.processed_elements[sprite_id]
+
+def sprite_height(sprite_id, config):
+    """Height of a sprite without rendering it"""
+    kind, _, args = sprite_id.partition('_')
+    if kind == 'loading':
+        return config.geometry.loading_height
+    if kind == 'drawing':
+        strokes = config.processed_elements.get(f"strokes_{args.split('_')[0]}")
+        return strokes['size'][1] if strokes else config.geometry.px(400)
+    return resolve_sprite(sprite_id, config).height
+
+def paste_sprite(canvas, sprite_id, sprite, y, x=0):
+    """Paste a display list sprite onto the canvas at (x, y)
+    
+    Text and drawing sprites are 'L' coverage masks painted with LINE_ART_INK.
+    Other sprites are blended by their alpha if they are RGBA and pasted
+    opaquely otherwise (RGB sprites and grayscale 'L' round images).
+    """
+    if sprite_id.partition('_')[0] in COVERAGE_SPRITE_KINDS:
+        canvas.paste(LINE_ART_INK, (x, y, x + sprite.width, y + sprite.height), sprite)
+    else:
+        canvas.paste(sprite, (x, y), sprite if sprite.mode == 'RGBA' else None)
+
+class FrameCompositor:
+    """Composites display lists into uint8 NumPy frame buffers
+    
+    Produces the same pixels as pasting each sprite with paste_sprite, without
+    PIL images per frame. Sprites are turned into arrays once and kept in a
+    small LRU cache: opaque sprites as RGB rows that are copied in with a
+    slice assignment, blended sprites as the inverse coverage and the
+    premultiplied colour of their inked bounding box. Blending uses PIL's
+    rounding, t = dst * (255 - a) + src * a + 128, out = ((t >> 8) + t) >> 8.
+    Drawing reveals are fully opaque ink, so their revealed pixels, or the
+    pixels their pen pieces cover, are assigned directly. History strip
+    crops are copied from the strip.
+    
+    Callers pass the buffer to composite into, so backends can reuse one per
+    frame slot and hand it straight to the encoder.
+    """
+    CACHE_SIZE = 16
+    PEN_REVEALS = 4  # Rounds whose latest pen reveal is kept
+    
+    def __init__(self, config):
+        self.config = config
+        self._layers = OrderedDict()
+        self._pen_reveals = OrderedDict()
+        self._lock = threading.Lock()
+        # Broadcasting a colour tuple is far slower than copying a filled frame
+        self._background = np.empty((config.geometry.height, config.geometry.frame_width, 3), dtype=np.uint8)
+        self._background[...] = BACKGROUND_COLOR
+    
+    def new_buffer(self):
+        """Uninitialized frame buffer of the config's size"""
+        return np.empty_like(self._background)
+    
+    def composite(self, display_list, out=None):
+        """Composite a display list into `out` (or a new buffer) and return it"""
+        if out is None:
+            out = self.new_buffer()
+        np.copyto(out, self._background)
+        x = self.config.geometry.left
+        for sprite_id, y in display_list:
+            kind, _, args = sprite_id.partition('_')
+            if kind == 'history':
+                start, end = args.split('_')
+                self._copy(out, self.config.history.rows(int(start), int(end)), y, x)
+            elif kind == 'drawing':
+                round_idx, reveal_count = args.split('_')
+                strokes = self.config.processed_elements.get(f'strokes_{round_idx}')
+                if strokes and 'segments' in strokes:
+                    self._draw_pen(out, round_idx, strokes, int(reveal_count), y, x)
+                else:
+                    self._reveal(out, strokes, int(reveal_count), y, x)
+            else:
+                layer = self._layer(sprite_id)
+                if layer[0] == 'opaque':
+                    self._copy(out, layer[1], y, x)
+                elif layer[0] == 'blend':
+                    _, top, left, inverse_alpha, premultiplied = layer
+                    self._blend(out, top, x + left, inverse_alpha, premultiplied, y)
+        return out
+    
+    def _layer(self, sprite_id):
+        with self._lock:
+            layer = self._layers.get(sprite_id)
+            if layer is not None:
+                self._layers.move_to_end(sprite_id)
+                return layer
+        layer = self._prepare(sprite_id, resolve_sprite(sprite_id, self.config))
+        with self._lock:
+            self._layers[sprite_id] = layer
+            while len(self._layers) > self.CACHE_SIZE:
+                self._layers.popitem(last=False)
+        return layer
+    
+    @staticmethod
+    def _prepare(sprite_id, sprite):
+        """Array form of a sprite: ('opaque', rgb), ('blend', top, left, inverse alpha, premultiplied) or ('empty',)"""
+        if sprite_id.partition('_')[0] in COVERAGE_SPRITE_KINDS:
+            alpha = np.asarray(sprite)
+            colour = np.asarray(LINE_ART_INK, dtype=np.uint16)
+        elif sprite.mode == 'RGBA':
+            pixels = np.asarray(sprite)
+            alpha = pixels[..., 3]
+            if alpha.min() == 255:
+                return ('opaque', np.ascontiguousarray(pixels[..., :3]))
+            colour = pixels[..., :3]
+        else:
+            pixels = np.asarray(sprite.convert('RGB') if sprite.mode != 'RGB' else sprite)
+            return ('opaque', pixels)
+        
+        rows = np.flatnonzero(alpha.any(axis=1))
+        if not len(rows):
+            return ('empty',)
+        columns = np.flatnonzero(alpha.any(axis=0))
+        top, bottom, left, right = rows[0], rows[-1] + 1, columns[0], columns[-1] + 1
+        alpha = alpha[top:bottom, left:right, None].astype(np.uint16)
+        if colour.ndim == 3:
+            colour = colour[top:bottom, left:right].astype(np.uint16)
+        return ('blend', int(top), int(left), 255 - alpha, colour * alpha + 128)
+    
+    @staticmethod
+    def _copy(out, pixels, y, x):
+        height, width = out.shape[:2]
+        start, end = max(0, -y), min(len(pixels), height - y)
+        if start < end:
+            columns = min(pixels.shape[1], width - x)
+            out[y + start:y + end, x:x + columns] = pixels[start:end, :columns]
+    
+    @staticmethod
+    def _blend(out, top, left, inverse_alpha, premultiplied, y):
+        height, width = out.shape[:2]
+        y += top
+        start, end = max(0, -y), min(len(inverse_alpha), height - y)
+        if start < end:
+            columns = min(inverse_alpha.shape[1], width - left)
+            region = out[y + start:y + end, left:left + columns]
+            blended = region * inverse_alpha[start:end, :columns]
+            blended += premultiplied[start:end, :columns]
+            blended += blended >> 8
+            region[...] = blended >> 8
+    
+    def _draw_pen(self, out, round_idx, strokes, reveal_count, y, x=0):
+        """Ink the pen reveal of a round, drawn on from the furthest earlier reveal kept for it
+        
+        Reveals only grow, so frames rendered in order draw just the pieces
+        added since the previous frame. Along with its mask, a kept reveal
+        lists its inked pixels, which are assigned like a pixel reveal.
+        """
+        with self._lock:
+            kept = self._pen_reveals.get(round_idx)
+        if kept is None or kept[0] > reveal_count:
+            kept = (0, Image.new('L', tuple(strokes['size']), 0), np.zeros((0, 2), dtype=np.int16))
+        count, mask, inked = kept
+        if reveal_count > count:
+            previous = mask
+            mask = draw_pen_reveal(strokes, reveal_count, count, previous.copy())
+            # Only the box around the new pieces can have changed
+            pieces = strokes['segments'][count:reveal_count]
+            reach = int(strokes['widths'][count:reveal_count].max()) // 2 + 1
+            left, top = max(0, pieces[:, 0::2].min() - reach), max(0, pieces[:, 1::2].min() - reach)
+            right, bottom = pieces[:, 0::2].max() + reach + 1, pieces[:, 1::2].max() + reach + 1
+            box = (int(left), int(top), int(min(right, mask.width)), int(min(bottom, mask.height)))
+            rows, columns = np.nonzero(np.asarray(mask.crop(box)) != np.asarray(previous.crop(box)))
+            added = np.column_stack([columns + box[0], rows + box[1]]).astype(np.int16)
+            inked = np.concatenate([inked, added])
+            with self._lock:
+                self._pen_reveals[round_idx] = (reveal_count, mask, inked)
+                self._pen_reveals.move_to_end(round_idx)
+                while len(self._pen_reveals) > self.PEN_REVEALS:
+                    self._pen_reveals.popitem(last=False)
+        self._reveal(out, {'coords': inked}, len(inked), y, x)
     
-    # Get image size from first stroke
-    if strokes:
-        max_x = max(max(x for x, y in stroke) for stroke, _, _ in strokes)
-        max_y = max(max(y for x, y in stroke) for stroke, _, _ in strokes)
-        result = Image.new('RGBA', (max_x + 1, max_y + 1), (0, 0, 0, 0))
-    else:
-        result = Image.new('RGBA', (VIDEO_WIDTH, 400), (0, 0, 0, 0))
-    
-    for stroke, start, end in strokes:
-        if progress >= end:
-            for x, y in stroke:
-                if 0 <= x < result.width and 0 <= y < result.height:
-                    result.putpixel((x, y), (0, 0, 0, 255))
-        elif progress > start:
-            local_progress = (progress - start) / (end - start)
-            reveal_count = int(len(stroke) * local_progress)
-            for x, y in stroke[:reveal_count]:
-                if 0 <= x < result.width and 0 <= y < result.height:
-                    result.putpixel((x, y), (0, 0, 0, 255))
-    
-    return result
+    @staticmethod
+    def _reveal(out, strokes, reveal_count, y, x=0):
+        if not strokes or not reveal_count:
+            return
+        revealed = strokes['coords'][:reveal_count]
+        rows = revealed[:, 1] + y
+        visible = (rows >= 0) & (rows < out.shape[0])
+        out[rows[visible], revealed[visible, 0] + x] = LINE_ART_INK
+
+def composite_frame(display_list, config):
+    """Paste the sprites of a display list onto a blank frame"""
+    return Image.fromarray(config.compositor.composite(display_list))
+
+def render_frame(frame_num, config):
+    """Composite a single frame and return it as an RGB image"""
+    return composite_frame(config.timeline.display_list(frame_num), config)
 
 def generate_single_frame(frame_info):
     """Generate a single frame - this function will be called in parallel"""
     frame_num, config = frame_info
     
     try:
-        image = Image.new('RGB', (VIDEO_WIDTH, VIDEO_HEIGHT), BACKGROUND_COLOR)
-        draw = ImageDraw.Draw(image)
-        
-        # Show title for first 3 seconds
-        if frame_num < config.title_duration_frames:
-            create_title_text(draw, config.font_path, part_number=config.part_number, bottom_padding=120)
-        
-        # Calculate round and progress
-        current_round = frame_num // config.frames_per_round
-        frame_in_round = frame_num % config.frames_per_round
-        
-        # Get pre-calculated scroll position
-        current_scroll = config.scroll_states[frame_num]
-        
-        # Build visible elements
-        visible_elements = []
-        
-        # Add elements from all previous rounds and current round
-        for round_idx in range(current_round + 1):
-            if round_idx < len(config.all_rounds):
-                round_data = config.all_rounds[round_idx]
-                
-                # Handle current round timing
-                if round_idx == current_round:
-                    if current_round == 0:
-                        # First round logic (keep as is)
-                        GENERATE_DELAY_FRAMES = int(config.frames_per_round * 0.18)
-                        text_img = config.processed_elements.get(f'text_{round_idx}')
-                        if text_img:
-                            visible_elements.append({
-                                'type': 'text',
-                                'image': text_img,
-                                'opacity': 255
-                            })
-                        if frame_in_round >= GENERATE_DELAY_FRAMES and frame_in_round < GENERATE_DELAY_FRAMES + config.image_delay - 3:
-                            loading_img = create_loading_indicator(frame_num, config.font_path, mode='generating')
-                            visible_elements.append({
-                                'type': 'loading',
-                                'image': loading_img,
-                                'opacity': 255
-                            })
-                        elif frame_in_round >= GENERATE_DELAY_FRAMES + config.image_delay - 3:
-                            # Show drawing animation or final image
-                            round_img = config.processed_elements.get(f'image_{round_idx}')
-                            strokes = config.processed_elements.get(f'strokes_{round_idx}', [])
-                            if round_img and frame_in_round < GENERATE_DELAY_FRAMES + config.image_delay + config.drawing_phase - 3:
-                                drawing_progress = min(1.0, max(0.0, (frame_in_round - (GENERATE_DELAY_FRAMES + config.image_delay - 3)) / (config.drawing_phase - 3)))
-                                animated_img = create_drawing_animation(strokes, drawing_progress)
-                                if animated_img.width > 0 and animated_img.height > 0:
-                                    visible_elements.append({
-                                        'type': 'image',
-                                        'image': animated_img,
-                                        'opacity': 255
-                                    })
-                            elif round_img:
-                                visible_elements.append({
-                                    'type': 'image',
-                                    'image': round_img,
-                                    'opacity': 255
-                                })
-                    else:
-                        # Subsequent rounds logic (fix: only show text during word reveal phase)
-                        if frame_in_round < config.initial_loading:
-                            # Analyzing phase: only show loading
-                            loading_img = create_loading_indicator(frame_num, config.font_path, mode='analyzing')
-                            visible_elements.append({
-                                'type': 'loading',
-                                'image': loading_img,
-                                'opacity': 255
-                            })
-                        elif frame_in_round < config.initial_loading + config.text_phase - 3:
-                            # Word reveal phase: only show text
-                            text_img = config.processed_elements.get(f'text_{round_idx}')
-                            if text_img:
-                                visible_elements.append({
-                                    'type': 'text',
-                                    'image': text_img,
-                                    'opacity': 255
-                                })
-                        elif frame_in_round < config.initial_loading + config.text_phase + config.image_delay - 3:
-                            # Generating phase: show text AND loading
-                            text_img = config.processed_elements.get(f'text_{round_idx}')
-                            if text_img:
-                                visible_elements.append({
-                                    'type': 'text',
-                                    'image': text_img,
-                                    'opacity': 255
-                                })
-                            loading_img = create_loading_indicator(frame_num, config.font_path, mode='generating')
-                            visible_elements.append({
-                                'type': 'loading',
-                                'image': loading_img,
-                                'opacity': 255
-                            })
-                        elif frame_in_round >= config.initial_loading + config.text_phase + config.image_delay - 3:
-                            # Drawing/reveal phase: show text AND drawing animation or final image
-                            text_img = config.processed_elements.get(f'text_{round_idx}')
-                            if text_img:
-                                visible_elements.append({
-                                    'type': 'text',
-                                    'image': text_img,
-                                    'opacity': 255
-                                })
-                            round_img = config.processed_elements.get(f'image_{round_idx}')
-                            strokes = config.processed_elements.get(f'strokes_{round_idx}', [])
-                            if round_img and frame_in_round < config.initial_loading + config.text_phase + config.image_delay + config.drawing_phase - 3:
-                                drawing_progress = min(1.0, max(0.0, (frame_in_round - (config.initial_loading + config.text_phase + config.image_delay - 3)) / (config.drawing_phase - 3)))
-                                animated_img = create_drawing_animation(strokes, drawing_progress)
-                                if animated_img.width > 0 and animated_img.height > 0:
-                                    visible_elements.append({
-                                        'type': 'image',
-                                        'image': animated_img,
-                                        'opacity': 255
-                                    })
-                            elif round_img:
-                                visible_elements.append({
-                                    'type': 'image',
-                                    'image': round_img,
-                                    'opacity': 255
-                                })
-                else:
-                    # Previous rounds - show final image and text
-                    text_img = config.processed_elements.get(f'text_{round_idx}')
-                    if text_img:
-                        visible_elements.append({
-                            'type': 'text',
-                            'image': text_img,
-                            'opacity': 255
-                        })
-                    round_img = config.processed_elements.get(f'image_{round_idx}')
-                    if round_img:
-                        visible_elements.append({
-                            'type': 'image',
-                            'image': round_img,
-                            'opacity': 255
-                        })
-        
-        # Position and draw elements
-        current_y = 150  # Add more top padding to start content lower on screen
-        for idx, elem in enumerate(visible_elements):
-            if idx > 0 and elem['type'] == 'loading':
-                current_y += LOADING_EXTRA_PADDING
-            
-            y_pos = current_y - current_scroll
-            
-            if y_pos < VIDEO_HEIGHT and y_pos + elem['image'].height > 0:
-                image.paste(elem['image'], (0, int(y_pos)), elem['image'])
-            
-            current_y += elem['image'].height + TEXT_PADDING
+        with trace.span('composite', 'frame', frame=frame_num):
+            image = render_frame(frame_num, config)
         
         # Save frame
         frame_path = f"temp_frames/frame_{frame_num:05d}.png"
-        image.save(frame_path)
+        with trace.span('png write', 'frame', frame=frame_num):
+            image.save(frame_path)
         
         return frame_num
         
@@ -791,42 +1728,293 @@ def generate_single_frame(frame_info):
         print(f"Error generating frame {frame_num}: {e}")
         return None
 
-def generate_frames_parallel(config, num_processes=None):
-    """Generate frames in parallel using ThreadPoolExecutor (Windows-optimized)"""
-    from concurrent.futures import ThreadPoolExecutor
+ATLAS_ALIGNMENT = 64  # Byte alignment of each array in the shared element atlas
+
+def build_element_atlas(processed_elements):
+    """Copy the preprocessed elements into one shared-memory block
+    
+    Returns the block and a picklable manifest from which open_element_atlas
+    rebuilds the same elements as views onto the block, without copying.
+    """
+    arrays = []
+    manifest = {}
+    offset = 0
+    
+    def place(array):
+        nonlocal offset
+        array = np.ascontiguousarray(array)
+        spec = (offset, array.shape, array.dtype.str)
+        arrays.append((offset, array))
+        offset += -(-array.nbytes // ATLAS_ALIGNMENT) * ATLAS_ALIGNMENT
+        return spec
+    
+    for key, element in processed_elements.items():
+        if element is None:
+            manifest[key] = None
+        elif isinstance(element, Image.Image):
+            manifest[key] = {'mode': element.mode, 'size': element.size, 'pixels': place(np.asarray(element))}
+        else:
+            manifest[key] = {'size': element['size'],
+                             'arrays': {name: place(value) for name, value in element.items() if name != 'size'}}
+    
+    atlas = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+    for start, array in arrays:
+        np.ndarray(array.shape, array.dtype, buffer=atlas.buf, offset=start)[...] = array
+    return atlas, manifest
+
+def open_element_atlas(buffer, manifest):
+    """Preprocessed elements backed by an atlas built with build_element_atlas"""
+    def view(spec):
+        offset, shape, dtype = spec
+        return np.ndarray(shape, dtype, buffer=buffer, offset=offset)
+    
+    elements = {}
+    for key, entry in manifest.items():
+        if entry is None:
+            elements[key] = None
+        elif 'mode' in entry:
+            mode = entry['mode']
+            elements[key] = Image.frombuffer(mode, entry['size'], view(entry['pixels']), 'raw', mode, 0, 1)
+        else:
+            elements[key] = {name: view(spec) for name, spec in entry['arrays'].items()}
+            elements[key]['size'] = entry['size']
+    return elements
+
+def _composite_into(display_list, config, out, frame_num=None):
+    with trace.span('composite', 'frame', frame=frame_num):
+        config.compositor.composite(display_list, out)
+
+# Per-process state of a process backend worker, set up by _init_frame_worker
+_worker_state = {}
+
+def _init_frame_worker(config, atlas_name, manifest, ring_name, frame_size, tracing=False):
+    """Process pool initializer: map the shared blocks and rebuild the config's elements"""
+    if tracing:
+        trace.enable()
+    atlas = shared_memory.SharedMemory(name=atlas_name)
+    config.processed_elements = open_element_atlas(atlas.buf, manifest)
+    config.sprites = SpriteCache(config.font_path, config.cache_dir, config.geometry)
+    config.history = HistoryStrip(config)
+    config.compositor = FrameCompositor(config)
+    _worker_state.update(
+        config=config,
+        atlas=atlas,
+        ring=shared_memory.SharedMemory(name=ring_name) if ring_name else None,
+        frame_size=frame_size
+    )
+
+def _render_into_slot(display_list, slot, frame_num=None):
+    """Composite a frame straight into its slot of the shared frame ring
+    
+    Returns the trace events recorded for it, if tracing is on.
+    """
+    config = _worker_state['config']
+    frame = np.ndarray((config.geometry.height, config.geometry.frame_width, 3), dtype=np.uint8,
+                       buffer=_worker_state['ring'].buf, offset=slot * _worker_state['frame_size'])
+    with trace.span('composite', 'frame', frame=frame_num):
+        config.compositor.composite(display_list, frame)
+    del frame
+    return trace.drain()
+
+def _save_frame_in_worker(frame_num):
+    return generate_single_frame((frame_num, _worker_state['config'])), trace.drain()
+
+class ThreadFrameBackend:
+    """Composites frames on a thread pool inside the main process
     
-    if num_processes is None:
-        num_processes = mp.cpu_count() * 2
+    Frames are composited into a fixed set of reusable buffers, one per
+    slot, which are written to the encoder as they are.
+    """
+    name = 'thread'
     
+    def __init__(self, config, num_workers, slots=0):
+        self.config = config
+        self.num_workers = num_workers
+        self.buffers = [config.compositor.new_buffer() for _ in range(slots)]
+        self.free_slots = deque(range(slots))
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=num_workers)
+    
+    def submit(self, display_list, frame_num=None):
+        """Start compositing a frame into a free buffer; returns a handle for write() and release()"""
+        slot = self.free_slots.popleft()
+        return slot, self.executor.submit(_composite_into, display_list, self.config, self.buffers[slot], frame_num)
+    
+    def submit_png(self, frame_num):
+        """Start rendering a frame to temp_frames/; pass the future to png_result()"""
+        return self.executor.submit(generate_single_frame, (frame_num, self.config))
+    
+    def png_result(self, future):
+        """Frame number written by a submit_png() job, or None if it failed"""
+        return future.result()
+    
+    def write(self, handle, writer):
+        """Wait for a submitted frame and feed its buffer to the encoder"""
+        slot, future = handle
+        future.result()
+        writer.write(self.buffers[slot])
+    
+    def release(self, handle):
+        """Called once the encoder has been fed every frame that uses the handle"""
+        slot, _ = handle
+        self.free_slots.append(slot)
+    
+    def close(self, cancel=False):
+        self.executor.shutdown(wait=True, cancel_futures=cancel)
+
+class ProcessFrameBackend:
+    """Composites frames in worker processes that share one element atlas
+    
+    Compositing is mostly Python-level work, so threads contend for the GIL;
+    separate processes do not. The preprocessed elements are copied into
+    shared memory once and mapped by every worker instead of being pickled
+    with each task. Finished frames come back through a ring of frame-sized
+    shared-memory slots: each distinct frame takes a free slot, and the slot
+    is returned once the encoder has been fed every frame that holds it.
+    """
+    name = 'process'
+    
+    def __init__(self, config, num_workers, slots=0):
+        self.num_workers = num_workers
+        self.frame_size = config.geometry.frame_width * config.geometry.height * 3
+        self.free_slots = deque(range(slots))
+        self.atlas, manifest = build_element_atlas(config.processed_elements)
+        self.ring = None
+        try:
+            if slots:
+                self.ring = shared_memory.SharedMemory(create=True, size=slots * self.frame_size)
+            self.executor = concurrent.futures.ProcessPoolExecutor(
+                max_workers=num_workers,
+                initializer=_init_frame_worker,
+                initargs=(config, self.atlas.name, manifest, self.ring.name if self.ring else None, self.frame_size,
+                          trace.is_enabled())
+            )
+            # Start the workers now: forked later, they would inherit the stdin
+            # pipes of encoders opened in the meantime and keep them from ever
+            # seeing end of input
+            self.executor.submit(int).result()
+        except BaseException:
+            self._unlink()
+            raise
+    
+    def submit(self, display_list, frame_num=None):
+        """Start compositing a frame into a free ring slot; returns a handle for write() and release()"""
+        slot = self.free_slots.popleft()
+        return slot, self.executor.submit(_render_into_slot, display_list, slot, frame_num)
+    
+    def submit_png(self, frame_num):
+        """Start rendering a frame to temp_frames/; pass the future to png_result()"""
+        return self.executor.submit(_save_frame_in_worker, frame_num)
+    
+    def png_result(self, future):
+        """Frame number written by a submit_png() job, or None if it failed"""
+        result, recorded = future.result()
+        trace.merge(recorded)
+        return result
+    
+    def write(self, handle, writer):
+        """Wait for a submitted frame and feed its ring slot to the encoder"""
+        slot, future = handle
+        future.result()
+        with self.ring.buf[slot * self.frame_size:(slot + 1) * self.frame_size] as frame:
+            writer.write(frame)
+    
+    def release(self, handle):
+        """Called once the encoder has been fed every frame that uses the handle"""
+        slot, future = handle
+        trace.merge(future.result())
+        self.free_slots.append(slot)
+    
+    def close(self, cancel=False):
+        try:
+            self.executor.shutdown(wait=True, cancel_futures=cancel)
+        finally:
+            self._unlink()
+    
+    def _unlink(self):
+        for block in (self.ring, self.atlas):
+            if block is not None:
+                block.close()
+                block.unlink()
+        self.ring = self.atlas = None
+
+FRAME_BACKENDS = {'thread': ThreadFrameBackend, 'process': ProcessFrameBackend}
+
+def default_num_workers(backend):
+    """Threads default to 2 x cpu_count() like before; processes to one per core"""
+    return mp.cpu_count() * 2 if backend == 'thread' else mp.cpu_count()
+
+def create_frame_backend(backend, config, num_workers=None, slots=0):
+    """Start a frame rendering backend ('thread' or 'process')
+    
+    `slots` is the number of composited frames the backend may hold at once.
+    """
+    if num_workers is None:
+        num_workers = default_num_workers(backend)
+    return FRAME_BACKENDS[backend](config, num_workers, slots)
+
+def report_backend_throughput(backend, distinct_frames, total_frames, elapsed_time):
+    """Print how fast a backend composited frames"""
+    elapsed_time = max(elapsed_time, 1e-9)
+    print(f"{backend.name} backend ({backend.num_workers} workers): {distinct_frames} distinct frames "
+          f"composited in {elapsed_time:.2f}s - {distinct_frames / elapsed_time:.1f} composited frames/sec, "
+          f"{total_frames / elapsed_time:.1f} output frames/sec")
+
+def find_held_frames(config, frame_numbers):
+    """Group frames into runs of consecutive, pixel-identical frames
+    
+    Returns (display list, [frame numbers]) pairs in frame order. Only the
+    first frame of each run needs to be composited; the rest hold it.
+    """
+    runs = []
+    for frame_num in frame_numbers:
+        display_list = config.timeline.display_list(frame_num)
+        if runs and runs[-1][0] == display_list:
+            runs[-1][1].append(frame_num)
+        else:
+            runs.append((display_list, [frame_num]))
+    return runs
+
+def generate_frames_parallel(config, num_processes=None, backend='thread'):
+    """Generate frames in parallel on a thread or process backend
+    
+    Frames that hold the previous frame are not rendered again; their PNG is
+    copied from the first frame of the run.
+    """
     # Create directories
     os.makedirs("temp_frames", exist_ok=True)
     
     total_frames = config.frames_per_round * config.total_rounds
-    print(f"Creating {total_frames} frames using {num_processes} threads (ThreadPoolExecutor)...")
-    
-    # Create frame info tuples
-    frame_infos = [(frame_num, config) for frame_num in range(total_frames)]
+    runs = find_held_frames(config, range(total_frames))
+    frame_backend = create_frame_backend(backend, config, num_processes)
+    print(f"Creating {total_frames} frames ({len(runs)} distinct) using {frame_backend.num_workers} "
+          f"workers ({frame_backend.name} backend)...")
     
     # Track progress
     completed_frames = 0
+    reused_frames = 0
     start_time = time.time()
     
-    # Use ThreadPoolExecutor instead of ProcessPoolExecutor
-    with ThreadPoolExecutor(max_workers=num_processes) as executor:
-        # Submit all jobs
-        future_to_frame = {executor.submit(generate_single_frame, frame_info): frame_info[0] 
-                          for frame_info in frame_infos}
+    try:
+        # Submit one job per run of identical frames
+        future_to_run = {frame_backend.submit_png(frame_nums[0]): frame_nums for _, frame_nums in runs}
         
         # Collect results as they complete
-        for future in concurrent.futures.as_completed(future_to_frame):
-            frame_num = future_to_frame[future]
+        for future in concurrent.futures.as_completed(future_to_run):
+            frame_nums = future_to_run[future]
+            frame_num = frame_nums[0]
             try:
-                result = future.result()
+                result = frame_backend.png_result(future)
                 if result is not None:
-                    completed_frames += 1
+                    # Held frames reuse the frame that was just written
+                    for held_frame in frame_nums[1:]:
+                        shutil.copyfile(f"temp_frames/frame_{frame_num:05d}.png",
+                                        f"temp_frames/frame_{held_frame:05d}.png")
+                    previous_completed = completed_frames
+                    completed_frames += len(frame_nums)
+                    reused_frames += len(frame_nums) - 1
                     
                     # Progress update every 30 frames or at the end
-                    if completed_frames % 30 == 0 or completed_frames == total_frames:
+                    if completed_frames // 30 != previous_completed // 30 or completed_frames == total_frames:
                         elapsed_time = time.time() - start_time
                         completion = completed_frames / total_frames * 100
                         frames_per_second = completed_frames / elapsed_time if elapsed_time > 0 else 0
@@ -839,167 +2027,783 @@ def generate_frames_parallel(config, num_processes=None):
                     
             except Exception as e:
                 print(f"Error processing frame {frame_num}: {e}")
+    finally:
+        frame_backend.close()
+    
+    print(f"Reused {reused_frames} of {total_frames} frames that hold the previous frame")
+    report_backend_throughput(frame_backend, len(runs), total_frames, time.time() - start_time)
+
+def get_thumbnail_frame_number(config):
+    """Return the frame used as the thumbnail (the last title frame)"""
+    return max(0, config.title_duration_frames - 1)
+
+def export_thumbnail(config, thumbnail_path):
+    """Composite the thumbnail frame straight from the preprocessed elements and save it as a PNG"""
+    frame_num = get_thumbnail_frame_number(config)
+    with trace.span('thumbnail', frame=frame_num):
+        render_frame(frame_num, config).save(thumbnail_path)
+    print(f"Thumbnail saved as: {thumbnail_path}")
+    return thumbnail_path
+
+def audio_mux_args(custom_audio):
+    """Extra ffmpeg (input, output) arguments that mux the custom audio track into video input 0"""
+    if not (custom_audio and os.path.exists(custom_audio)):
+        return [], []
+    return ["-i", custom_audio], ["-map", "0:v", "-map", "1:a", "-c:a", "aac", "-shortest"]
+
+VFR_TAIL_FRAMES = 3  # x264 decode timestamps trail by up to two frames, so the mp4 length ends with these
+
+def distinct_frame_numbers(config, frame_numbers):
+    """Frames of a range that change the picture, for variable frame rate output
+    
+    Returns the first frame of every run of pixel-identical frames. The last
+    VFR_TAIL_FRAMES frames of the range are always included: the mp4 duration
+    is taken from the decode timestamps, which B-frames make trail the
+    presentation timestamps, and a hold at the very end would otherwise be
+    cut short. Frame 0 shows the thumbnail frame, as in encode_frame_range.
+    """
+    thumbnail_frame = get_thumbnail_frame_number(config)
+    frames = []
+    previous_display_list = None
+    for frame_num in frame_numbers:
+        display_list = config.timeline.display_list(thumbnail_frame if frame_num == 0 else frame_num)
+        if display_list != previous_display_list:
+            frames.append(frame_num)
+            previous_display_list = display_list
+    tail = frame_numbers[-VFR_TAIL_FRAMES:]
+    return [frame_num for frame_num in frames if frame_num < tail[0]] + list(tail)
+
+def _frame_index_expression(steps):
+    """ffmpeg expression of the input frame index N that adds the offset of the last (first index, offset) step at or before N"""
+    if len(steps) == 1:
+        return f"N+{steps[0][1]}"
+    middle = len(steps) // 2
+    return (f"if(lt(N\\,{steps[middle][0]})\\,{_frame_index_expression(steps[:middle])}"
+            f"\\,{_frame_index_expression(steps[middle:])})")
+
+def vfr_setpts_filter(frame_times, fps):
+    """setpts filter that shows the i-th input frame at frame frame_times[i] of the output
+    
+    Runs of input frames that are shown on consecutive frames share one
+    offset, so the expression only grows with the number of holds.
+    """
+    steps = []
+    for index, frame in enumerate(frame_times):
+        if not steps or frame - index != steps[-1][1]:
+            steps.append((index, frame - index))
+    return f"setpts=({_frame_index_expression(steps)})/({fps}*TB)"
+
+class FFmpegFrameWriter:
+    """Long-lived ffmpeg process that encodes raw RGB frames written to its stdin
+    
+    When audio_file is given it is muxed in by the same process, so the
+    output comes out complete in a single pass. With frame_times, the frames
+    written are the distinct frames only: the i-th one is shown from frame
+    frame_times[i] until the next one, and the output has a variable frame
+    rate.
+    """
+    def __init__(self, output_file, fps, width=VIDEO_WIDTH, height=VIDEO_HEIGHT, audio_file=None, preset='medium',
+                 frame_times=None):
+        self.output_file = output_file
+        self.frames_written = 0
+        audio_inputs, audio_outputs = audio_mux_args(audio_file)
+        
+        vfr_args = []
+        if frame_times is not None:
+            # One tick per frame keeps every duration exact; with a finer
+            # timescale the mp4 edit list cuts the last frame short
+            vfr_args = ["-vf", vfr_setpts_filter(frame_times, fps), "-fps_mode", "vfr",
+                        "-video_track_timescale", str(fps)]
+        
+        ffmpeg_cmd = [
+            "ffmpeg", "-y",
+            "-f", "rawvideo",
+            "-pix_fmt", "rgb24",
+            "-s", f"{width}x{height}",
+            "-framerate", str(fps),
+            "-i", "-",
+            *audio_inputs,
+            *audio_outputs,
+            *vfr_args,
+            "-c:v", "libx264",
+            "-pix_fmt", "yuv420p",
+            "-crf", "23",
+            "-preset", preset,
+            "-loglevel", "error",  # Reduce log output
+            output_file
+        ]
+        self.process = subprocess.Popen(ffmpeg_cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL)
+        self.started = trace.now()
+    
+    def write(self, frame_bytes):
+        """Send one raw rgb24 frame to the encoder"""
+        with trace.span('pipe write', 'frame', frame=self.frames_written):
+            self.process.stdin.write(frame_bytes)
+        self.frames_written += 1
+    
+    def close(self):
+        """Flush the encoder and wait for it to finish the output file"""
+        self.process.stdin.close()
+        with trace.span('ffmpeg finish', 'ffmpeg', output=os.path.basename(self.output_file)):
+            returncode = self.process.wait()
+        trace.complete('ffmpeg encode', self.started, 'ffmpeg', output=os.path.basename(self.output_file),
+                       frames=self.frames_written)
+        if returncode != 0:
+            raise subprocess.CalledProcessError(returncode, "ffmpeg")
+    
+    def abort(self):
+        """Stop the encoder without finalizing the output"""
+        try:
+            self.process.stdin.close()
+        except Exception:
+            pass
+        self.process.kill()
+        self.process.wait()
+
+def make_progress_reporter(total_frames, start_time, verb='Encoded'):
+    """Thread-safe callback that counts written frames and prints progress"""
+    lock = threading.Lock()
+    completed = [0]
+    
+    def frame_written():
+        with lock:
+            completed[0] += 1
+            completed_frames = completed[0]
+        
+        # Progress update every 30 frames or at the end
+        if completed_frames % 30 == 0 or completed_frames == total_frames:
+            elapsed_time = time.time() - start_time
+            completion = completed_frames / total_frames * 100
+            frames_per_second = completed_frames / elapsed_time if elapsed_time > 0 else 0
+            print(f"{verb} {completed_frames}/{total_frames} frames ({completion:.1f}%) - "
+                  f"{frames_per_second:.1f} frames/sec")
+    
+    return frame_written
+
+def encode_frame_range(config, frame_backend, writer, frame_numbers, window, frame_written=None):
+    """Composite a range of frames on a backend and write them in order to one encoder
+    
+    At most `window` frames are in flight at once. Frame 0 is rendered from the
+    thumbnail frame. The writer is closed when the range is done (or aborted on
+    error); returns the number of frames that held the previous frame.
+    """
+    thumbnail_frame = get_thumbnail_frame_number(config)
+    pending = deque()
+    reused_frames = 0
+    
+    def write_oldest():
+        handle = pending.popleft()
+        frame_backend.write(handle, writer)
+        # Held frames sit right behind the frame they hold
+        if not pending or pending[0] is not handle:
+            frame_backend.release(handle)
+        if frame_written:
+            frame_written()
+    
+    try:
+        previous_display_list = previous_handle = None
+        for frame_num in frame_numbers:
+            # Frame 0 doubles as the thumbnail, so it shows the last title frame
+            source_frame = thumbnail_frame if frame_num == 0 else frame_num
+            with trace.span('display list', 'frame', frame=frame_num):
+                display_list = config.timeline.display_list(source_frame)
+            
+            # A frame that holds the previous one reuses its bytes instead of compositing,
+            # as long as they are still in the window (a window of 1 has already released them)
+            if display_list == previous_display_list and pending and pending[-1] is previous_handle:
+                pending.append(previous_handle)
+                reused_frames += 1
+            else:
+                previous_handle = frame_backend.submit(display_list, source_frame)
+                pending.append(previous_handle)
+                previous_display_list = display_list
+            if len(pending) >= window:
+                write_oldest()
+        while pending:
+            write_oldest()
+    except BaseException:
+        writer.abort()
+        raise
+    
+    writer.close()
+    return reused_frames
+
+def stream_frames_to_ffmpeg(config, output_file, num_threads=None, window=None, backend='thread',
+                            custom_audio=None, preset='medium', vfr=False):
+    """Render frames in parallel and stream them in order into a single ffmpeg process
+    
+    At most `window` frames are in flight at once; finished frames are written
+    to the encoder strictly in frame order, so memory stays bounded no matter
+    how long the video is. Frames are composited by a 'thread' or 'process'
+    backend (see create_frame_backend). The custom audio track, if any, is
+    muxed by the same encoder. With vfr, held frames are not sent at all and
+    the output has a variable frame rate.
+    """
+    if num_threads is None:
+        num_threads = default_num_workers(backend)
+    if window is None:
+        window = num_threads * 2
+    window = max(1, window)
+    
+    total_frames = config.frames_per_round * config.total_rounds
+    frame_numbers = range(total_frames)
+    if vfr:
+        frame_numbers = distinct_frame_numbers(config, frame_numbers)
+        print(f"Variable frame rate: encoding {len(frame_numbers)} distinct frames of {total_frames}")
+    
+    # Every unreleased handle has an entry in the window, so `window` slots suffice
+    frame_backend = create_frame_backend(backend, config, num_threads, slots=window)
+    print(f"Streaming {len(frame_numbers)} frames into ffmpeg using {frame_backend.num_workers} workers "
+          f"({frame_backend.name} backend, window: {window} frames)...")
+    
+    start_time = time.time()
+    try:
+        writer = FFmpegFrameWriter(output_file, config.fps, config.geometry.frame_width, config.geometry.height,
+                                   audio_file=custom_audio, preset=preset, frame_times=frame_numbers if vfr else None)
+        reused_frames = encode_frame_range(config, frame_backend, writer, frame_numbers, window,
+                                           make_progress_reporter(len(frame_numbers), start_time))
+    except BaseException:
+        frame_backend.close(cancel=True)
+        raise
+    frame_backend.close()
+    
+    reused_frames += total_frames - len(frame_numbers)
+    print(f"Reused {reused_frames} of {total_frames} frames that hold the previous frame")
+    report_backend_throughput(frame_backend, total_frames - reused_frames, total_frames, time.time() - start_time)
+    print(f"Video created: {output_file}")
+
+def stream_variants_to_ffmpeg(configs, output_files, num_threads=None, window=None, backend='thread',
+                              custom_audio=None, preset='medium', vfr=False):
+    """Stream several frame sizes of one part into concurrent ffmpeg processes
+    
+    `configs` are views of one config (see FrameGenerationConfig.variant), so
+    the preprocessing and the audio track are shared and only the per-size
+    layout is not. Each variant is composited on its own backend, with an
+    even share of the workers, and streamed into its own encoder; all of them
+    run at once, like the chunks of encode_chunks_parallel.
+    """
+    if num_threads is None:
+        num_threads = default_num_workers(backend)
+    if window is None:
+        window = num_threads * 2
+    window = max(1, window)
+    num_workers = max(1, num_threads // len(configs))
+    
+    total_frames = configs[0].frames_per_round * configs[0].total_rounds
+    frame_lists = [distinct_frame_numbers(config, range(total_frames)) if vfr else range(total_frames)
+                   for config in configs]
+    sizes = ', '.join(f"{config.geometry.frame_width}x{config.geometry.height}" for config in configs)
+    print(f"Streaming {total_frames} frames in {len(configs)} sizes ({sizes}) into concurrent encoders, "
+          f"{num_workers} {backend} workers each...")
+    
+    start_time = time.time()
+    frame_written = make_progress_reporter(sum(map(len, frame_lists)), start_time)
+    frame_backends = []
+    writers = []
+    try:
+        # Backends first: process workers forked after the encoders would hold their stdin open
+        frame_backends = [create_frame_backend(backend, config, num_workers, slots=window) for config in configs]
+        writers = [FFmpegFrameWriter(output_file, config.fps, config.geometry.frame_width, config.geometry.height,
+                                     audio_file=custom_audio, preset=preset, frame_times=frames if vfr else None)
+                   for config, output_file, frames in zip(configs, output_files, frame_lists)]
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(configs)) as variant_executor:
+            futures = [variant_executor.submit(encode_frame_range, config, frame_backend, writer, frames, window,
+                                               frame_written)
+                       for config, frame_backend, writer, frames in zip(configs, frame_backends, writers, frame_lists)]
+            try:
+                for future in futures:
+                    future.result()
+            except BaseException:
+                for writer in writers:
+                    writer.abort()
+                raise
+    except BaseException:
+        for frame_backend in frame_backends:
+            frame_backend.close(cancel=True)
+        for writer in writers:
+            writer.abort()
+        raise
+    for frame_backend in frame_backends:
+        frame_backend.close()
+    
+    print(f"Encoded {len(configs)} sizes in {time.time() - start_time:.2f}s")
+    for output_file in output_files:
+        print(f"Video created: {output_file}")
+
+def plan_chunks(config, num_chunks):
+    """Split the timeline into at most num_chunks frame ranges that start on round boundaries"""
+    rounds = config.total_rounds
+    num_chunks = max(1, min(num_chunks, rounds))
+    bounds = [i * rounds // num_chunks * config.frames_per_round for i in range(num_chunks + 1)]
+    return [range(start, end) for start, end in zip(bounds, bounds[1:])]
+
+def encode_chunks_parallel(config, output_file, num_chunks=None, num_threads=None, window=None,
+                           backend='thread', custom_audio=None, preset='medium', vfr=False):
+    """Render and encode round-aligned chunks concurrently, then join them without re-encoding
+    
+    Each chunk is streamed into its own ffmpeg process, so encoding no longer
+    runs as one serial pass behind rendering. Every chunk starts with a
+    keyframe, which lets the concat demuxer join them with stream copy; the
+    custom audio track is muxed in that same step. With vfr, every chunk is
+    encoded with a variable frame rate from its distinct frames.
+    """
+    if num_chunks is None:
+        num_chunks = mp.cpu_count()
+    if num_threads is None:
+        num_threads = default_num_workers(backend)
+    if window is None:
+        window = num_threads * 2
+    window = max(1, window)
+    
+    total_frames = config.frames_per_round * config.total_rounds
+    chunks = plan_chunks(config, num_chunks)
+    if vfr:
+        chunks = [distinct_frame_numbers(config, chunk) for chunk in chunks]
+        print(f"Variable frame rate: encoding {sum(map(len, chunks))} distinct frames of {total_frames}")
+    
+    chunk_dir = tempfile.mkdtemp(prefix='chunks_', dir=os.path.dirname(os.path.abspath(output_file)))
+    chunk_paths = [os.path.join(chunk_dir, f"chunk_{i:03d}.mp4") for i in range(len(chunks))]
+    
+    # Each chunk keeps its own window of frames in flight
+    frame_backend = create_frame_backend(backend, config, num_threads, slots=window * len(chunks))
+    print(f"Encoding {total_frames} frames as {len(chunks)} chunks using {frame_backend.num_workers} workers "
+          f"({frame_backend.name} backend, window: {window} frames per chunk)...")
+    
+    start_time = time.time()
+    frame_written = make_progress_reporter(sum(map(len, chunks)), start_time)
+    writers = []
+    try:
+        # A chunk's frame times count from its own first frame
+        writers = [FFmpegFrameWriter(path, config.fps, config.geometry.frame_width, config.geometry.height, preset=preset,
+                                     frame_times=[frame - chunk[0] for frame in chunk] if vfr else None)
+                   for path, chunk in zip(chunk_paths, chunks)]
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(chunks)) as chunk_executor:
+            futures = [chunk_executor.submit(encode_frame_range, config, frame_backend, writer, chunk, window,
+                                             frame_written)
+                       for writer, chunk in zip(writers, chunks)]
+            try:
+                reused_frames = sum(future.result() for future in futures) + total_frames - sum(map(len, chunks))
+            except BaseException:
+                # Stop the other chunks instead of letting them finish
+                for writer in writers:
+                    writer.abort()
+                raise
+        frame_backend.close()
+        
+        print(f"Reused {reused_frames} of {total_frames} frames that hold the previous frame")
+        report_backend_throughput(frame_backend, total_frames - reused_frames, total_frames,
+                                  time.time() - start_time)
+        
+        concat_chunks(chunk_paths, output_file, custom_audio)
+    except BaseException:
+        frame_backend.close(cancel=True)
+        for writer in writers:
+            writer.abort()
+        raise
+    finally:
+        shutil.rmtree(chunk_dir, ignore_errors=True)
+    
+    print(f"Video created: {output_file}")
+
+def concat_chunks(chunk_paths, output_file, custom_audio=None):
+    """Join encoded chunks with the concat demuxer in stream-copy mode, adding the audio track"""
+    list_path = os.path.join(os.path.dirname(chunk_paths[0]), "chunks.txt")
+    with open(list_path, 'w', encoding='utf-8') as f:
+        for path in chunk_paths:
+            escaped_path = os.path.abspath(path).replace("'", "'\\''")
+            f.write(f"file '{escaped_path}'\n")
+    
+    audio_inputs, audio_outputs = audio_mux_args(custom_audio)
+    print(f"Joining {len(chunk_paths)} chunks{' with custom audio' if audio_inputs else ''}...")
+    ffmpeg_cmd = [
+        "ffmpeg", "-y",
+        "-f", "concat", "-safe", "0", "-i", list_path,
+        *audio_inputs,
+        *audio_outputs,
+        "-c:v", "copy",
+        "-loglevel", "error",
+        output_file
+    ]
+    with trace.span('ffmpeg concat', 'ffmpeg', chunks=len(chunk_paths)):
+        subprocess.run(ffmpeg_cmd, check=True, stdout=subprocess.DEVNULL)
+
+FILTERGRAPH_CLIP_KINDS = ANIMATED_SPRITE_KINDS  # Animated sprites that the filtergraph plays as image-sequence clips
+
+def filtergraph_layers(config, frame_numbers):
+    """Group the display lists of a frame range into overlay layers for the filtergraph encoder
+    
+    Static sprites (title, round text and images) are one layer each; the
+    loading indicator and drawing reveal of a round form clip layers whose
+    sprite changes from frame to frame. Completed rounds are listed element by
+    element. Returns the layers in a paint order consistent with every
+    frame, each as a dict with its key and the (frame, sprite id, y) entries
+    it shows, in frame order; frames count from the start of the range.
+    """
+    layers = {}
+    must_follow = {}
+    for frame_num in frame_numbers:
+        # Frame 0 shows the thumbnail frame, as in encode_frame_range
+        source_frame = get_thumbnail_frame_number(config) if frame_num == 0 else frame_num
+        previous_key = None
+        for sprite_id, y in build_display_list(source_frame, config, history_strip=False):
+            kind = sprite_id.partition('_')[0]
+            if kind == 'loading':
+                key = f"{sprite_id.rsplit('_', 1)[0]}@{source_frame // config.frames_per_round}"
+            elif kind == 'drawing':
+                key = sprite_id.rsplit('_', 1)[0]
+            else:
+                key = sprite_id
+            if key not in layers:
+                layers[key] = {'key': key, 'clip': kind in FILTERGRAPH_CLIP_KINDS, 'entries': []}
+                must_follow[key] = set()
+            layers[key]['entries'].append((frame_num - frame_numbers.start, sprite_id, y))
+            if previous_key is not None:
+                must_follow[key].add(previous_key)
+            previous_key = key
+    
+    # Overlays are chained, so the layers need one order that respects every
+    # frame's paint order; ties keep the order of first appearance
+    order = []
+    placed = set()
+    remaining = list(layers)
+    while remaining:
+        ready = next((key for key in remaining if must_follow[key] <= placed), None)
+        if ready is None:
+            raise ValueError("Sprites are painted in conflicting orders; the part cannot be compiled to a filtergraph")
+        order.append(layers[ready])
+        placed.add(ready)
+        remaining.remove(ready)
+    return order
+
+def _frame_runs(frames):
+    """Contiguous (first, last) runs of a sorted list of frame numbers"""
+    runs = []
+    for frame in frames:
+        if runs and runs[-1][1] == frame - 1:
+            runs[-1][1] = frame
+        else:
+            runs.append([frame, frame])
+    return runs
+
+def _frame_time(frame, fps):
+    """Timestamp half a frame before `frame`, a boundary ffmpeg's t can be compared against without rounding trouble"""
+    return f"{(frame - 0.5) / fps:.6f}"
+
+def _piecewise_expression(steps, fps):
+    """ffmpeg expression of t that takes the value of the last (first frame, value) step at or before the frame
+    
+    The steps are split into a balanced tree of if(lt(t, ...)) tests, so each
+    evaluation costs a logarithmic number of comparisons. Frames are told
+    apart by timestamp because overlay's frame counter n can run ahead of
+    the main input.
+    """
+    if len(steps) == 1:
+        return str(steps[0][1])
+    middle = len(steps) // 2
+    return (f"if(lt(t\\,{_frame_time(steps[middle][0], fps)})\\,{_piecewise_expression(steps[:middle], fps)}"
+            f"\\,{_piecewise_expression(steps[middle:], fps)})")
+
+def overlay_image(sprite_id, sprite):
+    """Sprite as an image ffmpeg's overlay blends like paste_sprite pastes it"""
+    if sprite_id.partition('_')[0] in COVERAGE_SPRITE_KINDS:
+        ink = [Image.new('L', sprite.size, channel) for channel in LINE_ART_INK]
+        return Image.merge('RGBA', (*ink, sprite))
+    return sprite if sprite.mode == 'RGBA' else sprite.convert('RGB')
+
+def _save_overlay_sprite(sprite_id, config, path):
+    overlay_image(sprite_id, resolve_sprite(sprite_id, config)).save(path)
+
+def _link_or_copy(source, destination):
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copyfile(source, destination)
+
+def compile_filtergraph(config, work_dir, frame_numbers):
+    """Compile a range of frames into ffmpeg inputs and a filtergraph script
+    
+    Every layer is overlaid on a blank background by one overlay filter,
+    chained in paint order. A static sprite is a single image input looped in
+    memory for the frames between its first and last appearance; a clip is
+    an image sequence with one image per frame, hard links standing in for
+    repeated sprites. Both run one frame past the last frame they are shown
+    on, since overlay passes the main input through on the frame at which
+    the overlay input ends. Inputs are shifted to start at their first
+    frame, the y position is a piecewise expression of the frame time t and
+    an enable window hides the layer on frames that do not show it. Sprites
+    are written as uncompressed TGA, which is much faster to save than PNG. Coverage masks
+    become RGBA images in the ink colour, which overlay blends with the same
+    rounding as PIL's paste.
+    
+    Writes the sprites and the script to work_dir and returns
+    (input arguments, script path, output label).
+    """
+    fps = config.fps
+    geometry = config.geometry
+    with trace.span('filtergraph layers', first_frame=frame_numbers.start):
+        layers = filtergraph_layers(config, frame_numbers)
+    
+    input_args = []
+    filters = [f"color=c=white:s={geometry.frame_width}x{geometry.height}:r={fps},format=rgb24,"
+               f"trim=end_frame={len(frame_numbers)}[bg]"]
+    previous_label = 'bg'
+    with trace.span('filtergraph sprites', layers=len(layers)):
+        for index, layer in enumerate(layers):
+            entries = layer['entries']
+            first_frame, last_frame = entries[0][0], entries[-1][0]
+            
+            if layer['clip']:
+                clip_dir = os.path.join(work_dir, f"clip_{index:04d}")
+                os.makedirs(clip_dir)
+                sprite_paths = {}
+                entry_iter = iter(entries)
+                next_entry = next(entry_iter)
+                sprite_id = next_entry[1]
+                for frame_num in range(first_frame, last_frame + 2):
+                    if next_entry is not None and next_entry[0] == frame_num:
+                        sprite_id = next_entry[1]
+                        next_entry = next(entry_iter, None)
+                    # Frames the layer is hidden on keep the previous sprite
+                    if sprite_id not in sprite_paths:
+                        sprite_paths[sprite_id] = os.path.join(clip_dir, f"sprite_{len(sprite_paths):04d}.tga")
+                        _save_overlay_sprite(sprite_id, config, sprite_paths[sprite_id])
+                    _link_or_copy(sprite_paths[sprite_id],
+                                  os.path.join(clip_dir, f"frame_{frame_num - first_frame:05d}.tga"))
+                input_args += ["-framerate", str(fps), "-start_number", "0",
+                               "-i", os.path.join(clip_dir, "frame_%05d.tga")]
+                source = f"[{index}:v]"
+            else:
+                sprite_path = os.path.join(work_dir, f"sprite_{index:04d}.tga")
+                _save_overlay_sprite(layer['key'], config, sprite_path)
+                input_args += ["-i", sprite_path]
+                source = f"[{index}:v]loop=loop={last_frame - first_frame + 1}:size=1:start=0,"
+            
+            y_steps = []
+            for frame_num, _, y in entries:
+                if not y_steps or y_steps[-1][1] != y:
+                    y_steps.append((frame_num, y))
+            enable = '+'.join(f"between(t\\,{_frame_time(first, fps)}\\,{_frame_time(last + 1, fps)})"
+                              for first, last in _frame_runs([entry[0] for entry in entries]))
+            
+            filters.append(f"{source}setpts=(N+{first_frame})/({fps}*TB)[s{index}]")
+            filters.append(f"[{previous_label}][s{index}]overlay=x={geometry.left}:y={_piecewise_expression(y_steps, fps)}:"
+                           f"eval=frame:eof_action=pass:format=rgb:enable={enable}[v{index}]")
+            previous_label = f"v{index}"
+    
+    filters.append(f"[{previous_label}]format=yuv420p[out]")
+    script_path = os.path.join(work_dir, "filtergraph.txt")
+    with open(script_path, 'w', encoding='utf-8') as f:
+        f.write(';\n'.join(filters) + '\n')
+    return input_args, script_path, '[out]'
+
+def encode_filtergraph_chunk(config, work_dir, frame_numbers, output_file, preset='medium'):
+    """Compile one frame range to a filtergraph and let ffmpeg render and encode it"""
+    os.makedirs(work_dir)
+    input_args, script_path, output_label = compile_filtergraph(config, work_dir, frame_numbers)
+    ffmpeg_cmd = [
+        "ffmpeg", "-y",
+        *input_args,
+        "-filter_complex_script", script_path,
+        "-map", output_label,
+        "-frames:v", str(len(frame_numbers)),
+        "-c:v", "libx264",
+        "-crf", "23",
+        "-preset", preset,
+        "-loglevel", "error",
+        output_file
+    ]
+    with trace.span('ffmpeg encode', 'ffmpeg', output=os.path.basename(output_file)):
+        subprocess.run(ffmpeg_cmd, check=True, stdout=subprocess.DEVNULL)
+
+def encode_filtergraph(config, output_file, num_jobs=None, custom_audio=None, preset='medium'):
+    """Render and encode the part with ffmpeg filtergraphs instead of compositing frames in Python
+    
+    Each round is compiled into its own filtergraph (see compile_filtergraph),
+    so nearly all per-frame work runs inside ffmpeg. ffmpeg decodes every
+    input of a graph up front, so a graph for the whole part would need
+    memory in proportion to its length; per-round graphs only hold the
+    sprites of one round. Up to num_jobs rounds are encoded at once and the
+    results are joined like encode_chunks_parallel's chunks.
+    """
+    if num_jobs is None:
+        num_jobs = mp.cpu_count()
+    
+    total_frames = config.frames_per_round * config.total_rounds
+    chunks = plan_chunks(config, config.total_rounds)
+    work_dir = tempfile.mkdtemp(prefix='filtergraph_', dir=os.path.dirname(os.path.abspath(output_file)))
+    chunk_paths = [os.path.join(work_dir, f"chunk_{i:03d}.mp4") for i in range(len(chunks))]
+    print(f"Rendering {total_frames} frames in ffmpeg as {len(chunks)} filtergraphs ({num_jobs} at a time)...")
+    
+    start_time = time.time()
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, num_jobs)) as executor:
+            futures = [executor.submit(encode_filtergraph_chunk, config, os.path.join(work_dir, f"graph_{i:03d}"),
+                                       chunk, path, preset)
+                       for i, (chunk, path) in enumerate(zip(chunks, chunk_paths))]
+            try:
+                for completed, future in enumerate(concurrent.futures.as_completed(futures), 1):
+                    future.result()
+                    print(f"Encoded {completed}/{len(chunks)} filtergraphs")
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+        
+        elapsed = time.time() - start_time
+        print(f"ffmpeg rendered and encoded {total_frames} frames in {elapsed:.2f}s "
+              f"({total_frames / elapsed if elapsed > 0 else 0:.1f} frames/sec)")
+        concat_chunks(chunk_paths, output_file, custom_audio)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    
+    print(f"Video created: {output_file}")
 
-def create_video(output_file="pictionary_chain.mp4", fps=30, custom_audio=None):
-    """Combine frames into a video using ffmpeg"""
+def create_video(output_file="pictionary_chain.mp4", fps=30, custom_audio=None, preset='medium'):
+    """Combine frames into a video using ffmpeg, muxing the custom audio in the same pass"""
     print("Creating video from frames...")
+    audio_inputs, audio_outputs = audio_mux_args(custom_audio)
     
     # Use the image2 demuxer approach (simpler and more reliable)
     ffmpeg_cmd = [
         "ffmpeg", "-y",
         "-framerate", str(fps),
         "-i", "temp_frames/frame_%05d.png",
+        *audio_inputs,
+        *audio_outputs,
         "-c:v", "libx264",
         "-pix_fmt", "yuv420p",
         "-crf", "23", 
-        "-preset", "medium",
+        "-preset", preset,
         "-loglevel", "error",  # Reduce log output
         output_file
     ]
     
     try:
-        subprocess.run(ffmpeg_cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        with trace.span('ffmpeg encode', 'ffmpeg', output=os.path.basename(output_file)):
+            subprocess.run(ffmpeg_cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
         print(f"Video created: {output_file}")
     except subprocess.CalledProcessError as e:
         print(f"Error creating video: {e}")
         raise
+
+AUDIO_SAMPLE_RATE = 44100
+AUDIO_CHANNELS = 2
+THINKING_VOLUME = 0.05  # The analyzing music is mixed far below the drawing music
+AUDIO_CACHE_VERSION = 1
+
+def audio_cues(num_rounds, fps, frames_per_round, initial_loading, text_phase, image_delay, drawing_phase):
+    """Music cues of the track as (start frame, frame count, 'thinking' or 'drawing')
     
-    # Add custom audio if present
-    if custom_audio and os.path.exists(custom_audio):
-        print(f"Adding custom audio from {custom_audio}...")
-        temp_video = output_file + ".tmp.mp4"
-        os.rename(output_file, temp_video)
-        
-        ffmpeg_audio_cmd = [
-            "ffmpeg", "-y",
-            "-i", temp_video,
-            "-i", custom_audio,
-            "-map", "0:v", 
-            "-map", "1:a",
-            "-c:v", "copy",
-            "-c:a", "aac",
-            "-shortest",
-            output_file
-        ]
-        subprocess.run(ffmpeg_audio_cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        print(f"Video with audio created: {output_file}")
-        
-        if os.path.exists(temp_video):
-            os.remove(temp_video)
-
-def create_audio_track(fps, rounds, initial_loading, text_phase, image_delay, drawing_phase, frames_per_round, thinking_file, drawing_file, output_audio):
-    """Create an audio track that alternates between thinking and drawing files"""
-    temp_dir = tempfile.mkdtemp()
-    segment_files = []
-    
-    for i, round_data in enumerate(rounds):
-        if i == 0:
-            # Round 0: word only, then generating, then drawing, then reveal
-            GENERATE_DELAY_FRAMES = int(frames_per_round * 0.18)
-            image_delay = int(frames_per_round * 0.18)
-            drawing_phase = int(frames_per_round * 0.4)
-            
-            # 1. Word only (no music)
-            if GENERATE_DELAY_FRAMES > 0:
-                silence1 = os.path.join(temp_dir, f"r0_silence1.wav")
-                subprocess.run(
-                    f'ffmpeg -y -f lavfi -i anullsrc=r=44100:cl=stereo -t {GENERATE_DELAY_FRAMES / fps} "{silence1}"',
-                    shell=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
-                )
-                segment_files.append(silence1)
-            
-            # 2. Generating (silence)
-            if image_delay > 0:
-                gen = os.path.join(temp_dir, f"r0_gen.wav")
-                subprocess.run(
-                    f'ffmpeg -y -f lavfi -i anullsrc=r=44100:cl=stereo -t {image_delay / fps} "{gen}"',
-                    shell=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
-                )
-                segment_files.append(gen)
-            
-            # 3. Drawing (drawing.mp3)
-            if drawing_phase > 0:
-                draw = os.path.join(temp_dir, f"r0_draw.wav")
-                subprocess.run(
-                    f'ffmpeg -y -t {drawing_phase / fps} -i "{drawing_file}" -af "apad=pad_dur={drawing_phase / fps}" -acodec pcm_s16le "{draw}"',
-                    shell=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
-                )
-                segment_files.append(draw)
-            
-            # 4. Reveal (rest, silence)
-            reveal_frames = frames_per_round - (GENERATE_DELAY_FRAMES + image_delay + drawing_phase)
-            if reveal_frames > 0:
-                silence2 = os.path.join(temp_dir, f"r0_silence2.wav")
-                subprocess.run(
-                    f'ffmpeg -y -f lavfi -i anullsrc=r=44100:cl=stereo -t {reveal_frames / fps} "{silence2}"',
-                    shell=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
-                )
-                segment_files.append(silence2)
-        else:
-            # Round 1+: analyzing, word, generating, drawing, reveal
-            initial_loading = int(frames_per_round * 0.18)
-            text_phase = int(frames_per_round * 0.26)
-            image_delay = int(frames_per_round * 0.18)
-            drawing_phase = int(frames_per_round * 0.4)
-            
-            # 1. Analyzing (thinking.flac)
-            if initial_loading > 0:
-                ana = os.path.join(temp_dir, f"r{i}_ana.wav")
-                subprocess.run(
-                    f'ffmpeg -y -t {initial_loading / fps} -i "{thinking_file}" -af "volume=0.05,apad=pad_dur={initial_loading / fps}" -acodec pcm_s16le "{ana}"',
-                    shell=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
-                )
-                segment_files.append(ana)
-            
-            # 2. Word only (silence)
-            if text_phase > 0:
-                silence1 = os.path.join(temp_dir, f"r{i}_silence1.wav")
-                subprocess.run(
-                    f'ffmpeg -y -f lavfi -i anullsrc=r=44100:cl=stereo -t {text_phase / fps} "{silence1}"',
-                    shell=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
-                )
-                segment_files.append(silence1)
-            
-            # 3. Generating (silence)
-            if image_delay > 0:
-                gen = os.path.join(temp_dir, f"r{i}_gen.wav")
-                subprocess.run(
-                    f'ffmpeg -y -f lavfi -i anullsrc=r=44100:cl=stereo -t {image_delay / fps} "{gen}"',
-                    shell=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
-                )
-                segment_files.append(gen)
-            
-            # 4. Drawing (drawing.mp3)
-            if drawing_phase > 0:
-                draw = os.path.join(temp_dir, f"r{i}_draw.wav")
-                subprocess.run(
-                    f'ffmpeg -y -t {drawing_phase / fps} -i "{drawing_file}" -af "apad=pad_dur={drawing_phase / fps}" -acodec pcm_s16le "{draw}"',
-                    shell=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
-                )
-                segment_files.append(draw)
-            
-            # 5. Reveal (rest, silence)
-            reveal_frames = frames_per_round - (initial_loading + text_phase + image_delay + drawing_phase)
-            if reveal_frames > 0:
-                silence2 = os.path.join(temp_dir, f"r{i}_silence2.wav")
-                subprocess.run(
-                    f'ffmpeg -y -f lavfi -i anullsrc=r=44100:cl=stereo -t {reveal_frames / fps} "{silence2}"',
-                    shell=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
-                )
-                segment_files.append(silence2)
-    
-    # Concatenate all segments
-    concat_file = os.path.join(temp_dir, "concat.txt")
-    with open(concat_file, "w") as f:
-        for seg in segment_files:
-            f.write(f"file '{seg}'\n")
-    
-    subprocess.run(
-        f'ffmpeg -y -f concat -safe 0 -i "{concat_file}" -c copy "{output_audio}"',
-        shell=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
-    )
+    The thinking music plays while the previous image is analyzed, and the
+    drawing music for as long as the drawing phase, starting
+    VISUAL_LEAD_FRAMES after the strokes start to appear. Everything else is
+    silence.
+    """
+    cues = []
+    for i in range(num_rounds):
+        round_start = i * frames_per_round
+        for name, start, end in round_phases(i, frames_per_round, initial_loading, text_phase, image_delay,
+                                             drawing_phase):
+            if name == 'analyzing':
+                cues.append((round_start + start, end - start, 'thinking'))
+            elif name == 'drawing':
+                cues.append((round_start + start + VISUAL_LEAD_FRAMES, end - start, 'drawing'))
+    return [cue for cue in cues if cue[1] > 0]
+
+def decode_audio(path, max_duration=None):
+    """Decode an audio file to interleaved int16 samples at AUDIO_SAMPLE_RATE with AUDIO_CHANNELS"""
+    ffmpeg_cmd = ["ffmpeg"]
+    if max_duration is not None:
+        ffmpeg_cmd += ["-t", str(max_duration)]
+    ffmpeg_cmd += [
+        "-i", path,
+        "-f", "s16le",
+        "-acodec", "pcm_s16le",
+        "-ac", str(AUDIO_CHANNELS),
+        "-ar", str(AUDIO_SAMPLE_RATE),
+        "-loglevel", "error",
+        "-"
+    ]
+    with trace.span('ffmpeg decode', 'ffmpeg', source=os.path.basename(path)):
+        result = subprocess.run(ffmpeg_cmd, check=True, stdout=subprocess.PIPE)
+    return np.frombuffer(result.stdout, dtype='<i2').reshape(-1, AUDIO_CHANNELS)
+
+def _file_digest(path):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def write_wav(path, samples):
+    """Write int16 samples as a PCM WAV file, atomically"""
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with wave.open(temp_path, 'wb') as wav:
+        wav.setnchannels(AUDIO_CHANNELS)
+        wav.setsampwidth(2)
+        wav.setframerate(AUDIO_SAMPLE_RATE)
+        wav.writeframes(samples.astype('<i2').tobytes())
+    os.replace(temp_path, path)
+
+def synthesize_audio_track(cues, total_frames, fps, sources):
+    """Mix the music cues into one silent track of total_frames frames
+    
+    `sources` maps cue names to decoded samples. Every cue starts at the
+    sample of its first frame, so the track stays in sync with the video
+    however long it runs.
+    """
+    def frame_sample(frame):
+        return round(frame * AUDIO_SAMPLE_RATE / fps)
+    
+    track = np.zeros((frame_sample(total_frames), AUDIO_CHANNELS), dtype=np.int16)
+    for start_frame, frame_count, name in cues:
+        start = frame_sample(start_frame)
+        end = min(frame_sample(start_frame + frame_count), len(track))
+        clip = sources[name][:max(0, end - start)]
+        if name == 'thinking':
+            clip = np.clip(np.rint(clip * THINKING_VOLUME), -32768, 32767).astype(np.int16)
+        track[start:start + len(clip)] = clip
+    return track
+
+def create_audio_track(fps, rounds, initial_loading, text_phase, image_delay, drawing_phase, frames_per_round,
+                       thinking_file, drawing_file, output_audio, cache_dir=None):
+    """Create an audio track that alternates between thinking and drawing files
+    
+    Both music files are decoded once and the track is assembled in memory.
+    With cache_dir set, the finished track is kept on disk, keyed by the
+    round count, timing and source file contents, and reused by later parts.
+    """
+    cues = audio_cues(len(rounds), fps, frames_per_round, initial_loading, text_phase, image_delay, drawing_phase)
+    total_frames = len(rounds) * frames_per_round
+    
+    cache_path = None
+    if cache_dir:
+        fingerprint = repr((AUDIO_CACHE_VERSION, AUDIO_SAMPLE_RATE, AUDIO_CHANNELS, THINKING_VOLUME, fps,
+                            total_frames, cues, _file_digest(thinking_file), _file_digest(drawing_file)))
+        digest = hashlib.sha1(fingerprint.encode('utf-8')).hexdigest()
+        cache_path = os.path.join(cache_dir, 'audio', f"track_{digest}.wav")
+        if os.path.exists(cache_path):
+            shutil.copyfile(cache_path, output_audio)
+            print(f"Reused cached audio track {cache_path}")
+            return
+    
+    # Decode only as much of each file as the longest cue that plays it
+    sources = {}
+    for name, path in (('thinking', thinking_file), ('drawing', drawing_file)):
+        longest = max((frame_count for _, frame_count, cue_name in cues if cue_name == name), default=0)
+        sources[name] = decode_audio(path, max_duration=(longest + 1) / fps) if longest else None
+    
+    with trace.span('audio synthesis', cues=len(cues)):
+        track = synthesize_audio_track(cues, total_frames, fps, sources)
+        write_wav(output_audio, track)
     
-    shutil.rmtree(temp_dir)
+    if cache_path:
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            shutil.copyfile(output_audio, f"{cache_path}.{os.getpid()}.tmp")
+            os.replace(f"{cache_path}.{os.getpid()}.tmp", cache_path)
+        except OSError as e:
+            print(f"Warning: could not write audio cache file {cache_path}: {e}")
 
 def cleanup():
     """Clean up temporary files"""
@@ -1059,6 +2863,16 @@ def read_game_log(game_dir):
     
     return rounds_data
 
+def frame_size(text):
+    """argparse type for a WIDTHxHEIGHT frame size"""
+    try:
+        width, height = (int(value) for value in text.lower().split('x'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected WIDTHxHEIGHT, got {text!r}")
+    if width <= 0 or height <= 0:
+        raise argparse.ArgumentTypeError(f"frame size must be positive, got {text!r}")
+    return width, height
+
 def main():
     """Main function to orchestrate the parallel video generation"""
     # Parse command line arguments
@@ -1067,8 +2881,8 @@ def main():
                         help='Directory containing the game log files')
     parser.add_argument('--duration', '-d', type=float, default=DEFAULT_DURATION,
                         help=f'Duration for each round in seconds (default: {DEFAULT_DURATION})')
-    parser.add_argument('--fps', '-f', type=int, default=DEFAULT_FPS,
-                        help=f'Frames per second (default: {DEFAULT_FPS})')
+    parser.add_argument('--fps', '-f', type=int, default=None,
+                        help=f'Frames per second (default: {DEFAULT_FPS}, or {DRAFT_FPS} with --draft)')
     parser.add_argument('--output', '-o', type=str, default=None,
                         help='Output video filename (default: auto-generated with timestamp)')
     parser.add_argument('--font', type=str, default=None,
@@ -1078,17 +2892,82 @@ def main():
     parser.add_argument('--part', type=int, default=None,
                         help='Part number to display in the title (e.g., 1 for Part 1)')
     parser.add_argument('--processes', '-p', type=int, default=None,
-                        help='Number of parallel processes to use (default: min(12, cpu_count()))')
+                        help='Number of parallel workers to use (default: 2 x cpu_count() threads or cpu_count() processes)')
+    parser.add_argument('--cache-dir', type=str, default=DEFAULT_CACHE_DIR,
+                        help=f'Directory for render caches reused across runs (default: {DEFAULT_CACHE_DIR})')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Do not read or write the on-disk render caches')
+    parser.add_argument('--encode-mode', choices=['stream', 'chunked', 'filtergraph', 'png'], default='stream',
+                        help='stream: pipe raw frames straight into ffmpeg; chunked: encode round-aligned chunks '
+                             'concurrently and join them; filtergraph: compile each round into an ffmpeg '
+                             'filtergraph that composites the sprites itself; png: write temp_frames/*.png first '
+                             '(default: stream)')
+    parser.add_argument('--chunks', type=int, default=None,
+                        help='Number of chunks for --encode-mode chunked (default: cpu_count(), at most one per round)')
+    parser.add_argument('--stream-window', type=int, default=None,
+                        help='Maximum number of frames in flight while streaming (default: 2 x workers)')
+    parser.add_argument('--backend', choices=sorted(FRAME_BACKENDS), default='thread',
+                        help='thread: composite on a thread pool; process: composite in worker processes '
+                             'that share the preprocessed elements through shared memory (default: thread)')
+    parser.add_argument('--reveal', choices=REVEAL_MODES, default='pixel',
+                        help='pixel: the drawing animation reveals every dark pixel of the round image; pen: it '
+                             'draws simplified stroke skeletons at the stroke width, like a pen (default: pixel)')
+    parser.add_argument('--vfr', action='store_true',
+                        help='Variable frame rate output for --encode-mode stream and chunked: each distinct frame '
+                             'is encoded once and held until the next, instead of repeating held frames')
+    parser.add_argument('--variants', type=frame_size, nargs='+', default=None, metavar='WxH',
+                        help=f'Render the part once and encode it in several full-size frame sizes at once, e.g. '
+                             f'1080x1920 1080x1080 1920x1080, written as <output>_WxH.mp4. Frames at least '
+                             f'{VIDEO_WIDTH}px wide keep the {VIDEO_WIDTH}px layout column centred (--encode-mode stream)')
+    parser.add_argument('--draft', action='store_true',
+                        help=f'Quick QA preview: render at {DRAFT_SCALE:g}x resolution and {DRAFT_FPS} fps and encode '
+                             f'with the {DRAFT_PRESET} preset')
+    parser.add_argument('--thumbnail', type=str, default=None,
+                        help='Where to write the thumbnail PNG (default: <output>_thumbnail.png next to the video)')
+    parser.add_argument('--thumbnail-only', action='store_true',
+                        help='Only write the thumbnail; no frames are rendered and no video is encoded')
+    parser.add_argument('--trace', action='store_true',
+                        help='Record stage and per-frame spans and write them next to the video as '
+                             '<output>.trace.json (Chrome/Perfetto trace format)')
     
     args = parser.parse_args()
+    if args.vfr and args.encode_mode not in ('stream', 'chunked'):
+        parser.error(f"--vfr needs --encode-mode stream or chunked, not {args.encode_mode}")
+    if args.variants:
+        if args.encode_mode != 'stream':
+            parser.error("--variants needs --encode-mode stream")
+        narrow = [f"{width}x{height}" for width, height in args.variants if width < VIDEO_WIDTH]
+        if narrow:
+            parser.error(f"--variants frames must be at least {VIDEO_WIDTH}px wide: {', '.join(narrow)}")
+    
+    if args.fps is None:
+        args.fps = DRAFT_FPS if args.draft else DEFAULT_FPS
+    geometry = FrameGeometry.scaled(DRAFT_SCALE) if args.draft else FrameGeometry()
+    variant_geometries = [geometry.variant(width, height) for width, height in args.variants or []]
+    if variant_geometries:
+        geometry = variant_geometries[0]
+    preset = DRAFT_PRESET if args.draft else 'medium'
     
     # Generate a unique filename with timestamp if not specified
     if args.output is None:
         timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        output_filename = f"pictionary_chain_{timestamp}.mp4"
+        output_filename = f"pictionary_chain_{timestamp}{'_draft' if args.draft else ''}.mp4"
         output_path = os.path.join(args.game_dir, output_filename)
     else:
         output_path = os.path.join(args.game_dir, args.output)
+    if args.variants:
+        output_paths = [f"{os.path.splitext(output_path)[0]}_{width}x{height}.mp4" for width, height in args.variants]
+    else:
+        output_paths = [output_path]
+    thumbnail_paths = [os.path.splitext(path)[0] + '_thumbnail.png' for path in output_paths]
+    if args.thumbnail:
+        thumbnail_paths[0] = args.thumbnail
+    
+    if args.trace:
+        trace.enable()
+    
+    # Resolve system fonts through the persisted index in the cache directory
+    set_font_index_path(None if args.no_cache else os.path.join(args.cache_dir, 'font_index.json'))
     
     # Set font path if provided
     font_path = None
@@ -1114,9 +2993,6 @@ def main():
     if args.max_rounds is not None:
         all_rounds = all_rounds[:args.max_rounds]
     
-    total_rounds = len(all_rounds)
-    print(f"Creating animation with {total_rounds} rounds")
-    
     # Calculate timing parameters
     frames_per_round = int(args.duration * args.fps)
     initial_loading = int(frames_per_round * 0.18)
@@ -1125,80 +3001,152 @@ def main():
     drawing_phase = int(frames_per_round * 0.4)
     title_duration_frames = int(3 * args.fps)
     
-    # Create configuration object
-    config = FrameGenerationConfig(
-        all_rounds=all_rounds,
-        total_rounds=total_rounds,
-        duration=args.duration,
-        fps=args.fps,
-        font_path=font_path,
-        frames_per_round=frames_per_round,
-        initial_loading=initial_loading,
-        text_phase=text_phase,
-        image_delay=image_delay,
-        drawing_phase=drawing_phase,
-        title_duration_frames=title_duration_frames,
-        part_number=args.part
-    )
+    if args.thumbnail_only:
+        # A frame only depends on the rounds up to the one playing, so later
+        # rounds are not even preprocessed
+        thumbnail_frame = max(0, title_duration_frames - 1)
+        all_rounds = all_rounds[:thumbnail_frame // frames_per_round + 1]
     
-    # Generate custom audio track if music files are present
-    custom_audio = None
-    if os.path.exists("thinking.flac") and os.path.exists("drawing.mp3"):
-        custom_audio = os.path.join(args.game_dir, "custom_audio.wav")
-        print("Creating custom audio track...")
-        create_audio_track(
+    total_rounds = len(all_rounds)
+    if args.thumbnail_only:
+        print(f"Creating thumbnail from {total_rounds} rounds")
+    else:
+        print(f"Creating animation with {total_rounds} rounds")
+    if args.draft:
+        print(f"Draft mode: {geometry.frame_width}x{geometry.height} at {args.fps} fps, {preset} preset")
+    
+    # Create configuration object
+    with trace.span('config'):
+        config = FrameGenerationConfig(
+            all_rounds=all_rounds,
+            total_rounds=total_rounds,
+            duration=args.duration,
             fps=args.fps,
-            rounds=all_rounds,
+            font_path=font_path,
+            frames_per_round=frames_per_round,
             initial_loading=initial_loading,
             text_phase=text_phase,
             image_delay=image_delay,
             drawing_phase=drawing_phase,
-            frames_per_round=frames_per_round,
-            thinking_file="thinking.flac",
-            drawing_file="drawing.mp3",
-            output_audio=custom_audio
+            title_duration_frames=title_duration_frames,
+            part_number=args.part,
+            cache_dir=None if args.no_cache else args.cache_dir,
+            geometry=geometry,
+            reveal=args.reveal
         )
     
+    # Other frame sizes are views of the same config: only their layout is recomputed
+    configs = [config] + [config.variant(variant_geometry) for variant_geometry in variant_geometries[1:]]
+    
+    for variant_config, thumbnail_path in zip(configs, thumbnail_paths):
+        export_thumbnail(variant_config, thumbnail_path)
+    if args.thumbnail_only:
+        if args.trace:
+            write_trace(output_path)
+        return
+    
+    # Generate custom audio track if music files are present
+    custom_audio = None
+    if os.path.exists("thinking.flac") and os.path.exists("drawing.mp3"):
+        custom_audio = os.path.join(args.game_dir, "custom_audio.wav")
+        print("Creating custom audio track...")
+        with trace.span('audio track'):
+            create_audio_track(
+                fps=args.fps,
+                rounds=all_rounds,
+                initial_loading=initial_loading,
+                text_phase=text_phase,
+                image_delay=image_delay,
+                drawing_phase=drawing_phase,
+                frames_per_round=frames_per_round,
+                thinking_file="thinking.flac",
+                drawing_file="drawing.mp3",
+                output_audio=custom_audio,
+                cache_dir=None if args.no_cache else args.cache_dir
+            )
+    
     # Generate frames in parallel
     print("Starting parallel frame generation...")
     start_time = time.time()
-
-    # Generate all frames normally (including frame 0 as title frame)
-    generate_frames_parallel(config, num_processes=args.processes)
-
-    # --- THUMBNAIL EXTRACTION AND FRAME 0 REPLACEMENT ---
-    # After generating all frames, extract the thumbnail and replace frame 0
-    print("Replacing first frame with thumbnail...")
-
-    # The title is shown for the first N frames (title_duration_frames)
-    # We'll use the last title frame as the thumbnail
-    last_title_frame_num = config.title_duration_frames - 1
-    last_title_frame_path = f"temp_frames/frame_{last_title_frame_num:05d}.png"
-    if os.path.exists(last_title_frame_path):
-        # Replace frame 0 with the thumbnail frame
-        shutil.copyfile(last_title_frame_path, "temp_frames/frame_00000.png")
-        print("Frame 0 replaced with thumbnail")
-    else:
-        print(f"Warning: Could not find title frame for thumbnail at {last_title_frame_path}")
-    # --- END THUMBNAIL EXTRACTION ---
-    
-    generation_time = time.time() - start_time
-    print(f"Frame generation completed in {generation_time:.2f} seconds")
     
-    # Create video
-    create_video(output_path, fps=args.fps, custom_audio=custom_audio)
-    
-    # Cleanup
-    cleanup()
+    if len(configs) > 1:
+        # Every size is streamed into its own encoder at the same time
+        stream_variants_to_ffmpeg(configs, output_paths, num_threads=args.processes, window=args.stream_window,
+                                  backend=args.backend, custom_audio=custom_audio, preset=preset, vfr=args.vfr)
+        
+        generation_time = time.time() - start_time
+        print(f"Frame generation and encoding completed in {generation_time:.2f} seconds")
+    elif args.encode_mode == 'stream':
+        # Frames go straight from the renderer into ffmpeg; frame 0 is rendered
+        # as the thumbnail frame on the fly, so no temp files are needed
+        stream_frames_to_ffmpeg(config, output_paths[0], num_threads=args.processes, window=args.stream_window,
+                                backend=args.backend, custom_audio=custom_audio, preset=preset, vfr=args.vfr)
+        
+        generation_time = time.time() - start_time
+        print(f"Frame generation and encoding completed in {generation_time:.2f} seconds")
+    elif args.encode_mode == 'chunked':
+        # Chunks are encoded concurrently and joined with stream copy; the
+        # audio track is added while joining
+        encode_chunks_parallel(config, output_paths[0], num_chunks=args.chunks, num_threads=args.processes,
+                               window=args.stream_window, backend=args.backend, custom_audio=custom_audio,
+                               preset=preset, vfr=args.vfr)
+        
+        generation_time = time.time() - start_time
+        print(f"Frame generation and encoding completed in {generation_time:.2f} seconds")
+    elif args.encode_mode == 'filtergraph':
+        # ffmpeg composites the sprites itself; --processes rounds are encoded at once
+        encode_filtergraph(config, output_paths[0], num_jobs=args.processes, custom_audio=custom_audio, preset=preset)
+        
+        generation_time = time.time() - start_time
+        print(f"Frame generation and encoding completed in {generation_time:.2f} seconds")
+    else:
+        # Generate all frames normally (including frame 0 as title frame)
+        generate_frames_parallel(config, num_processes=args.processes, backend=args.backend)
+        
+        # --- THUMBNAIL EXTRACTION AND FRAME 0 REPLACEMENT ---
+        # After generating all frames, extract the thumbnail and replace frame 0
+        print("Replacing first frame with thumbnail...")
+        
+        # The title is shown for the first N frames (title_duration_frames)
+        # We'll use the last title frame as the thumbnail
+        last_title_frame_num = get_thumbnail_frame_number(config)
+        last_title_frame_path = f"temp_frames/frame_{last_title_frame_num:05d}.png"
+        if os.path.exists(last_title_frame_path):
+            # Replace frame 0 with the thumbnail frame
+            shutil.copyfile(last_title_frame_path, "temp_frames/frame_00000.png")
+            print("Frame 0 replaced with thumbnail")
+        else:
+            print(f"Warning: Could not find title frame for thumbnail at {last_title_frame_path}")
+        # --- END THUMBNAIL EXTRACTION ---
+        
+        generation_time = time.time() - start_time
+        print(f"Frame generation completed in {generation_time:.2f} seconds")
+        
+        # Create video
+        create_video(output_paths[0], fps=args.fps, custom_audio=custom_audio, preset=preset)
+        
+        # Cleanup
+        cleanup()
     
     total_time = time.time() - start_time
     print(f"Process completed successfully in {total_time:.2f} seconds!")
-    print(f"Video saved as: {output_path}")
+    print(f"Video saved as: {', '.join(output_paths)}")
     
     # Performance summary
-    total_frames = frames_per_round * total_rounds
+    total_frames = frames_per_round * total_rounds * len(configs)
     avg_fps = total_frames / generation_time if generation_time > 0 else 0
     print(f"Performance: {avg_fps:.1f} frames/second average generation speed")
+    
+    if args.trace:
+        write_trace(output_path)
+
+def write_trace(output_path):
+    """Write the recorded trace next to the output video and print the hot-path counters"""
+    trace_path = os.path.splitext(output_path)[0] + '.trace.json'
+    counters = trace.write(trace_path)
+    print(f"Trace written to {trace_path}")
+    for name, amount in sorted(counters.items()):
+        print(f"  {name}: {amount}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
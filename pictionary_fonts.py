@@ -0,0 +1,224 @@
+"""
+Font resolution and caching for the Pictionary video generator.
+
+System fonts are looked up once and the result is persisted as a small JSON
+index, so later runs skip the directory walk and test loads. FreeType font
+objects and their glyph metrics are memoized per (path, size) and shared by
+every thread of the process; after a fork each child starts with its own
+empty cache.
+"""
+
+import json
+import math
+import os
+import sys
+import threading
+
+from PIL import ImageFont
+
+BOLD_FONT_NAMES = [
+    "Arialbd.ttf", "arialbd.ttf", "Arial Bold.ttf", "DejaVuSans-Bold.ttf",
+    "Verdana Bold.ttf", "Tahoma Bold.ttf", "SegoeUIBold.ttf", "segoeuib.ttf",
+    "Calibri Bold.ttf", "calibrib.ttf"
+]
+REGULAR_FONT_NAMES = [
+    "Arial.ttf", "DejaVuSans.ttf", "FreeSans.ttf", "LiberationSans-Regular.ttf",
+    "Helvetica.ttf", "Verdana.ttf", "Tahoma.ttf", "Segoe UI.ttf"
+]
+INDEX_VERSION = 2
+
+FONT_INDEX_PATH = os.path.join(
+    os.environ.get('PICTIONARY_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'ai_pictionary')),
+    'font_index.json'
+)
+
+_lock = threading.Lock()
+_default_fonts = {}
+_glyph_metrics = {}
+_fonts = {}
+
+
+def _reset_after_fork():
+    """Give a forked child its own lock and font objects"""
+    global _lock
+    _lock = threading.Lock()
+    _fonts.clear()
+    _glyph_metrics.clear()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def set_font_index_path(path):
+    """Change where the font index is persisted (None disables persistence)"""
+    global FONT_INDEX_PATH
+    with _lock:
+        FONT_INDEX_PATH = path
+        _default_fonts.clear()
+
+
+def get_font_dirs():
+    """Common font directories for this platform"""
+    if sys.platform.startswith('win'):
+        return [os.path.join(os.environ.get('WINDIR', 'C:\\Windows'), 'Fonts')]
+    elif sys.platform.startswith('darwin'):  # macOS
+        return ['/Library/Fonts', '/System/Library/Fonts', os.path.expanduser('~/Library/Fonts')]
+    else:  # Linux and others
+        return ['/usr/share/fonts', '/usr/local/share/fonts', os.path.expanduser('~/.fonts')]
+
+
+def _dir_mtimes(font_dirs):
+    return {font_dir: os.path.getmtime(font_dir) for font_dir in font_dirs if os.path.exists(font_dir)}
+
+
+def _resolve(font_names, font_dirs):
+    """First loadable font from the candidate list, searching each font directory in turn"""
+    for font_dir in font_dirs:
+        if not os.path.exists(font_dir):
+            continue
+        found = {}
+        for root, _, files in os.walk(font_dir):
+            for file in files:
+                found.setdefault(file, os.path.join(root, file))
+        for font_name in font_names:
+            font_path = found.get(font_name)
+            if font_path:
+                try:
+                    ImageFont.truetype(font_path, 20)
+                    return font_path
+                except Exception:
+                    continue
+    return None
+
+
+def _load_index(font_dirs):
+    """Persisted index, if it was built for the same font directories and is still valid
+
+    Only the top-level directory mtimes are compared, which cannot tell that
+    a font was installed into a subdirectory. The index therefore only holds
+    fonts that were found; a kind without an entry is looked up again.
+    """
+    if not FONT_INDEX_PATH or not os.path.exists(FONT_INDEX_PATH):
+        return None
+    try:
+        with open(FONT_INDEX_PATH, 'r') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if index.get('version') != INDEX_VERSION or index.get('dirs') != _dir_mtimes(font_dirs):
+        return None
+    fonts = index.get('fonts', {})
+    if set(fonts) != {'bold', 'regular'} or not all(path and os.path.exists(path) for path in fonts.values()):
+        return None
+    return fonts
+
+
+def _save_index(font_dirs, fonts):
+    if not FONT_INDEX_PATH:
+        return
+    index = {'version': INDEX_VERSION, 'dirs': _dir_mtimes(font_dirs),
+             'fonts': {key: path for key, path in fonts.items() if path}}
+    try:
+        os.makedirs(os.path.dirname(FONT_INDEX_PATH), exist_ok=True)
+        temp_path = f"{FONT_INDEX_PATH}.{os.getpid()}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(index, f, indent=2)
+        os.replace(temp_path, FONT_INDEX_PATH)
+    except OSError as e:
+        print(f"Warning: could not write font index {FONT_INDEX_PATH}: {e}")
+
+
+def get_default_font(bold=False):
+    """Find a default system font that's available"""
+    key = 'bold' if bold else 'regular'
+    with _lock:
+        if key not in _default_fonts:
+            font_dirs = get_font_dirs()
+            fonts = _load_index(font_dirs)
+            if fonts is None:
+                fonts = {
+                    'bold': _resolve(BOLD_FONT_NAMES, font_dirs),
+                    'regular': _resolve(REGULAR_FONT_NAMES, font_dirs)
+                }
+                _save_index(font_dirs, fonts)
+            _default_fonts.update(fonts)
+        return _default_fonts.get(key)
+
+
+def get_font(font_path, size):
+    """Shared FreeTypeFont for (path, size), falling back to PIL's default font"""
+    key = (font_path, size)
+    font = _fonts.get(key)
+    if font is None:
+        with _lock:
+            font = _fonts.get(key)
+            if font is None:
+                try:
+                    font = ImageFont.truetype(font_path, size) if font_path else ImageFont.load_default()
+                except Exception:
+                    font = ImageFont.load_default()
+                _fonts[key] = font
+    return font
+
+
+class GlyphMetrics:
+    """Cached glyph advances, ink extents and pair kerning for one font
+
+    Line widths are assembled from these instead of calling textbbox on every
+    candidate line. A measured run of text is a span tuple
+    (pen x, ink left, ink right, last character), which can be extended one
+    word at a time while wrapping.
+    """
+    EMPTY_SPAN = (0.0, 0.0, 0.0, None)
+
+    def __init__(self, font):
+        self.font = font
+        self._glyphs = {}
+        self._kerning = {}
+
+    def _glyph(self, char):
+        glyph = self._glyphs.get(char)
+        if glyph is None:
+            x0, _, x1, _ = self.font.getbbox(char)
+            glyph = (self.font.getlength(char), x0, x1)
+            self._glyphs[char] = glyph
+        return glyph
+
+    def _kern(self, left, right):
+        pair = left + right
+        kerning = self._kerning.get(pair)
+        if kerning is None:
+            kerning = self.font.getlength(pair) - self._glyph(left)[0] - self._glyph(right)[0]
+            self._kerning[pair] = kerning
+        return kerning
+
+    def extend(self, span, text):
+        """Measure text appended to an existing span and return the new span"""
+        pen, left, right, last = span
+        for char in text:
+            if last is not None:
+                pen += self._kern(last, char)
+            advance, x0, x1 = self._glyph(char)
+            left = min(left, pen + x0)
+            right = max(right, pen + x1)
+            pen += advance
+            last = char
+        return pen, left, right, last
+
+    def width(self, span):
+        """Pixel width of a span, rounded the way textbbox rounds it"""
+        return math.floor(span[2] - span[1] + 0.5)
+
+    def text_width(self, text):
+        """Same value as the width of draw.textbbox((0, 0), text)"""
+        return self.width(self.extend(self.EMPTY_SPAN, text))
+
+
+def get_glyph_metrics(font_path, size):
+    """Shared GlyphMetrics for the font returned by get_font(font_path, size)"""
+    key = (font_path, size)
+    metrics = _glyph_metrics.get(key)
+    if metrics is None:
+        metrics = _glyph_metrics.setdefault(key, GlyphMetrics(get_font(font_path, size)))
+    return metrics
@@ -0,0 +1,30 @@
+"""
+Importable handle on pictionary-python-generator.py for the tests and the benchmark.
+
+The generator script's file name is not a valid module name, so it is loaded
+from its path. The module is registered in sys.modules before it runs, like a
+regular import: pickle looks functions up there by module name when frames
+are sent to process backend workers, and every caller shares one copy.
+"""
+
+import importlib.util
+import os
+import sys
+
+GENERATOR_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pictionary-python-generator.py')
+MODULE_NAME = 'pictionary_python_generator'
+
+
+def load_generator():
+    """Import pictionary-python-generator.py, or return the already imported module"""
+    module = sys.modules.get(MODULE_NAME)
+    if module is None:
+        spec = importlib.util.spec_from_file_location(MODULE_NAME, GENERATOR_PATH)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[spec.name] = module
+        try:
+            spec.loader.exec_module(module)
+        except BaseException:
+            del sys.modules[spec.name]
+            raise
+    return module
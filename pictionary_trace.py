@@ -0,0 +1,181 @@
+"""
+Opt-in stage tracing for the Pictionary video generator.
+
+Nothing is recorded until enable() is called; until then span() hands back a
+shared no-op context manager and count() returns immediately. Once enabled,
+spans are kept as Chrome trace "complete" events with process and thread ids,
+and calls to the PIL hot paths (textbbox, font loads, Image.open) are counted.
+write() saves everything as a JSON file that chrome://tracing and Perfetto
+open directly.
+
+Worker processes record into their own copy of this module; drain() hands
+their events back so the main process can merge() them.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+from functools import wraps
+
+from PIL import Image, ImageDraw, ImageFont
+
+_enabled = False
+_events = []
+_counters = {}
+_thread_names = {}
+_lock = threading.Lock()
+_NO_SPAN = nullcontext()
+
+
+def _reset_after_fork():
+    """Give a forked child its own lock; it keeps recording if the parent was"""
+    global _lock
+    _lock = threading.Lock()
+    _events.clear()
+    _counters.clear()
+    _thread_names.clear()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def now():
+    """Trace timestamp in microseconds (a monotonic clock shared by all processes)"""
+    return time.perf_counter_ns() / 1000
+
+
+def enable():
+    """Start recording spans and counting PIL hot-path calls"""
+    global _enabled
+    if not _enabled:
+        _enabled = True
+        _instrument_pil()
+
+
+def is_enabled():
+    return _enabled
+
+
+class _Span:
+    __slots__ = ('name', 'category', 'args', 'start')
+
+    def __init__(self, name, category, args):
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self):
+        self.start = now()
+        return self
+
+    def __exit__(self, *exc_info):
+        complete(self.name, self.start, self.category, **self.args)
+        return False
+
+
+def span(name, category='stage', **args):
+    """Context manager that records a span around its block"""
+    if not _enabled:
+        return _NO_SPAN
+    return _Span(name, category, args)
+
+
+def complete(name, start, category='stage', **args):
+    """Record a span that began at `start` (from now()) and ends now"""
+    if not _enabled:
+        return
+    thread = threading.current_thread()
+    tid = threading.get_ident()
+    end = now()
+    event = {'name': name, 'cat': category, 'ph': 'X', 'ts': start, 'dur': end - start,
+             'pid': os.getpid(), 'tid': tid}
+    if args:
+        event['args'] = args
+    with _lock:
+        _events.append(event)
+        _thread_names.setdefault((os.getpid(), tid), thread.name)
+
+
+def count(name, amount=1):
+    """Add to a named hot-path counter"""
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+
+def drain():
+    """Take everything recorded so far in this process (for shipping to the main process)"""
+    if not _enabled:
+        return None
+    with _lock:
+        recorded = (list(_events), dict(_counters), list(_thread_names.items()))
+        _events.clear()
+        _counters.clear()
+        _thread_names.clear()
+    return recorded
+
+
+def merge(recorded):
+    """Add events drained in another process"""
+    if not recorded:
+        return
+    events, counters, thread_names = recorded
+    with _lock:
+        _events.extend(events)
+        for name, amount in counters.items():
+            _counters[name] = _counters.get(name, 0) + amount
+        for key, name in thread_names:
+            _thread_names.setdefault(tuple(key), name)
+
+
+def write(path):
+    """Write the trace as Chrome trace event JSON and return the counters"""
+    with _lock:
+        events = list(_events)
+        counters = dict(_counters)
+        thread_names = dict(_thread_names)
+
+    main_pid = os.getpid()
+    metadata = []
+    for pid in sorted({pid for pid, _ in thread_names}):
+        process_name = 'main' if pid == main_pid else f'worker {pid}'
+        metadata.append({'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': 0, 'args': {'name': process_name}})
+    for (pid, tid), name in thread_names.items():
+        metadata.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}})
+    if counters:
+        end = max((event['ts'] + event['dur'] for event in events), default=now())
+        metadata.append({'name': 'hot path calls', 'ph': 'C', 'ts': end, 'pid': main_pid, 'tid': 0,
+                         'args': counters})
+
+    with open(path, 'w') as f:
+        json.dump({'traceEvents': metadata + events, 'displayTimeUnit': 'ms',
+                   'otherData': {'counters': counters}}, f)
+    return counters
+
+
+def _counted(name, function):
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        count(name)
+        return function(*args, **kwargs)
+    wrapper._pictionary_trace_counted = True
+    return wrapper
+
+
+def _instrument_pil():
+    """Count the PIL calls that dominate text measurement and image loading"""
+    targets = [
+        (ImageDraw.ImageDraw, 'textbbox', 'textbbox'),
+        (ImageFont.FreeTypeFont, 'getbbox', 'font getbbox'),
+        (ImageFont.FreeTypeFont, 'getlength', 'font getlength'),
+        (ImageFont, 'truetype', 'font loads'),
+        (Image, 'open', 'Image.open'),
+    ]
+    for owner, attribute, name in targets:
+        function = getattr(owner, attribute)
+        if not getattr(function, '_pictionary_trace_counted', False):
+            setattr(owner, attribute, _counted(name, function))
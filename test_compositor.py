@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Frame Compositor Parity Test
+
+Checks that the NumPy FrameCompositor in pictionary-python-generator.py
+produces exactly the pixels of pasting every display list sprite onto a PIL
+image with paste_sprite: text and drawing coverage masks, grayscale, colour
+and translucent round images, the title, loading indicators, history strip
+crops and sprites cut off by the frame edges, also in square and landscape
+frames that centre the layout column and with the pen reveal.
+
+Run with pytest, or directly to also time both compositors:
+
+    python test_compositor.py
+"""
+
+import os
+import random
+import shutil
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+import pictionary_fonts
+from pictionary_generator import load_generator
+
+generator = load_generator()
+
+PROMPTS = ["cat", "a submarine sandwich with extra pickles and mustard", "tree house", "dancing volcano wizard"]
+
+
+_saved_font_index_path = None
+
+
+def setup_module():
+    """Look fonts up without reading or writing the persisted font index"""
+    global _saved_font_index_path
+    _saved_font_index_path = pictionary_fonts.FONT_INDEX_PATH
+    pictionary_fonts.set_font_index_path(None)
+
+
+def teardown_module():
+    pictionary_fonts.set_font_index_path(_saved_font_index_path)
+
+
+def reference_composite(display_list, config):
+    """The PIL compositor: paste every sprite onto a blank RGB image"""
+    image = Image.new('RGB', (config.geometry.frame_width, config.geometry.height), generator.BACKGROUND_COLOR)
+    for sprite_id, y in display_list:
+        generator.paste_sprite(image, sprite_id, generator.resolve_sprite(sprite_id, config), y,
+                               config.geometry.left)
+    return image
+
+
+def make_round_image(seed, kind, size=(300, 260)):
+    """Seeded round image: black line art, a colour drawing or a translucent drawing"""
+    rng = random.Random(seed)
+    mode, background = ('RGBA', (255, 255, 255, 0)) if kind == 'translucent' else ('RGB', (255, 255, 255))
+    image = Image.new(mode, size, background)
+    draw = ImageDraw.Draw(image)
+    for _ in range(rng.randint(4, 9)):
+        points = [(rng.randrange(size[0]), rng.randrange(size[1])) for _ in range(rng.randint(2, 5))]
+        if kind == 'line art':
+            fill = (0, 0, 0)
+        else:
+            fill = (rng.randrange(256), rng.randrange(256), rng.randrange(256))
+        if mode == 'RGBA':
+            fill += (rng.randint(40, 255),)
+        draw.line(points, fill=fill, width=rng.randint(1, 6))
+    return image
+
+
+def make_game(game_dir, kinds):
+    """Write round_N.png and round_N_summary.txt files like the Node script does"""
+    for round_num, kind in enumerate(kinds, 1):
+        make_round_image(round_num, kind).save(os.path.join(game_dir, f"round_{round_num}.png"))
+        with open(os.path.join(game_dir, f"round_{round_num}_summary.txt"), 'w') as f:
+            f.write(f"Round {round_num}\nActual Word: {PROMPTS[(round_num - 1) % len(PROMPTS)]}\n")
+
+
+def make_config(game_dir, geometry=None, fps=10, duration=3, cache_dir=None, reveal='pixel'):
+    all_rounds = generator.read_game_log(game_dir)
+    frames_per_round = int(duration * fps)
+    return generator.FrameGenerationConfig(
+        all_rounds=all_rounds,
+        total_rounds=len(all_rounds),
+        duration=duration,
+        fps=fps,
+        font_path=generator.get_default_font(),
+        frames_per_round=frames_per_round,
+        initial_loading=int(frames_per_round * 0.18),
+        text_phase=int(frames_per_round * 0.26),
+        image_delay=int(frames_per_round * 0.18),
+        drawing_phase=int(frames_per_round * 0.4),
+        title_duration_frames=int(3 * fps),
+        part_number=3,
+        cache_dir=cache_dir,
+        geometry=geometry,
+        reveal=reveal
+    )
+
+
+def assert_frames_match(config, frame_numbers):
+    buffer = config.compositor.new_buffer()
+    for frame_num in frame_numbers:
+        display_list = generator.build_display_list(frame_num, config)
+        expected = np.asarray(reference_composite(display_list, config))
+        actual = config.compositor.composite(display_list, buffer)
+        assert np.array_equal(actual, expected), f"frame {frame_num} differs: {display_list}"
+
+
+def with_game(kinds, check):
+    game_dir = tempfile.mkdtemp(prefix='compositor_test_')
+    try:
+        make_game(game_dir, kinds)
+        check(game_dir)
+    finally:
+        shutil.rmtree(game_dir, ignore_errors=True)
+
+
+def test_matches_pil_on_every_frame():
+    def check(game_dir):
+        config = make_config(game_dir)
+        assert_frames_match(config, range(config.frames_per_round * config.total_rounds))
+    with_game(['line art', 'colour', 'translucent', 'line art'], check)
+
+
+def test_matches_pil_at_draft_size():
+    def check(game_dir):
+        config = make_config(game_dir, geometry=generator.FrameGeometry.scaled(generator.DRAFT_SCALE))
+        assert_frames_match(config, range(0, config.frames_per_round * config.total_rounds, 3))
+    with_game(['translucent', 'line art', 'colour'], check)
+
+
+def test_matches_pil_in_other_frame_sizes():
+    def check(game_dir):
+        config = make_config(game_dir, geometry=generator.FrameGeometry.scaled(generator.DRAFT_SCALE))
+        for frame_size in ((1080, 1080), (1920, 1080)):
+            variant = config.variant(config.geometry.variant(*frame_size))
+            assert variant.processed_elements is config.processed_elements
+            assert variant.compositor.new_buffer().shape == (frame_size[1] // 2, frame_size[0] // 2, 3)
+            assert_frames_match(variant, range(0, variant.frames_per_round * variant.total_rounds, 2))
+    with_game(['colour', 'line art', 'translucent'], check)
+
+
+def test_matches_pil_with_pen_reveal():
+    def check(game_dir):
+        config = make_config(game_dir, reveal='pen')
+        frames = list(range(config.frames_per_round * config.total_rounds))
+        # Reversed frames make the compositor redraw pen reveals from scratch
+        assert_frames_match(config, frames + frames[::-1])
+    with_game(['line art', 'colour', 'translucent'], check)
+
+
+def test_title_is_not_covered_in_short_frame_sizes():
+    """Square and landscape frames keep the rounds clear of the title while it is shown"""
+    def check(game_dir):
+        for duration in (3, 1):
+            config = make_config(game_dir, geometry=generator.FrameGeometry.scaled(generator.DRAFT_SCALE),
+                                 duration=duration)
+            for frame_size in ((1080, 1080), (1920, 1080)):
+                variant = config.variant(config.geometry.variant(*frame_size))
+                title, top = variant.sprites.title(variant.part_number)
+                left = variant.geometry.left
+                buffer = variant.compositor.new_buffer()
+                for frame_num in range(variant.title_duration_frames):
+                    frame = variant.compositor.composite(variant.timeline.display_list(frame_num), buffer)
+                    assert np.array_equal(frame[top:top + title.height, left:left + title.width], np.asarray(title)), \
+                        f"title covered in frame {frame_num} of {frame_size} with {duration}s rounds"
+    with_game(['colour', 'line art', 'colour'], check)
+
+
+class RecordingWriter:
+    """Stands in for FFmpegFrameWriter and keeps a copy of every frame"""
+
+    def __init__(self):
+        self.frames = []
+
+    def write(self, frame_bytes):
+        self.frames.append(np.array(frame_bytes))
+
+    def close(self):
+        pass
+
+    def abort(self):
+        pass
+
+
+def test_held_frames_release_each_slot_once():
+    """Frames streamed through a small window come out right and free each buffer slot once"""
+    def check(game_dir):
+        config = make_config(game_dir)
+        frame_numbers = range(config.frames_per_round * config.total_rounds)
+        thumbnail_frame = generator.get_thumbnail_frame_number(config)
+        expected = [np.asarray(reference_composite(
+            generator.build_display_list(thumbnail_frame if frame_num == 0 else frame_num, config), config))
+            for frame_num in frame_numbers]
+        for window in (1, 2, 3):
+            backend = generator.ThreadFrameBackend(config, 1, slots=window)
+            release = backend.release
+
+            def release_once(handle):
+                assert handle[0] not in backend.free_slots, f"slot {handle[0]} released twice"
+                release(handle)
+            backend.release = release_once
+            writer = RecordingWriter()
+            reused_frames = generator.encode_frame_range(config, backend, writer, frame_numbers, window)
+            backend.close()
+            # A window of 1 writes and releases every frame before the next one is submitted
+            assert (reused_frames > 0) == (window > 1)
+            assert sorted(backend.free_slots) == list(range(window))
+            assert len(writer.frames) == len(expected)
+            for frame_num, (actual, frame) in enumerate(zip(writer.frames, expected)):
+                assert np.array_equal(actual, frame), f"frame {frame_num} differs with a window of {window}"
+    with_game(['line art', 'colour'], check)
+
+
+def test_blend_rounding_matches_pil_paste():
+    rng = np.random.default_rng(5)
+    alpha = np.arange(256, dtype=np.uint8).reshape(16, 16)
+    colour = rng.integers(0, 256, (16, 16, 3), dtype=np.uint8)
+    sprite = Image.fromarray(np.dstack([colour, alpha]), 'RGBA')
+    for background in (0, 37, 128, 255):
+        canvas = Image.new('RGB', (20, 20), (background,) * 3)
+        frame = np.array(canvas)
+        canvas.paste(sprite, (0, 2), sprite)
+        _, top, left, inverse_alpha, premultiplied = generator.FrameCompositor._prepare('image_0', sprite)
+        generator.FrameCompositor._blend(frame, top, left, inverse_alpha, premultiplied, 2)
+        assert np.array_equal(frame, np.asarray(canvas))
+
+
+def compare_timings():
+    """Time both compositors over every frame of a synthetic game"""
+    def check(game_dir):
+        config = make_config(game_dir, fps=30)
+        display_lists = [generator.build_display_list(frame_num, config)
+                         for frame_num in range(config.frames_per_round * config.total_rounds)]
+        buffer = config.compositor.new_buffer()
+
+        start = time.perf_counter()
+        for display_list in display_lists:
+            reference_composite(display_list, config).tobytes()
+        reference_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for display_list in display_lists:
+            config.compositor.composite(display_list, buffer)
+        numpy_time = time.perf_counter() - start
+
+        frames = len(display_lists)
+        print(f"{frames} frames: PIL {reference_time / frames * 1000:.2f} ms/frame, "
+              f"NumPy {numpy_time / frames * 1000:.2f} ms/frame ({reference_time / max(numpy_time, 1e-9):.1f}x)")
+    with_game(['line art', 'colour', 'translucent', 'line art', 'line art', 'colour'], check)
+
+
+def main():
+    """Main function."""
+    setup_module()
+    try:
+        test_matches_pil_on_every_frame()
+        test_matches_pil_at_draft_size()
+        test_matches_pil_in_other_frame_sizes()
+        test_matches_pil_with_pen_reveal()
+        test_title_is_not_covered_in_short_frame_sizes()
+        test_held_frames_release_each_slot_once()
+        test_blend_rounding_matches_pil_paste()
+        print("✓ NumPy compositor matches the PIL compositor")
+        compare_timings()
+    finally:
+        teardown_module()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Preprocessed Element Cache Test
+
+Checks that the on-disk ElementCache in pictionary-python-generator.py gives
+back exactly the resized images and packed pixel or pen strokes that
+preprocessing computes, keys entries by image content, recomputes unreadable
+entries and evicts the least recently used entries once it outgrows its size
+bound.
+
+Run with pytest, or directly:
+
+    python test_element_cache.py
+"""
+
+import os
+import shutil
+
+import numpy as np
+
+# setup_module and teardown_module keep the tests out of the persisted font index
+from test_compositor import generator, make_config, make_round_image, setup_module, teardown_module, with_game
+
+
+def assert_same_elements(actual, expected):
+    assert actual.keys() == expected.keys()
+    for key, element in expected.items():
+        other = actual[key]
+        if element is None:
+            assert other is None, key
+        elif key.startswith('strokes_'):
+            assert other.keys() == element.keys() and other['size'] == element['size'], key
+            for name in element.keys() - {'size'}:
+                assert other[name].dtype == element[name].dtype, key
+                assert np.array_equal(other[name], element[name]), key
+        else:
+            assert other.mode == element.mode and other.size == element.size, key
+            assert np.array_equal(np.asarray(other), np.asarray(element)), key
+
+
+def cache_entries(cache_dir):
+    return sorted(os.listdir(os.path.join(cache_dir, 'elements')))
+
+
+def test_cached_elements_match_preprocessing():
+    def check(game_dir):
+        cache_dir = os.path.join(game_dir, 'cache')
+        for entry_count, reveal in ((4, 'pixel'), (8, 'pen')):
+            expected = make_config(game_dir, reveal=reveal).processed_elements
+            assert_same_elements(make_config(game_dir, cache_dir=cache_dir, reveal=reveal).processed_elements,
+                                 expected)
+            entries = cache_entries(cache_dir)
+            assert len(entries) == entry_count
+            assert_same_elements(make_config(game_dir, cache_dir=cache_dir, reveal=reveal).processed_elements,
+                                 expected)
+            assert cache_entries(cache_dir) == entries
+    with_game(['line art', 'colour', 'translucent', 'line art'], check)
+
+
+def test_entries_are_keyed_by_content_and_geometry():
+    def check(game_dir):
+        cache_dir = os.path.join(game_dir, 'cache')
+        # Round 3 is a copy of round 1 under another name
+        shutil.copyfile(os.path.join(game_dir, 'round_1.png'), os.path.join(game_dir, 'round_3.png'))
+        make_config(game_dir, cache_dir=cache_dir)
+        assert len(cache_entries(cache_dir)) == 2
+        make_config(game_dir, cache_dir=cache_dir, geometry=generator.FrameGeometry.scaled(generator.DRAFT_SCALE))
+        assert len(cache_entries(cache_dir)) == 4
+    with_game(['line art', 'colour', 'line art'], check)
+
+
+def test_unreadable_entries_are_recomputed():
+    def check(game_dir):
+        cache_dir = os.path.join(game_dir, 'cache')
+        expected = make_config(game_dir, cache_dir=cache_dir).processed_elements
+        for entry in cache_entries(cache_dir):
+            with open(os.path.join(cache_dir, 'elements', entry), 'wb') as f:
+                f.write(b'not an npz file')
+        assert_same_elements(make_config(game_dir, cache_dir=cache_dir).processed_elements, expected)
+        assert_same_elements(make_config(game_dir, cache_dir=cache_dir).processed_elements, expected)
+    with_game(['line art', 'translucent'], check)
+
+
+def test_least_recently_used_entries_are_evicted():
+    def check(game_dir):
+        cache_dir = os.path.join(game_dir, 'cache')
+        paths = [os.path.join(game_dir, f"round_{round_num}.png") for round_num in (1, 2, 3)]
+        preprocess = lambda path: (make_round_image(paths.index(path) + 1, 'colour'), None)
+        cache = generator.ElementCache(cache_dir)
+        for age, path in enumerate(paths):
+            cache.get(path, preprocess)
+            os.utime(cache._entry_path(path), (1000 + age, 1000 + age))
+        entry_size = os.path.getsize(cache._entry_path(paths[0]))
+
+        # Reading round 1 makes round 2 the least recently used entry
+        cache.get(paths[0], preprocess)
+        cache.max_bytes = 3 * entry_size
+        cache.get(os.path.join(game_dir, 'round_4.png'), lambda path: (make_round_image(4, 'colour'), None))
+        assert [os.path.exists(cache._entry_path(path)) for path in paths] == [True, False, True]
+    with_game(['line art', 'colour', 'translucent', 'line art'], check)
+
+
+def main():
+    """Main function."""
+    setup_module()
+    try:
+        test_cached_elements_match_preprocessing()
+        test_entries_are_keyed_by_content_and_geometry()
+        test_unreadable_entries_are_recomputed()
+        test_least_recently_used_entries_are_evicted()
+        print("✓ Element cache returns the preprocessed elements and stays within its size bound")
+    finally:
+        teardown_module()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Stroke Extraction Parity Test
+
+Checks that the vectorized stroke extraction in pictionary-python-generator.py
+returns exactly what the original per-pixel BFS returned: the same strokes, in
+the same order, with the same pixel order and start/end timings. Also checks
+the vectorized Zhang-Suen thinning against a per-pixel one and that the pen
+reveal traces every stroke skeleton with far less data than the pixel reveal.
+
+Run with pytest, or directly to also time both implementations on real
+round_N.png images:
+
+    python test_stroke_extraction.py --game-dir pictionary_game_[timestamp]
+"""
+
+import argparse
+import glob
+import os
+import random
+import time
+from collections import deque
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from pictionary_generator import load_generator
+
+generator = load_generator()
+
+
+def extract_strokes(image, threshold=80):
+    """Run the generator's stroke extraction without building a full config"""
+    config = object.__new__(generator.FrameGenerationConfig)
+    return config._extract_black_strokes(image, threshold)
+
+
+def reference_extract_black_strokes(image, threshold=80):
+    """The original pure-Python implementation, kept verbatim as the reference"""
+    gray = image.convert('L')
+    pixels = gray.load()
+    width, height = image.size
+    visited = [[False] * height for _ in range(width)]
+    strokes = []
+
+    for y in range(height):
+        for x in range(width):
+            if not visited[x][y] and pixels[x, y] < threshold:
+                stroke = []
+                queue = deque()
+                queue.append((x, y))
+                visited[x][y] = True
+                while queue:
+                    cx, cy = queue.popleft()
+                    stroke.append((cx, cy))
+                    # Check 8 neighbors
+                    for dx in [-1, 0, 1]:
+                        for dy in [-1, 0, 1]:
+                            if dx == 0 and dy == 0:
+                                continue
+                            nx, ny = cx + dx, cy + dy
+                            if (0 <= nx < width and 0 <= ny < height and
+                                not visited[nx][ny] and pixels[nx, ny] < threshold):
+                                visited[nx][ny] = True
+                                queue.append((nx, ny))
+                strokes.append(stroke)
+
+    # Sort by length and prepare timings
+    strokes.sort(key=len, reverse=True)
+    stroke_timings = []
+    if len(strokes) > 1:
+        for i, stroke in enumerate(strokes):
+            start = i / len(strokes)
+            end = 1.0
+            if i % 2 == 1:
+                stroke = list(reversed(stroke))
+            stroke_timings.append((stroke, start, end))
+    else:
+        if strokes:
+            stroke_timings.append((strokes[0], 0.0, 1.0))
+
+    return stroke_timings
+
+
+def reference_drawing_animation(strokes, progress):
+    """The original putpixel reveal, used to check the packed reveal order"""
+    max_x = max(max(x for x, y in stroke) for stroke, _, _ in strokes)
+    max_y = max(max(y for x, y in stroke) for stroke, _, _ in strokes)
+    result = Image.new('RGBA', (max_x + 1, max_y + 1), (0, 0, 0, 0))
+    for stroke, start, end in strokes:
+        if progress >= end:
+            for x, y in stroke:
+                result.putpixel((x, y), (0, 0, 0, 255))
+        elif progress > start:
+            local_progress = (progress - start) / (end - start)
+            reveal_count = int(len(stroke) * local_progress)
+            for x, y in stroke[:reveal_count]:
+                result.putpixel((x, y), (0, 0, 0, 255))
+    return result
+
+
+def reference_thin_mask(mask):
+    """Textbook Zhang-Suen thinning, one pixel at a time"""
+    pixels = np.pad(mask, 1).astype(np.uint8)
+    changed = True
+    while changed:
+        changed = False
+        for first_pass in (True, False):
+            removed = []
+            for y, x in zip(*np.nonzero(pixels)):
+                p2, p3, p4, p5 = pixels[y - 1, x], pixels[y - 1, x + 1], pixels[y, x + 1], pixels[y + 1, x + 1]
+                p6, p7, p8, p9 = pixels[y + 1, x], pixels[y + 1, x - 1], pixels[y, x - 1], pixels[y - 1, x - 1]
+                ring = [p2, p3, p4, p5, p6, p7, p8, p9]
+                transitions = sum(ring[i] == 0 and ring[(i + 1) % 8] == 1 for i in range(8))
+                if first_pass:
+                    blocked = p2 * p4 * p6 or p4 * p6 * p8
+                else:
+                    blocked = p2 * p4 * p8 or p2 * p6 * p8
+                if 2 <= sum(ring) <= 6 and transitions == 1 and not blocked:
+                    removed.append((y, x))
+            for y, x in removed:
+                pixels[y, x] = 0
+            changed = changed or bool(removed)
+    return pixels[1:-1, 1:-1].astype(bool)
+
+
+def make_line_art(seed, size=(240, 180)):
+    """Seeded black-on-white doodle with lines, loops, specks and touching edges"""
+    rng = random.Random(seed)
+    image = Image.new('RGB', size, (255, 255, 255))
+    draw = ImageDraw.Draw(image)
+    width, height = size
+    for _ in range(rng.randint(3, 8)):
+        points = [(rng.randint(-10, width + 10), rng.randint(-10, height + 10)) for _ in range(rng.randint(2, 5))]
+        draw.line(points, fill=(0, 0, 0), width=rng.randint(1, 5))
+    for _ in range(rng.randint(1, 3)):
+        x, y = rng.randint(0, width - 40), rng.randint(0, height - 40)
+        draw.ellipse((x, y, x + rng.randint(10, 40), y + rng.randint(10, 40)), outline=(40, 40, 40), width=rng.randint(1, 3))
+    for _ in range(rng.randint(0, 20)):
+        image.putpixel((rng.randrange(width), rng.randrange(height)), (rng.randint(0, 120),) * 3)
+    return image
+
+
+def assert_same_strokes(actual, expected):
+    assert len(actual) == len(expected)
+    for (stroke, start, end), (ref_stroke, ref_start, ref_end) in zip(actual, expected):
+        assert (start, end) == (ref_start, ref_end)
+        assert [tuple(point) for point in stroke.tolist()] == ref_stroke
+
+
+def test_matches_reference_on_line_art():
+    for seed in range(12):
+        image = make_line_art(seed)
+        assert_same_strokes(extract_strokes(image), reference_extract_black_strokes(image))
+
+
+def test_matches_reference_on_rgba_and_threshold():
+    image = make_line_art(99).convert('RGBA')
+    for threshold in (1, 45, 80, 200):
+        assert_same_strokes(extract_strokes(image, threshold), reference_extract_black_strokes(image, threshold))
+
+
+def test_packed_reveal_matches_reference_animation():
+    image = make_line_art(7)
+    config = object.__new__(generator.FrameGenerationConfig)
+    packed = config._pack_strokes(extract_strokes(image))
+    reference = reference_extract_black_strokes(image)
+    drawing_frames = 33
+    for frame in range(drawing_frames + 1):
+        progress = frame / drawing_frames
+        actual = generator.create_drawing_animation(packed, progress)
+        expected = reference_drawing_animation(reference, progress)
+        # The reveal is a coverage mask; the reference draws opaque black pixels
+        assert actual.mode == 'L'
+        assert actual.tobytes() == expected.getchannel('A').tobytes()
+
+
+def test_thinning_matches_reference():
+    for seed in range(6):
+        mask = np.asarray(make_line_art(seed).convert('L')) < 80
+        assert np.array_equal(generator._thin_mask(mask), reference_thin_mask(mask))
+    rng = np.random.default_rng(3)
+    for _ in range(20):
+        mask = rng.random((24, 30)) < rng.uniform(0.3, 0.8)
+        assert np.array_equal(generator._thin_mask(mask), reference_thin_mask(mask))
+
+
+def test_pen_reveal_traces_every_skeleton():
+    image = make_line_art(5, size=(480, 360)).resize((960, 720), Image.Resampling.LANCZOS)
+    config = object.__new__(generator.FrameGenerationConfig)
+    config.geometry = generator.FrameGeometry()
+    stroke_timings = extract_strokes(image)
+    pixels = config._pack_strokes(stroke_timings)
+    pen = config._pack_pen_strokes(stroke_timings)
+    assert pen['size'] == pixels['size']
+    assert np.all(np.diff(pen['thresholds']) >= 0) and pen['thresholds'][-1] == 1.0
+    assert sum(array.nbytes for array in pen.values() if isinstance(array, np.ndarray)) * 10 < \
+           sum(array.nbytes for array in pixels.values() if isinstance(array, np.ndarray))
+
+    # The finished pen drawing passes within the simplification tolerance of
+    # every skeleton pixel and lays down about as much ink as the strokes have
+    mask = np.asarray(image.convert('L'))[:pixels['size'][1], :pixels['size'][0]] < 80
+    drawn = np.asarray(generator.render_stroke_reveal(pen, len(pen['thresholds']))) != 0
+    near_drawn = np.pad(drawn, 1)
+    near_drawn = np.any([near_drawn[1 + dy:near_drawn.shape[0] - 1 + dy, 1 + dx:near_drawn.shape[1] - 1 + dx]
+                         for dy in (-1, 0, 1) for dx in (-1, 0, 1)], axis=0)
+    assert not (generator._thin_mask(mask) & ~near_drawn).any()
+    assert (drawn & mask).sum() > 0.8 * drawn.sum()
+    assert 0.8 < drawn.sum() / mask.sum() < 1.25
+    assert generator.drawing_reveal_count(pen, 0.5) < generator.drawing_reveal_count(pen, 1.0)
+
+
+def test_edge_cases():
+    blank = Image.new('RGB', (32, 16), (255, 255, 255))
+    assert extract_strokes(blank) == []
+
+    single = Image.new('RGB', (32, 16), (255, 255, 255))
+    single.putpixel((31, 15), (0, 0, 0))
+    assert_same_strokes(extract_strokes(single), reference_extract_black_strokes(single))
+
+    full = Image.new('RGB', (17, 9), (0, 0, 0))
+    assert_same_strokes(extract_strokes(full), reference_extract_black_strokes(full))
+
+
+def compare_timings(game_dir):
+    """Time both implementations on the round images of a game directory"""
+    image_paths = sorted(glob.glob(os.path.join(game_dir, 'round_*.png')),
+                         key=lambda path: int(os.path.basename(path).split('_')[1].split('.')[0]))
+    if not image_paths:
+        print(f"No round_N.png images found in {game_dir}")
+        return
+
+    config = object.__new__(generator.FrameGenerationConfig)
+    total_reference = total_vectorized = 0.0
+    for path in image_paths:
+        image = config._resize_image(path)
+
+        start = time.time()
+        expected = reference_extract_black_strokes(image)
+        reference_time = time.time() - start
+
+        start = time.time()
+        actual = extract_strokes(image)
+        vectorized_time = time.time() - start
+
+        assert_same_strokes(actual, expected)
+        total_reference += reference_time
+        total_vectorized += vectorized_time
+        print(f"{os.path.basename(path)}: {len(actual)} strokes - reference {reference_time:.2f}s, "
+              f"vectorized {vectorized_time:.2f}s ({reference_time / max(vectorized_time, 1e-9):.1f}x)")
+
+    print(f"Total: reference {total_reference:.2f}s, vectorized {total_vectorized:.2f}s "
+          f"({total_reference / max(total_vectorized, 1e-9):.1f}x)")
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description='Stroke extraction parity test and timing comparison')
+    parser.add_argument('--game-dir', '-g', type=str, default=None,
+                        help='Game directory whose round_N.png images are used for the timing comparison')
+    args = parser.parse_args()
+
+    test_matches_reference_on_line_art()
+    test_matches_reference_on_rgba_and_threshold()
+    test_packed_reveal_matches_reference_animation()
+    test_thinning_matches_reference()
+    test_pen_reveal_traces_every_skeleton()
+    test_edge_cases()
+    print("✓ Vectorized stroke extraction matches the reference implementation")
+
+    if args.game_dir:
+        compare_timings(args.game_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Text Layout Parity Test
+
+Checks that layout_text in pictionary-python-generator.py, which measures
+lines with the cached glyph metrics from pictionary_fonts.py, picks exactly
+the font size, line breaks and element height of the original textbbox
+wrap-and-shrink loop, and that text elements render identically.
+
+Run with pytest, or directly:
+
+    python test_text_layout.py
+"""
+
+import random
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+import pictionary_fonts
+from pictionary_fonts import get_default_font, get_font, set_font_index_path
+from test_stroke_extraction import generator
+
+VIDEO_WIDTH = generator.VIDEO_WIDTH
+
+WORDS = [
+    "a", "an", "the", "of", "cat", "dog", "astronaut", "riding", "unicycle", "through", "volcanic",
+    "Pictionary", "extraordinarily", "wobbly", "jellyfish", "skyscraper", "tiny", "enormous",
+    "WWWWWWWW", "llllllll", "AVATAR", "To", "Ty", "jumping", "over", "moon", "quick", "brown",
+    "fox", "supercalifragilisticexpialidocious", "é", "naïve", "café", "rock'n'roll", "1984",
+    "—", "?", "a-b-c", "HELLO", "world", "pineapple", "on", "pizza", "in", "space"
+]
+
+
+_saved_font_index_path = None
+
+
+def setup_module():
+    """Look fonts up without reading or writing the persisted font index"""
+    global _saved_font_index_path
+    _saved_font_index_path = pictionary_fonts.FONT_INDEX_PATH
+    set_font_index_path(None)
+
+
+def teardown_module():
+    set_font_index_path(_saved_font_index_path)
+
+
+def reference_create_text_element(text, font_path, font_size=140):
+    """The original wrap-and-shrink loop of _create_text_element, kept verbatim as the reference
+
+    Returns the element together with the chosen font size and lines.
+    """
+    # Start with the provided font size and reduce if needed
+    current_font_size = font_size
+    max_width = VIDEO_WIDTH - 80
+    min_font_size = 60  # Minimum font size to prevent text from becoming too small
+
+    # Try to find the best font size that fits the text
+    while current_font_size >= min_font_size:
+        font = get_font(font_path, current_font_size)
+
+        # Test if this font size works
+        dummy_img = Image.new('RGBA', (VIDEO_WIDTH, 10), (0,0,0,0))
+        draw = ImageDraw.Draw(dummy_img)
+
+        # Wrap text with current font size
+        words = text.split()
+        lines = []
+        current_line = ""
+
+        for word in words:
+            test_line = current_line + (" " if current_line else "") + word
+            bbox = draw.textbbox((0, 0), test_line, font=font)
+            w = bbox[2] - bbox[0]
+            if w > max_width and current_line:
+                lines.append(current_line)
+                current_line = word
+            else:
+                current_line = test_line
+        if current_line:
+            lines.append(current_line)
+
+        # Check if this font size results in too many lines OR if any single line is too wide
+        max_lines = 4  # Maximum number of lines we want to allow
+        max_line_width = VIDEO_WIDTH - 200  # Maximum width for any single line (more aggressive margin)
+
+        # Check if the full text (before wrapping) is too wide
+        full_text_bbox = draw.textbbox((0, 0), text, font=font)
+        full_text_width = full_text_bbox[2] - full_text_bbox[0]
+        full_text_too_wide = full_text_width > max_line_width
+
+        # Check if any individual line is too wide
+        line_too_wide = False
+        for line in lines:
+            bbox = draw.textbbox((0, 0), line, font=font)
+            w = bbox[2] - bbox[0]
+            if w > max_line_width:
+                line_too_wide = True
+                break
+
+        if len(lines) <= max_lines and not line_too_wide and not full_text_too_wide:
+            # This font size works, break out of the loop
+            break
+
+        # Reduce font size and try again
+        current_font_size -= 10
+
+    # Ensure we don't go below minimum
+    current_font_size = max(current_font_size, min_font_size)
+
+    # Create final font with the determined size
+    font = get_font(font_path, current_font_size)
+
+    # Re-wrap text with final font size
+    words = text.split()
+    lines = []
+    current_line = ""
+    dummy_img = Image.new('RGBA', (VIDEO_WIDTH, 10), (0,0,0,0))
+    draw = ImageDraw.Draw(dummy_img)
+
+    for word in words:
+        test_line = current_line + (" " if current_line else "") + word
+        bbox = draw.textbbox((0, 0), test_line, font=font)
+        w = bbox[2] - bbox[0]
+        if w > max_width and current_line:
+            lines.append(current_line)
+            current_line = word
+        else:
+            current_line = test_line
+    if current_line:
+        lines.append(current_line)
+
+    # Calculate total height
+    bbox = draw.textbbox((0, 0), 'A', font=font)
+    line_height = (bbox[3] - bbox[1]) + 10
+    EXTRA_BOTTOM_PADDING = 30
+    total_height = line_height * len(lines) + 40 + EXTRA_BOTTOM_PADDING
+
+    text_img = Image.new('RGBA', (VIDEO_WIDTH, total_height), (0,0,0,0))
+    draw = ImageDraw.Draw(text_img)
+    y = 20
+    for line in lines:
+        bbox = draw.textbbox((0, 0), line, font=font)
+        w = bbox[2] - bbox[0]
+        draw.text(((VIDEO_WIDTH - w) // 2, y), line, fill=(0,0,0,255), font=font)
+        y += line_height
+
+    return text_img, current_font_size, lines
+
+
+def random_prompts(count, seed=6):
+    rng = random.Random(seed)
+    prompts = []
+    for _ in range(count):
+        word_count = rng.randint(1, rng.choice((4, 8, 24)))
+        prompts.append(" ".join(rng.choice(WORDS) for _ in range(word_count)))
+    return prompts
+
+
+def make_text_renderer(font_path):
+    """A config with just enough state for _create_text_element"""
+    config = object.__new__(generator.FrameGenerationConfig)
+    config.geometry = generator.FrameGeometry()
+    config.text_layouts = generator.TextLayoutCache(font_path)
+    return config
+
+
+def test_layout_matches_reference():
+    font_path = get_default_font(bold=True)
+    config = make_text_renderer(font_path)
+    for text in random_prompts(300):
+        expected, font_size, lines = reference_create_text_element(text, font_path)
+        layout = generator.layout_text(text, font_path)
+        assert (layout['font_size'], layout['lines'], layout['height']) == (font_size, lines, expected.height), text
+
+        # The reference paints black ink, so its alpha channel is the coverage mask
+        element = config._create_text_element(text)
+        assert element.size == expected.size, text
+        assert np.array_equal(np.asarray(element), np.asarray(expected.getchannel('A'))), text
+
+
+def main():
+    """Main function."""
+    setup_module()
+    try:
+        test_layout_matches_reference()
+    finally:
+        teardown_module()
+    print("✓ layout_text matches the textbbox wrap-and-shrink loop on 300 prompts")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Compiled Timeline Test
+
+Checks that the Timeline compiled by pictionary-python-generator.py gives
+every frame exactly the display list build_display_list returns, survives a
+save/load round trip, and that the audio cues built from the shared round
+phases match the original per-round arithmetic. Also checks the distinct
+frames and setpts timestamps of variable frame rate output.
+
+Run with pytest, or directly:
+
+    python test_timeline.py
+"""
+
+import os
+
+# setup_module and teardown_module keep the tests out of the persisted font index
+from test_compositor import generator, make_config, setup_module, teardown_module, with_game
+
+
+def reference_audio_cues(num_rounds, fps, frames_per_round, initial_loading, text_phase, image_delay, drawing_phase):
+    """The original cue arithmetic, kept verbatim as the reference"""
+    cues = []
+    for i in range(num_rounds):
+        round_start = i * frames_per_round
+        if i == 0:
+            GENERATE_DELAY_FRAMES = int(frames_per_round * 0.18)
+            cues.append((round_start + GENERATE_DELAY_FRAMES + image_delay, drawing_phase, 'drawing'))
+        else:
+            cues.append((round_start, initial_loading, 'thinking'))
+            cues.append((round_start + initial_loading + text_phase + image_delay, drawing_phase, 'drawing'))
+    return [cue for cue in cues if cue[1] > 0]
+
+
+def test_timeline_matches_display_lists():
+    def check(game_dir):
+        for geometry in (None, generator.FrameGeometry.scaled(generator.DRAFT_SCALE)):
+            config = make_config(game_dir, geometry=geometry)
+            assert len(config.timeline) == config.frames_per_round * config.total_rounds
+            for frame_num in range(len(config.timeline)):
+                assert config.timeline.display_list(frame_num) == generator.build_display_list(frame_num, config)
+    with_game(['line art', 'colour', 'translucent', 'line art'], check)
+
+
+def test_save_and_load_round_trip():
+    def check(game_dir):
+        config = make_config(game_dir)
+        path = os.path.join(game_dir, 'timeline.npz')
+        config.timeline.save(path)
+        loaded = generator.Timeline.load(path)
+        assert [loaded.display_list(f) for f in range(len(loaded))] == \
+               [config.timeline.display_list(f) for f in range(len(config.timeline))]
+    with_game(['line art', 'colour'], check)
+
+
+def test_audio_cues_match_reference():
+    for fps in (15, 24, 30, 60):
+        for duration in (2, 2.5, 3, 4):
+            frames_per_round = int(duration * fps)
+            timing = (frames_per_round, int(frames_per_round * 0.18), int(frames_per_round * 0.26),
+                      int(frames_per_round * 0.18), int(frames_per_round * 0.4))
+            assert generator.audio_cues(6, fps, *timing) == reference_audio_cues(6, fps, *timing)
+
+
+def evaluate_setpts(setpts_filter, fps, index):
+    """Output frame of input frame `index` under a vfr_setpts_filter expression"""
+    expression = setpts_filter[len('setpts='):].replace('\\,', ',').replace('if(', 'if_(').replace('TB', '1')
+    return round(eval(expression, {'if_': lambda c, a, b: a if c else b, 'lt': lambda a, b: a < b, 'N': index}) * fps)
+
+
+def test_distinct_frames_cover_every_change():
+    def check(game_dir):
+        config = make_config(game_dir)
+        for frame_numbers in (range(len(config.timeline)), range(config.frames_per_round, 3 * config.frames_per_round)):
+            frames = generator.distinct_frame_numbers(config, frame_numbers)
+            assert frames[0] == frame_numbers[0]
+            assert frames[-generator.VFR_TAIL_FRAMES:] == list(frame_numbers[-generator.VFR_TAIL_FRAMES:])
+            # Every frame that is not written shows what the frame before it shows
+            for frame_num in set(frame_numbers[1:]) - set(frames):
+                assert config.timeline.display_list(frame_num) == config.timeline.display_list(frame_num - 1)
+            assert len(frames) < len(frame_numbers)
+    with_game(['line art', 'colour', 'translucent'], check)
+
+
+def test_setpts_filter_shows_frames_at_their_times():
+    frame_times = [0, 1, 2, 9, 10, 40, 41, 42, 43, 60, 88, 89]
+    setpts_filter = generator.vfr_setpts_filter(frame_times, 30)
+    assert [evaluate_setpts(setpts_filter, 30, index) for index in range(len(frame_times))] == frame_times
+
+
+def main():
+    """Main function."""
+    setup_module()
+    try:
+        test_timeline_matches_display_lists()
+        test_save_and_load_round_trip()
+        test_audio_cues_match_reference()
+        test_distinct_frames_cover_every_change()
+        test_setpts_filter_shows_frames_at_their_times()
+        print("✓ Compiled timeline matches the per-frame display lists")
+    finally:
+        teardown_module()
+
+
+if __name__ == "__main__":
+    main()